@@ -8,9 +8,12 @@ DELETE FROM MediaAffects;
 DELETE FROM MusicAffects;
 
 DELETE FROM Result;
+DELETE FROM QualiaStats;
+DELETE FROM MoodStats;
 
 DELETE FROM Admin;
 DELETE FROM Client;
+DELETE FROM ClientShard;
 
 DELETE FROM User;
 
@@ -7,6 +7,18 @@ CREATE OR REPLACE PROCEDURE get_moods()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_moods_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Mood
+        WHERE after IS NULL OR Mood.name > after
+        ORDER BY Mood.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_mood(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -28,6 +40,20 @@ CREATE OR REPLACE PROCEDURE put_mood(IN name NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_mood_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Mood (name)
+        SELECT name
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Mood.name = VALUES(name)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_mood(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -46,6 +72,18 @@ CREATE OR REPLACE PROCEDURE get_tastes()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_tastes_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT type
+        FROM Taste
+        WHERE after IS NULL OR Taste.type > after
+        ORDER BY Taste.type
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_taste(IN type NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -67,6 +105,20 @@ CREATE OR REPLACE PROCEDURE put_taste(IN type NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_taste_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Taste (type)
+        SELECT type
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                type NVARCHAR(255) PATH '$.type' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Taste.type = VALUES(type)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_taste(IN type NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -96,6 +148,35 @@ CREATE OR REPLACE PROCEDURE delete_tasteaffects(IN taste NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_tasteaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO TasteAffects (taste, mood)
+        SELECT taste, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                taste NVARCHAR(255) PATH '$.taste' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            TasteAffects.taste = VALUES(taste), TasteAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_tasteaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE TasteAffects
+        FROM TasteAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                taste NVARCHAR(255) PATH '$.taste' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON TasteAffects.taste = item.taste AND TasteAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_tasteaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -144,6 +225,18 @@ CREATE OR REPLACE PROCEDURE get_scents()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_scents_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Scent
+        WHERE after IS NULL OR Scent.name > after
+        ORDER BY Scent.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_scent(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -165,6 +258,21 @@ CREATE OR REPLACE PROCEDURE put_scent(IN name NVARCHAR(255), IN family NVARCHAR(
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_scent_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Scent (name, family)
+        SELECT name, family
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR,
+                family NVARCHAR(255) PATH '$.family' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Scent.name = VALUES(name), Scent.family = VALUES(family)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_scent(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -194,6 +302,35 @@ CREATE OR REPLACE PROCEDURE delete_scentaffects(IN scent NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_scentaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO ScentAffects (scent, mood)
+        SELECT scent, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                scent NVARCHAR(255) PATH '$.scent' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            ScentAffects.scent = VALUES(scent), ScentAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_scentaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE ScentAffects
+        FROM ScentAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                scent NVARCHAR(255) PATH '$.scent' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON ScentAffects.scent = item.scent AND ScentAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_scentaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -242,6 +379,18 @@ CREATE OR REPLACE PROCEDURE get_colors()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_colors_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Color
+        WHERE after IS NULL OR Color.name > after
+        ORDER BY Color.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_color(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -263,6 +412,23 @@ CREATE OR REPLACE PROCEDURE put_color(IN name NVARCHAR(255), IN hue INT, IN satu
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_color_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Color (name, hue, saturation, brightness)
+        SELECT name, hue, saturation, brightness
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR,
+                hue INT PATH '$.hue' ERROR ON ERROR,
+                saturation INT PATH '$.saturation' ERROR ON ERROR,
+                brightness INT PATH '$.brightness' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Color.name = VALUES(name), Color.hue = VALUES(hue), Color.saturation = VALUES(saturation), Color.brightness = VALUES(brightness)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_color(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -292,6 +458,35 @@ CREATE OR REPLACE PROCEDURE delete_coloraffects(IN color NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_coloraffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO ColorAffects (color, mood)
+        SELECT color, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                color NVARCHAR(255) PATH '$.color' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            ColorAffects.color = VALUES(color), ColorAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_coloraffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE ColorAffects
+        FROM ColorAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                color NVARCHAR(255) PATH '$.color' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON ColorAffects.color = item.color AND ColorAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_coloraffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -340,6 +535,18 @@ CREATE OR REPLACE PROCEDURE get_shapes()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_shapes_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Shape
+        WHERE after IS NULL OR Shape.name > after
+        ORDER BY Shape.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_shape(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -361,6 +568,21 @@ CREATE OR REPLACE PROCEDURE put_shape(IN name NVARCHAR(255), IN sides INT)
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_shape_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Shape (name, sides)
+        SELECT name, sides
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR,
+                sides INT PATH '$.sides' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Shape.name = VALUES(name), Shape.sides = VALUES(sides)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_shape(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -390,6 +612,35 @@ CREATE OR REPLACE PROCEDURE delete_shapeaffects(IN shape NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_shapeaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO ShapeAffects (shape, mood)
+        SELECT shape, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                shape NVARCHAR(255) PATH '$.shape' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            ShapeAffects.shape = VALUES(shape), ShapeAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_shapeaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE ShapeAffects
+        FROM ShapeAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                shape NVARCHAR(255) PATH '$.shape' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON ShapeAffects.shape = item.shape AND ShapeAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_shapeaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -438,6 +689,18 @@ CREATE OR REPLACE PROCEDURE get_mediagenres()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_mediagenres_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM MediaGenre
+        WHERE after IS NULL OR MediaGenre.name > after
+        ORDER BY MediaGenre.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_mediagenre(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -459,6 +722,20 @@ CREATE OR REPLACE PROCEDURE put_mediagenre(IN name NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_mediagenre_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MediaGenre (name)
+        SELECT name
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MediaGenre.name = VALUES(name)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_mediagenre(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -488,6 +765,35 @@ CREATE OR REPLACE PROCEDURE delete_mediaaffects(IN media NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_mediaaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MediaAffects (media, mood)
+        SELECT media, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                media NVARCHAR(255) PATH '$.media' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MediaAffects.media = VALUES(media), MediaAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_mediaaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE MediaAffects
+        FROM MediaAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                media NVARCHAR(255) PATH '$.media' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON MediaAffects.media = item.media AND MediaAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_mediaaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -536,6 +842,18 @@ CREATE OR REPLACE PROCEDURE get_musicgenres()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_musicgenres_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM MusicGenre
+        WHERE after IS NULL OR MusicGenre.name > after
+        ORDER BY MusicGenre.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_musicgenre(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -557,6 +875,20 @@ CREATE OR REPLACE PROCEDURE put_musicgenre(IN name NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_musicgenre_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MusicGenre (name)
+        SELECT name
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MusicGenre.name = VALUES(name)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_musicgenre(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -586,6 +918,35 @@ CREATE OR REPLACE PROCEDURE delete_musicaffects(IN music NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_musicaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MusicAffects (music, mood)
+        SELECT music, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                music NVARCHAR(255) PATH '$.music' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MusicAffects.music = VALUES(music), MusicAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_musicaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE MusicAffects
+        FROM MusicAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                music NVARCHAR(255) PATH '$.music' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON MusicAffects.music = item.music AND MusicAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_musicaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -634,6 +995,18 @@ CREATE OR REPLACE PROCEDURE get_admins()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_admins_page(IN after INT, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT id
+        FROM Admin
+        WHERE after IS NULL OR Admin.id > after
+        ORDER BY Admin.id
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_admin(IN id INT)
     READS SQL DATA
     BEGIN
@@ -655,6 +1028,21 @@ CREATE OR REPLACE PROCEDURE put_admin(IN id INT, IN permissions INT)
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_admin_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Admin (id, permissions)
+        SELECT id, permissions
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                id INT PATH '$.id' ERROR ON ERROR,
+                permissions INT PATH '$.permissions' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Admin.id = VALUES(id), Admin.permissions = VALUES(permissions)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_admin(IN id INT)
     MODIFIES SQL DATA
     BEGIN
@@ -673,6 +1061,18 @@ CREATE OR REPLACE PROCEDURE get_clients()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_clients_page(IN after INT, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT id
+        FROM Client
+        WHERE after IS NULL OR Client.id > after
+        ORDER BY Client.id
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_client(IN id INT)
     READS SQL DATA
     BEGIN
@@ -694,6 +1094,24 @@ CREATE OR REPLACE PROCEDURE put_client(IN id INT, IN birthday NVARCHAR(255), IN
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_client_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Client (id, birthday, email, displayName, bio)
+        SELECT id, birthday, email, displayName, bio
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                id INT PATH '$.id' ERROR ON ERROR,
+                birthday NVARCHAR(255) PATH '$.birthday' ERROR ON ERROR,
+                email NVARCHAR(255) PATH '$.email' ERROR ON ERROR,
+                displayName NVARCHAR(255) PATH '$.displayName' ERROR ON ERROR,
+                bio NVARCHAR(255) PATH '$.bio' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Client.id = VALUES(id), Client.birthday = VALUES(birthday), Client.email = VALUES(email), Client.displayName = VALUES(displayName), Client.bio = VALUES(bio)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_client(IN id INT)
     MODIFIES SQL DATA
     BEGIN
@@ -11,6 +11,18 @@ CREATE OR REPLACE PROCEDURE get_moods()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_moods_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Mood
+        WHERE after IS NULL OR Mood.name > after
+        ORDER BY Mood.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_mood(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -32,6 +44,20 @@ CREATE OR REPLACE PROCEDURE put_mood(IN name NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_mood_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Mood (name)
+        SELECT name
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Mood.name = VALUES(name)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_mood(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -50,6 +76,18 @@ CREATE OR REPLACE PROCEDURE get_tastes()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_tastes_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT type
+        FROM Taste
+        WHERE after IS NULL OR Taste.type > after
+        ORDER BY Taste.type
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_taste(IN type NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -71,6 +109,20 @@ CREATE OR REPLACE PROCEDURE put_taste(IN type NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_taste_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Taste (type)
+        SELECT type
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                type NVARCHAR(255) PATH '$.type' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Taste.type = VALUES(type)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_taste(IN type NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -100,6 +152,35 @@ CREATE OR REPLACE PROCEDURE delete_tasteaffects(IN taste NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_tasteaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO TasteAffects (taste, mood)
+        SELECT taste, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                taste NVARCHAR(255) PATH '$.taste' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            TasteAffects.taste = VALUES(taste), TasteAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_tasteaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE TasteAffects
+        FROM TasteAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                taste NVARCHAR(255) PATH '$.taste' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON TasteAffects.taste = item.taste AND TasteAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_tasteaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -148,6 +229,18 @@ CREATE OR REPLACE PROCEDURE get_scents()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_scents_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Scent
+        WHERE after IS NULL OR Scent.name > after
+        ORDER BY Scent.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_scent(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -169,6 +262,21 @@ CREATE OR REPLACE PROCEDURE put_scent(IN name NVARCHAR(255), IN family NVARCHAR(
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_scent_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Scent (name, family)
+        SELECT name, family
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR,
+                family NVARCHAR(255) PATH '$.family' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Scent.name = VALUES(name), Scent.family = VALUES(family)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_scent(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -198,6 +306,35 @@ CREATE OR REPLACE PROCEDURE delete_scentaffects(IN scent NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_scentaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO ScentAffects (scent, mood)
+        SELECT scent, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                scent NVARCHAR(255) PATH '$.scent' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            ScentAffects.scent = VALUES(scent), ScentAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_scentaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE ScentAffects
+        FROM ScentAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                scent NVARCHAR(255) PATH '$.scent' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON ScentAffects.scent = item.scent AND ScentAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_scentaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -246,6 +383,18 @@ CREATE OR REPLACE PROCEDURE get_colors()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_colors_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Color
+        WHERE after IS NULL OR Color.name > after
+        ORDER BY Color.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_color(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -267,6 +416,23 @@ CREATE OR REPLACE PROCEDURE put_color(IN name NVARCHAR(255), IN hue INT, IN satu
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_color_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Color (name, hue, saturation, brightness)
+        SELECT name, hue, saturation, brightness
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR,
+                hue INT PATH '$.hue' ERROR ON ERROR,
+                saturation INT PATH '$.saturation' ERROR ON ERROR,
+                brightness INT PATH '$.brightness' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Color.name = VALUES(name), Color.hue = VALUES(hue), Color.saturation = VALUES(saturation), Color.brightness = VALUES(brightness)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_color(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -296,6 +462,35 @@ CREATE OR REPLACE PROCEDURE delete_coloraffects(IN color NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_coloraffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO ColorAffects (color, mood)
+        SELECT color, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                color NVARCHAR(255) PATH '$.color' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            ColorAffects.color = VALUES(color), ColorAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_coloraffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE ColorAffects
+        FROM ColorAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                color NVARCHAR(255) PATH '$.color' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON ColorAffects.color = item.color AND ColorAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_coloraffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -344,6 +539,18 @@ CREATE OR REPLACE PROCEDURE get_shapes()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_shapes_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM Shape
+        WHERE after IS NULL OR Shape.name > after
+        ORDER BY Shape.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_shape(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -365,6 +572,21 @@ CREATE OR REPLACE PROCEDURE put_shape(IN name NVARCHAR(255), IN sides INT)
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_shape_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Shape (name, sides)
+        SELECT name, sides
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR,
+                sides INT PATH '$.sides' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Shape.name = VALUES(name), Shape.sides = VALUES(sides)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_shape(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -394,6 +616,35 @@ CREATE OR REPLACE PROCEDURE delete_shapeaffects(IN shape NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_shapeaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO ShapeAffects (shape, mood)
+        SELECT shape, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                shape NVARCHAR(255) PATH '$.shape' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            ShapeAffects.shape = VALUES(shape), ShapeAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_shapeaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE ShapeAffects
+        FROM ShapeAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                shape NVARCHAR(255) PATH '$.shape' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON ShapeAffects.shape = item.shape AND ShapeAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_shapeaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -442,6 +693,18 @@ CREATE OR REPLACE PROCEDURE get_mediagenres()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_mediagenres_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM MediaGenre
+        WHERE after IS NULL OR MediaGenre.name > after
+        ORDER BY MediaGenre.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_mediagenre(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -463,6 +726,20 @@ CREATE OR REPLACE PROCEDURE put_mediagenre(IN name NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_mediagenre_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MediaGenre (name)
+        SELECT name
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MediaGenre.name = VALUES(name)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_mediagenre(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -492,6 +769,35 @@ CREATE OR REPLACE PROCEDURE delete_mediaaffects(IN media NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_mediaaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MediaAffects (media, mood)
+        SELECT media, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                media NVARCHAR(255) PATH '$.media' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MediaAffects.media = VALUES(media), MediaAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_mediaaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE MediaAffects
+        FROM MediaAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                media NVARCHAR(255) PATH '$.media' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON MediaAffects.media = item.media AND MediaAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_mediaaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -540,6 +846,18 @@ CREATE OR REPLACE PROCEDURE get_musicgenres()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_musicgenres_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT name
+        FROM MusicGenre
+        WHERE after IS NULL OR MusicGenre.name > after
+        ORDER BY MusicGenre.name
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_musicgenre(IN name NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -561,6 +879,20 @@ CREATE OR REPLACE PROCEDURE put_musicgenre(IN name NVARCHAR(255))
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_musicgenre_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MusicGenre (name)
+        SELECT name
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                name NVARCHAR(255) PATH '$.name' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MusicGenre.name = VALUES(name)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_musicgenre(IN name NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -590,6 +922,35 @@ CREATE OR REPLACE PROCEDURE delete_musicaffects(IN music NVARCHAR(255), IN mood
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_musicaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO MusicAffects (music, mood)
+        SELECT music, mood
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                music NVARCHAR(255) PATH '$.music' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            MusicAffects.music = VALUES(music), MusicAffects.mood = VALUES(mood)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_musicaffects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE MusicAffects
+        FROM MusicAffects
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS (
+                music NVARCHAR(255) PATH '$.music' ERROR ON ERROR,
+                mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR
+            )) AS item
+            ON MusicAffects.music = item.music AND MusicAffects.mood = item.mood
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_musicaffects_mood(IN mood NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -638,6 +999,18 @@ CREATE OR REPLACE PROCEDURE get_admins()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_admins_page(IN after INT, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT id
+        FROM Admin
+        WHERE after IS NULL OR Admin.id > after
+        ORDER BY Admin.id
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_admin(IN id INT)
     READS SQL DATA
     BEGIN
@@ -659,6 +1032,21 @@ CREATE OR REPLACE PROCEDURE put_admin(IN id INT, IN permissions INT)
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_admin_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Admin (id, permissions)
+        SELECT id, permissions
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                id INT PATH '$.id' ERROR ON ERROR,
+                permissions INT PATH '$.permissions' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Admin.id = VALUES(id), Admin.permissions = VALUES(permissions)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_admin(IN id INT)
     MODIFIES SQL DATA
     BEGIN
@@ -677,6 +1065,18 @@ CREATE OR REPLACE PROCEDURE get_clients()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_clients_page(IN after INT, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT id
+        FROM Client
+        WHERE after IS NULL OR Client.id > after
+        ORDER BY Client.id
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_client(IN id INT)
     READS SQL DATA
     BEGIN
@@ -698,6 +1098,24 @@ CREATE OR REPLACE PROCEDURE put_client(IN id INT, IN birthday NVARCHAR(255), IN
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_client_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO Client (id, birthday, email, displayName, bio)
+        SELECT id, birthday, email, displayName, bio
+        FROM JSON_TABLE(items, '$[*]' COLUMNS (
+                id INT PATH '$.id' ERROR ON ERROR,
+                birthday NVARCHAR(255) PATH '$.birthday' ERROR ON ERROR,
+                email NVARCHAR(255) PATH '$.email' ERROR ON ERROR,
+                displayName NVARCHAR(255) PATH '$.displayName' ERROR ON ERROR,
+                bio NVARCHAR(255) PATH '$.bio' ERROR ON ERROR
+            )) AS item
+        ON DUPLICATE KEY UPDATE
+            Client.id = VALUES(id), Client.birthday = VALUES(birthday), Client.email = VALUES(email), Client.displayName = VALUES(displayName), Client.bio = VALUES(bio)
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_client(IN id INT)
     MODIFIES SQL DATA
     BEGIN
@@ -716,6 +1134,18 @@ CREATE OR REPLACE PROCEDURE get_users()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_users_page(IN after INT, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT id
+        FROM User
+        WHERE after IS NULL OR User.id > after
+        ORDER BY User.id
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE post_user(IN username NVARCHAR(255))
     MODIFIES SQL DATA
     BEGIN
@@ -738,6 +1168,10 @@ CREATE OR REPLACE PROCEDURE get_user(IN id INT)
 CREATE OR REPLACE PROCEDURE delete_user(IN id INT)
     MODIFIES SQL DATA
     BEGIN
+        -- triggers are not run by cascades, so results are deleted first to be counted
+        DELETE FROM Result
+        WHERE Result.clientId = id
+        ;
         DELETE FROM User
         WHERE User.id = id
         ;
@@ -753,6 +1187,18 @@ CREATE OR REPLACE PROCEDURE get_usernames()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_usernames_page(IN after NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT username
+        FROM User
+        WHERE after IS NULL OR User.username > after
+        ORDER BY User.username
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_username(IN username NVARCHAR(255))
     READS SQL DATA
     BEGIN
@@ -773,6 +1219,18 @@ CREATE OR REPLACE PROCEDURE get_results(IN clientId INT)
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_results_page(IN clientId INT, IN after INT, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT number
+        FROM Result
+        WHERE Result.clientId = clientId AND (after IS NULL OR Result.number > after)
+        ORDER BY Result.number
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE post_result(
     IN clientId INT, IN mood NVARCHAR(255), IN taste NVARCHAR(255), IN scent NVARCHAR(255),
     IN color NVARCHAR(255), IN shape NVARCHAR(255), IN media NVARCHAR(255), IN music NVARCHAR(255)
@@ -805,6 +1263,18 @@ CREATE OR REPLACE PROCEDURE get_result_all(IN clientId INT)
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_result_all_page(IN clientId INT, IN after INT, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT clientId, number, mood, taste, scent, color, shape, media, music
+        FROM Result
+        WHERE Result.clientId = clientId AND (after IS NULL OR Result.number > after)
+        ORDER BY Result.number
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_result(IN clientId INT, IN number INT)
     MODIFIES SQL DATA
     BEGIN
@@ -814,4 +1284,527 @@ CREATE OR REPLACE PROCEDURE delete_result(IN clientId INT, IN number INT)
     END;
 //    
 
+CREATE OR REPLACE PROCEDURE get_profile(IN username NVARCHAR(255), IN size INT)
+    READS SQL DATA
+    BEGIN
+        DECLARE clientId INT;
+
+        SELECT User.id INTO clientId
+        FROM User
+        WHERE User.username = username
+        ;
+
+        SELECT id, username
+        FROM User
+        WHERE User.id = clientId
+        ;
+
+        SELECT id, birthday, email, displayName, bio
+        FROM Client
+        WHERE Client.id = clientId
+        ;
+
+        SELECT clientId, number, mood, taste, scent, color, shape, media, music
+        FROM Result
+        WHERE Result.clientId = clientId
+        ORDER BY Result.number
+        LIMIT size
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE get_color_all()
+    READS SQL DATA
+    BEGIN
+        SELECT name, hue, saturation, brightness
+        FROM Color
+        ORDER BY Color.name
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE get_cooccurrence()
+    READS SQL DATA
+    BEGIN
+        -- connections of each qualia, in the order taste, scent, color, shape, media, music
+        SELECT mood, taste
+        FROM TasteAffects
+        ;
+
+        SELECT mood, scent
+        FROM ScentAffects
+        ;
+
+        SELECT mood, color
+        FROM ColorAffects
+        ;
+
+        SELECT mood, shape
+        FROM ShapeAffects
+        ;
+
+        SELECT mood, media
+        FROM MediaAffects
+        ;
+
+        SELECT mood, music
+        FROM MusicAffects
+        ;
+
+        -- then how often each qualia was picked for each mood
+        SELECT mood, value, results
+        FROM QualiaStats
+        WHERE QualiaStats.qualia = 'taste' AND QualiaStats.results > 0
+        ;
+
+        SELECT mood, value, results
+        FROM QualiaStats
+        WHERE QualiaStats.qualia = 'scent' AND QualiaStats.results > 0
+        ;
+
+        SELECT mood, value, results
+        FROM QualiaStats
+        WHERE QualiaStats.qualia = 'color' AND QualiaStats.results > 0
+        ;
+
+        SELECT mood, value, results
+        FROM QualiaStats
+        WHERE QualiaStats.qualia = 'shape' AND QualiaStats.results > 0
+        ;
+
+        SELECT mood, value, results
+        FROM QualiaStats
+        WHERE QualiaStats.qualia = 'media' AND QualiaStats.results > 0
+        ;
+
+        SELECT mood, value, results
+        FROM QualiaStats
+        WHERE QualiaStats.qualia = 'music' AND QualiaStats.results > 0
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE ensure_client(
+    IN username NVARCHAR(255), OUT clientId INT, OUT created BOOLEAN
+)
+    MODIFIES SQL DATA
+    BEGIN
+        -- the upsert locks the username row, so concurrent first logins resolve to one id
+        INSERT INTO User (username)
+        VALUES (username)
+        ON DUPLICATE KEY UPDATE
+            User.id = LAST_INSERT_ID(User.id)
+        ;
+        SET clientId = LAST_INSERT_ID();
+        INSERT IGNORE INTO Client (id, birthday, email, displayName, bio)
+        VALUES (clientId, 'YYYY/MM/DD', 'email', 'display name', 'biography')
+        ;
+        SET created = ROW_COUNT() > 0;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE get_or_create_client(IN username NVARCHAR(255))
+    MODIFIES SQL DATA
+    BEGIN
+        DECLARE clientId INT;
+        DECLARE created BOOLEAN;
+        -- join the caller's unit of work if there is one
+        DECLARE owned BOOLEAN DEFAULT @@in_transaction = 0;
+        DECLARE EXIT HANDLER FOR SQLEXCEPTION
+        BEGIN
+            IF owned THEN
+                ROLLBACK;
+            END IF;
+            RESIGNAL;
+        END;
+
+        IF owned THEN
+            START TRANSACTION;
+        END IF;
+        CALL ensure_client(username, clientId, created);
+        IF owned THEN
+            COMMIT;
+        END IF;
+
+        SELECT User.id, User.username, Client.birthday, Client.email,
+            Client.displayName, Client.bio, created
+        FROM User
+        JOIN Client ON Client.id = User.id
+        WHERE User.id = clientId
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE submit_quiz(
+    IN username NVARCHAR(255), IN mood NVARCHAR(255), IN taste NVARCHAR(255), IN scent NVARCHAR(255),
+    IN color NVARCHAR(255), IN shape NVARCHAR(255), IN media NVARCHAR(255), IN music NVARCHAR(255)
+)
+    MODIFIES SQL DATA
+    BEGIN
+        DECLARE clientId INT;
+        DECLARE created BOOLEAN;
+        DECLARE number INT;
+        -- join the caller's unit of work if there is one
+        DECLARE owned BOOLEAN DEFAULT @@in_transaction = 0;
+        DECLARE EXIT HANDLER FOR SQLEXCEPTION
+        BEGIN
+            IF owned THEN
+                ROLLBACK;
+            END IF;
+            RESIGNAL;
+        END;
+
+        IF owned THEN
+            START TRANSACTION;
+        END IF;
+
+        -- resolve the user, creating them with an empty profile if new
+        CALL ensure_client(username, clientId, created);
+
+        -- suggest blank answers from connections, connect the rest to the mood
+        IF taste IS NULL OR taste = '' THEN
+            SET taste = NULL;
+            SELECT TasteAffects.taste INTO taste
+            FROM TasteAffects
+            WHERE TasteAffects.mood = mood
+            LIMIT 1;
+        ELSE
+            INSERT INTO TasteAffects (taste, mood)
+            VALUES (taste, mood)
+            ON DUPLICATE KEY UPDATE
+                TasteAffects.taste = taste, TasteAffects.mood = mood
+            ;
+        END IF;
+
+        IF scent IS NULL OR scent = '' THEN
+            SET scent = NULL;
+            SELECT ScentAffects.scent INTO scent
+            FROM ScentAffects
+            WHERE ScentAffects.mood = mood
+            LIMIT 1;
+        ELSE
+            INSERT INTO ScentAffects (scent, mood)
+            VALUES (scent, mood)
+            ON DUPLICATE KEY UPDATE
+                ScentAffects.scent = scent, ScentAffects.mood = mood
+            ;
+        END IF;
+
+        IF color IS NULL OR color = '' THEN
+            SET color = NULL;
+            SELECT ColorAffects.color INTO color
+            FROM ColorAffects
+            WHERE ColorAffects.mood = mood
+            LIMIT 1;
+        ELSE
+            INSERT INTO ColorAffects (color, mood)
+            VALUES (color, mood)
+            ON DUPLICATE KEY UPDATE
+                ColorAffects.color = color, ColorAffects.mood = mood
+            ;
+        END IF;
+
+        IF shape IS NULL OR shape = '' THEN
+            SET shape = NULL;
+            SELECT ShapeAffects.shape INTO shape
+            FROM ShapeAffects
+            WHERE ShapeAffects.mood = mood
+            LIMIT 1;
+        ELSE
+            INSERT INTO ShapeAffects (shape, mood)
+            VALUES (shape, mood)
+            ON DUPLICATE KEY UPDATE
+                ShapeAffects.shape = shape, ShapeAffects.mood = mood
+            ;
+        END IF;
+
+        IF media IS NULL OR media = '' THEN
+            SET media = NULL;
+            SELECT MediaAffects.media INTO media
+            FROM MediaAffects
+            WHERE MediaAffects.mood = mood
+            LIMIT 1;
+        ELSE
+            INSERT INTO MediaAffects (media, mood)
+            VALUES (media, mood)
+            ON DUPLICATE KEY UPDATE
+                MediaAffects.media = media, MediaAffects.mood = mood
+            ;
+        END IF;
+
+        IF music IS NULL OR music = '' THEN
+            SET music = NULL;
+            SELECT MusicAffects.music INTO music
+            FROM MusicAffects
+            WHERE MusicAffects.mood = mood
+            LIMIT 1;
+        ELSE
+            INSERT INTO MusicAffects (music, mood)
+            VALUES (music, mood)
+            ON DUPLICATE KEY UPDATE
+                MusicAffects.music = music, MusicAffects.mood = mood
+            ;
+        END IF;
+
+        INSERT INTO Result (clientId, mood, taste, scent, color, shape, media, music)
+        VALUES (clientId, mood, taste, scent, color, shape, media, music)
+        ;
+        SET number = LAST_INSERT_ID();
+
+        IF owned THEN
+            COMMIT;
+        END IF;
+
+        SELECT clientId, number, mood, taste, scent, color, shape, media, music;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE count_qualia(
+    IN qualia NVARCHAR(16), IN mood NVARCHAR(255), IN value NVARCHAR(255), IN delta INT
+)
+    MODIFIES SQL DATA
+    BEGIN
+        IF value IS NOT NULL AND value != '' THEN
+            INSERT INTO QualiaStats (qualia, mood, value, results)
+            VALUES (qualia, mood, value, delta)
+            ON DUPLICATE KEY UPDATE
+                QualiaStats.results = QualiaStats.results + delta
+            ;
+        END IF;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE count_result(
+    IN mood NVARCHAR(255), IN taste NVARCHAR(255), IN scent NVARCHAR(255), IN color NVARCHAR(255),
+    IN shape NVARCHAR(255), IN media NVARCHAR(255), IN music NVARCHAR(255), IN delta INT
+)
+    MODIFIES SQL DATA
+    BEGIN
+        IF mood IS NOT NULL THEN
+            INSERT INTO MoodStats (mood, results)
+            VALUES (mood, delta)
+            ON DUPLICATE KEY UPDATE
+                MoodStats.results = MoodStats.results + delta
+            ;
+        CALL count_qualia('taste', mood, taste, delta);
+        CALL count_qualia('scent', mood, scent, delta);
+        CALL count_qualia('color', mood, color, delta);
+        CALL count_qualia('shape', mood, shape, delta);
+        CALL count_qualia('media', mood, media, delta);
+        CALL count_qualia('music', mood, music, delta);
+        END IF;
+    END;
+//
+
+CREATE OR REPLACE TRIGGER result_inserted
+    AFTER INSERT ON Result
+    FOR EACH ROW
+    CALL count_result(NEW.mood, NEW.taste, NEW.scent, NEW.color, NEW.shape, NEW.media, NEW.music, 1);
+//
+
+CREATE OR REPLACE TRIGGER result_updated
+    AFTER UPDATE ON Result
+    FOR EACH ROW
+    BEGIN
+        CALL count_result(OLD.mood, OLD.taste, OLD.scent, OLD.color, OLD.shape, OLD.media, OLD.music, -1);
+        CALL count_result(NEW.mood, NEW.taste, NEW.scent, NEW.color, NEW.shape, NEW.media, NEW.music, 1);
+    END;
+//
+
+CREATE OR REPLACE TRIGGER result_deleted
+    AFTER DELETE ON Result
+    FOR EACH ROW
+    CALL count_result(OLD.mood, OLD.taste, OLD.scent, OLD.color, OLD.shape, OLD.media, OLD.music, -1);
+//
+
+-- deleting a client cascades to its results, which would not run their trigger
+CREATE OR REPLACE TRIGGER client_deleting
+    BEFORE DELETE ON Client
+    FOR EACH ROW
+    DELETE FROM Result
+    WHERE Result.clientId = OLD.id;
+//
+
+CREATE OR REPLACE PROCEDURE rebuild_stats()
+    MODIFIES SQL DATA
+    BEGIN
+        -- join the caller's unit of work if there is one
+        DECLARE owned BOOLEAN DEFAULT @@in_transaction = 0;
+        DECLARE EXIT HANDLER FOR SQLEXCEPTION
+        BEGIN
+            IF owned THEN
+                ROLLBACK;
+            END IF;
+            RESIGNAL;
+        END;
+
+        IF owned THEN
+            START TRANSACTION;
+        END IF;
+
+        DELETE FROM QualiaStats;
+        DELETE FROM MoodStats;
+
+        INSERT INTO MoodStats (mood, results)
+        SELECT mood, COUNT(*)
+        FROM Result
+        WHERE mood IS NOT NULL
+        GROUP BY mood
+        ;
+
+        INSERT INTO QualiaStats (qualia, mood, value, results)
+        SELECT 'taste', mood, taste, COUNT(*)
+        FROM Result
+        WHERE mood IS NOT NULL AND taste IS NOT NULL AND taste != ''
+        GROUP BY mood, taste
+        ;
+
+        INSERT INTO QualiaStats (qualia, mood, value, results)
+        SELECT 'scent', mood, scent, COUNT(*)
+        FROM Result
+        WHERE mood IS NOT NULL AND scent IS NOT NULL AND scent != ''
+        GROUP BY mood, scent
+        ;
+
+        INSERT INTO QualiaStats (qualia, mood, value, results)
+        SELECT 'color', mood, color, COUNT(*)
+        FROM Result
+        WHERE mood IS NOT NULL AND color IS NOT NULL AND color != ''
+        GROUP BY mood, color
+        ;
+
+        INSERT INTO QualiaStats (qualia, mood, value, results)
+        SELECT 'shape', mood, shape, COUNT(*)
+        FROM Result
+        WHERE mood IS NOT NULL AND shape IS NOT NULL AND shape != ''
+        GROUP BY mood, shape
+        ;
+
+        INSERT INTO QualiaStats (qualia, mood, value, results)
+        SELECT 'media', mood, media, COUNT(*)
+        FROM Result
+        WHERE mood IS NOT NULL AND media IS NOT NULL AND media != ''
+        GROUP BY mood, media
+        ;
+
+        INSERT INTO QualiaStats (qualia, mood, value, results)
+        SELECT 'music', mood, music, COUNT(*)
+        FROM Result
+        WHERE mood IS NOT NULL AND music IS NOT NULL AND music != ''
+        GROUP BY mood, music
+        ;
+
+        IF owned THEN
+            COMMIT;
+        END IF;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE get_mood_stats()
+    READS SQL DATA
+    BEGIN
+        SELECT mood, results
+        FROM MoodStats
+        WHERE MoodStats.results > 0
+        ORDER BY MoodStats.results DESC, MoodStats.mood
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE get_qualia_stats(IN qualia NVARCHAR(16), IN mood NVARCHAR(255))
+    READS SQL DATA
+    BEGIN
+        SELECT QualiaStats.mood, QualiaStats.value, QualiaStats.results
+        FROM QualiaStats
+        WHERE QualiaStats.qualia = qualia
+            AND (mood IS NULL OR QualiaStats.mood = mood)
+            AND QualiaStats.results > 0
+        ORDER BY QualiaStats.mood, QualiaStats.results DESC, QualiaStats.value
+        ;
+    END;
+//
+
+-- sharding: the home database allocates user ids and records clients being moved,
+-- each shard keeps the users, clients and results of its own clients
+
+CREATE OR REPLACE PROCEDURE ensure_user(IN username NVARCHAR(255))
+    MODIFIES SQL DATA
+    BEGIN
+        -- the upsert locks the username row, so concurrent first logins resolve to one id
+        INSERT INTO User (username)
+        VALUES (username)
+        ON DUPLICATE KEY UPDATE
+            User.id = LAST_INSERT_ID(User.id)
+        ;
+        SELECT LAST_INSERT_ID() AS id;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE put_user(IN id INT, IN username NVARCHAR(255))
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO User (id, username)
+        VALUES (id, username)
+        ON DUPLICATE KEY UPDATE
+            User.username = VALUES(username)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE put_result(
+    IN clientId INT, IN number INT, IN mood NVARCHAR(255), IN taste NVARCHAR(255),
+    IN scent NVARCHAR(255), IN color NVARCHAR(255), IN shape NVARCHAR(255),
+    IN media NVARCHAR(255), IN music NVARCHAR(255)
+)
+    MODIFIES SQL DATA
+    BEGIN
+        -- keeps the number, so fails if another client's result already has it
+        INSERT INTO Result (clientId, number, mood, taste, scent, color, shape, media, music)
+        VALUES (clientId, number, mood, taste, scent, color, shape, media, music)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_client(IN id INT)
+    MODIFIES SQL DATA
+    BEGIN
+        -- results are deleted by the client_deleting trigger, the user is kept
+        DELETE FROM Client
+        WHERE Client.id = id
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE get_client_shards()
+    READS SQL DATA
+    BEGIN
+        SELECT clientId, shard, moving
+        FROM ClientShard
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE put_client_shard(
+    IN clientId INT, IN shard NVARCHAR(255), IN moving BOOLEAN
+)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO ClientShard (clientId, shard, moving)
+        VALUES (clientId, shard, moving)
+        ON DUPLICATE KEY UPDATE
+            ClientShard.shard = VALUES(shard),
+            ClientShard.moving = VALUES(moving)
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_client_shard(IN clientId INT)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE FROM ClientShard
+        WHERE ClientShard.clientId = clientId
+        ;
+    END;
+//
+
 DELIMITER ;
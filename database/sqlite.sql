@@ -0,0 +1,339 @@
+-- SQLite equivalent of tables.sql, and of the triggers of custom_procedures.sql
+-- Loaded by the sqlite backend of the site whenever it connects
+-- Tables are STRICT, so values of the wrong type are rejected like MariaDB does,
+-- with the closest types STRICT allows (lengths are not enforced)
+
+CREATE TABLE IF NOT EXISTS Mood (
+    name TEXT NOT NULL,
+    PRIMARY KEY (name)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS Taste (
+    type TEXT NOT NULL,
+    PRIMARY KEY (type)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS Scent (
+    name TEXT NOT NULL,
+    family TEXT,
+    PRIMARY KEY (name)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS Shape (
+    name TEXT NOT NULL,
+    sides INTEGER,
+    PRIMARY KEY (name)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS Color (
+    name TEXT NOT NULL,
+    hue INTEGER NOT NULL,
+    saturation INTEGER NOT NULL,
+    brightness INTEGER NOT NULL,
+    PRIMARY KEY (name)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS MediaGenre (
+    name TEXT NOT NULL,
+    PRIMARY KEY (name)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS MusicGenre (
+    name TEXT NOT NULL,
+    PRIMARY KEY (name)
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS User (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS Admin (
+    id INTEGER NOT NULL,
+    permissions INTEGER NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY (id)
+        REFERENCES User(id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS Client (
+    id INTEGER NOT NULL,
+    birthday TEXT,
+    email TEXT,
+    displayName TEXT,
+    bio TEXT,
+    PRIMARY KEY (id),
+    FOREIGN KEY (id)
+        REFERENCES User(id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS Result (
+    clientId INTEGER NOT NULL,
+    number INTEGER PRIMARY KEY AUTOINCREMENT,
+    mood TEXT,
+    taste TEXT,
+    scent TEXT,
+    shape TEXT,
+    color TEXT,
+    media TEXT,
+    music TEXT,
+    FOREIGN KEY (clientId)
+        REFERENCES Client(id)
+        ON UPDATE CASCADE ON DELETE CASCADE,
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (taste)
+        REFERENCES Taste(type)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (scent)
+        REFERENCES Scent(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (shape)
+        REFERENCES Shape(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (color)
+        REFERENCES Color(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (media)
+        REFERENCES MediaGenre(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (music)
+        REFERENCES MusicGenre(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS TasteAffects (
+    taste TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    PRIMARY KEY (taste, mood),
+    FOREIGN KEY (taste)
+        REFERENCES Taste(type)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS ScentAffects (
+    scent TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    PRIMARY KEY (scent, mood),
+    FOREIGN KEY (scent)
+        REFERENCES Scent(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS ShapeAffects (
+    shape TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    PRIMARY KEY (shape, mood),
+    FOREIGN KEY (shape)
+        REFERENCES Shape(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS ColorAffects (
+    color TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    PRIMARY KEY (color, mood),
+    FOREIGN KEY (color)
+        REFERENCES Color(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS MediaAffects (
+    media TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    PRIMARY KEY (media, mood),
+    FOREIGN KEY (media)
+        REFERENCES MediaGenre(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS MusicAffects (
+    music TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    PRIMARY KEY (music, mood),
+    FOREIGN KEY (music)
+        REFERENCES MusicGenre(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT,
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE RESTRICT
+) STRICT;
+
+-- Result counts, kept up to date by triggers on Result
+CREATE TABLE IF NOT EXISTS MoodStats (
+    mood TEXT NOT NULL,
+    results INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (mood),
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) STRICT;
+
+CREATE TABLE IF NOT EXISTS QualiaStats (
+    qualia TEXT NOT NULL,
+    mood TEXT NOT NULL,
+    value TEXT NOT NULL,
+    results INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (qualia, mood, value),
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) STRICT;
+
+CREATE INDEX IF NOT EXISTS QualiaStatsRanking ON QualiaStats (qualia, mood, results);
+
+-- foreign key cascades run triggers in SQLite, so deleting a user is counted
+CREATE TRIGGER IF NOT EXISTS result_inserted
+AFTER INSERT ON Result
+BEGIN
+    INSERT INTO MoodStats (mood, results)
+    SELECT NEW.mood, 1
+    WHERE NEW.mood IS NOT NULL
+    ON CONFLICT (mood) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'taste', NEW.mood, NEW.taste, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.taste IS NOT NULL AND NEW.taste != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'scent', NEW.mood, NEW.scent, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.scent IS NOT NULL AND NEW.scent != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'color', NEW.mood, NEW.color, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.color IS NOT NULL AND NEW.color != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'shape', NEW.mood, NEW.shape, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.shape IS NOT NULL AND NEW.shape != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'media', NEW.mood, NEW.media, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.media IS NOT NULL AND NEW.media != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'music', NEW.mood, NEW.music, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.music IS NOT NULL AND NEW.music != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS result_updated
+AFTER UPDATE ON Result
+BEGIN
+    INSERT INTO MoodStats (mood, results)
+    SELECT OLD.mood, -1
+    WHERE OLD.mood IS NOT NULL
+    ON CONFLICT (mood) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'taste', OLD.mood, OLD.taste, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.taste IS NOT NULL AND OLD.taste != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'scent', OLD.mood, OLD.scent, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.scent IS NOT NULL AND OLD.scent != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'color', OLD.mood, OLD.color, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.color IS NOT NULL AND OLD.color != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'shape', OLD.mood, OLD.shape, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.shape IS NOT NULL AND OLD.shape != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'media', OLD.mood, OLD.media, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.media IS NOT NULL AND OLD.media != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'music', OLD.mood, OLD.music, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.music IS NOT NULL AND OLD.music != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO MoodStats (mood, results)
+    SELECT NEW.mood, 1
+    WHERE NEW.mood IS NOT NULL
+    ON CONFLICT (mood) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'taste', NEW.mood, NEW.taste, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.taste IS NOT NULL AND NEW.taste != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'scent', NEW.mood, NEW.scent, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.scent IS NOT NULL AND NEW.scent != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'color', NEW.mood, NEW.color, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.color IS NOT NULL AND NEW.color != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'shape', NEW.mood, NEW.shape, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.shape IS NOT NULL AND NEW.shape != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'media', NEW.mood, NEW.media, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.media IS NOT NULL AND NEW.media != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'music', NEW.mood, NEW.music, 1
+    WHERE NEW.mood IS NOT NULL AND NEW.music IS NOT NULL AND NEW.music != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS result_deleted
+AFTER DELETE ON Result
+BEGIN
+    INSERT INTO MoodStats (mood, results)
+    SELECT OLD.mood, -1
+    WHERE OLD.mood IS NOT NULL
+    ON CONFLICT (mood) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'taste', OLD.mood, OLD.taste, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.taste IS NOT NULL AND OLD.taste != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'scent', OLD.mood, OLD.scent, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.scent IS NOT NULL AND OLD.scent != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'color', OLD.mood, OLD.color, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.color IS NOT NULL AND OLD.color != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'shape', OLD.mood, OLD.shape, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.shape IS NOT NULL AND OLD.shape != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'media', OLD.mood, OLD.media, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.media IS NOT NULL AND OLD.media != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+    INSERT INTO QualiaStats (qualia, mood, value, results)
+    SELECT 'music', OLD.mood, OLD.music, -1
+    WHERE OLD.mood IS NOT NULL AND OLD.music IS NOT NULL AND OLD.music != ''
+    ON CONFLICT (qualia, mood, value) DO UPDATE SET results = results - 1;
+END;
+
+CREATE TABLE IF NOT EXISTS ClientShard (
+    clientId INTEGER NOT NULL,
+    shard TEXT NOT NULL,
+    moving INTEGER NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (clientId),
+    FOREIGN KEY (clientId)
+        REFERENCES User(id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+) STRICT;
@@ -175,3 +175,36 @@ CREATE TABLE MusicAffects (
         REFERENCES Mood(name)
         ON UPDATE CASCADE ON DELETE RESTRICT
 );
+
+-- Result counts, kept up to date by triggers on Result
+CREATE TABLE MoodStats (
+    mood NVARCHAR(255) NOT NULL,
+    results INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (mood),
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+CREATE TABLE QualiaStats (
+    qualia NVARCHAR(16) NOT NULL,
+    mood NVARCHAR(255) NOT NULL,
+    value NVARCHAR(255) NOT NULL,
+    results INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (qualia, mood, value),
+    INDEX (qualia, mood, results),
+    FOREIGN KEY (mood)
+        REFERENCES Mood(name)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
+
+-- Clients kept away from the shard the ring gives them, while they are moved
+CREATE TABLE ClientShard (
+    clientId INT NOT NULL,
+    shard NVARCHAR(255) NOT NULL,
+    moving BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (clientId),
+    FOREIGN KEY (clientId)
+        REFERENCES User(id)
+        ON UPDATE CASCADE ON DELETE CASCADE
+);
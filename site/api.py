@@ -1,141 +1,191 @@
 """API Endpoints."""
 
+import base64
 import dataclasses
+import functools
+import json
 import logging
+import math
 import typing as t
 
 import flask
-import mariadb
-import toml
+import flask.json.provider
+
+import cache
+import coalesce
+import columnar
+import metrics
+import recommend
+import service
+import sharding
+import storage
+import tracing
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
-@dataclasses.dataclass()
-class Result:
-    """Database result."""
+def api_url(name: str) -> str:
+    """Construct an absolute API URL from a relative URL.
 
-    headers: t.Tuple[str, ...]
-    rows: t.Sequence[t.Tuple[t.Any, ...]]
+    For example, if the site is running on http localhost:5000,
+    api_url(flask.request, 'moods/happy') == http://localhost:5000/api/moods/happy
+    """
+    return flask.request.host_url + "api/" + name
 
-    auto: t.Optional[int] = None
 
-    def vertical(self, column: int = 0) -> t.Sequence[t.Any]:
-        """Return a vertical column extracted from this Result rows."""
-        return [row[column] for row in self.rows]
+View = t.Callable[..., flask.Response]
+F = t.TypeVar("F", bound=t.Callable[..., t.Any])
 
-    @staticmethod
-    def weave(
-        headers: t.Tuple[str, ...], row: t.Tuple[t.Any, ...]
-    ) -> t.Mapping[str, t.Any]:
-        """Weave a headers tuple with a row to produce a mapping.
-
-        Although headers and row should be the same size,
-        if they are not the longer is truncated.
-        """
-        return dict(zip(headers, row))
-
-    def one(self, index: int = 0) -> t.Optional[t.Mapping[str, t.Any]]:
-        """Return a single result, woven."""
-        try:
-            return self.weave(self.headers, self.rows[index])
-        except IndexError:
-            return None
-
-    def all(self) -> t.Sequence[t.Mapping[str, t.Any]]:
-        """Return the results woven."""
-        return [self.weave(self.headers, row) for row in self.rows]
-
-
-class Database:
-    """Manage a connection to the database."""
-
-    def __init__(self, **params: t.Union[str, int]) -> None:
-        """Initialize a Database model."""
-        self.connection = mariadb.connect(**params)
-
-    def procedure(
-        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
-    ) -> Result:
-        """Call a stored procedure.
-
-        Returns a single result set, exhausting the others if they exist.
-        """
-        logger.info("Performing procedure %s with arguments %s", name, arguments)
-
-        # Create a new cursor, helps ensure not deadlocking
-        connection = self.connection
-        with connection.cursor() as cursor:
-
-            cursor.callproc(name, arguments)
-
-            try:
-                data: t.Sequence[t.Tuple[t.Any, ...]] = cursor.fetchall()
-            except mariadb.ProgrammingError as e:
-                logger.debug("Exception getting data from cursor: %s", e)
-                data = []
-
-            if cursor.description is not None:
-                try:
-                    headers: t.Tuple[str, ...] = tuple(
-                        column[0] for column in cursor.description
-                    )
-                except mariadb.ProgrammingError as e:
-                    logger.debug("Exception getting headers: %s", e)
-                    headers = tuple()
+
+def conditional(names: t.Callable[..., t.Iterable[str]]) -> t.Callable[[View], View]:
+    """Decorate a GET view to be tagged with the versions of the resources it reads.
+
+    names is called with the view arguments and gives the resources.
+    A request whose If-None-Match has the current tag
+    is answered with 304 Not Modified without running the view,
+    if the versions are authoritative (other processes may have written otherwise).
+    """
+
+    def decorator(view: View) -> View:
+        @functools.wraps(view)
+        def wrapper(**kwargs: t.Any) -> flask.Response:
+            versions = cache.current_versions()
+            tag = versions.tag(*names(**kwargs))
+            if versions.authoritative and tag in flask.request.if_none_match:
+                response = flask.Response(status=304)
             else:
-                headers = tuple()
+                response = flask.make_response(view(**kwargs))
+            response.set_etag(tag)
+            return response
 
-            auto: t.Optional[int] = cursor.lastrowid
+        return wrapper
 
-            # documentation sucks real bad about mariadb
-            # but it seems like this will return None if the results have been exhausted
-            # nextset throws exception if non querying statement, e.g. INSERT
-            try:
-                while cursor.nextset():
-                    pass
-            except mariadb.ProgrammingError as e:
-                logger.debug("Exception advancing result sets: %s", e)
+    return decorator
 
-            # try committing?
-            connection.commit()
 
-            return Result(headers=headers, rows=data, auto=auto)
+def atomic(view: F) -> F:
+    """Decorate a view that writes to run in one unit of work, committed once.
 
-    def close(self) -> None:
-        """Close the database connection."""
-        self.connection.close()
+    Views that only read need no decorator, their reads run in autocommit.
+    """
+
+    @functools.wraps(view)
+    def wrapper(**kwargs: t.Any) -> t.Any:
+        with storage.write():
+            return view(**kwargs)
 
-    def __enter__(self) -> "Database":
-        """Return a Context Manager of this connection."""
-        return self
+    return t.cast(F, wrapper)
 
-    def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
-        """Close this connection."""
-        self.close()
 
+class JSONProvider(flask.json.provider.DefaultJSONProvider):
+    """JSON provider that can also encode result views."""
+
+    @staticmethod
+    def default(o: t.Any) -> t.Any:
+        """Encode result views as plain structures."""
+        if isinstance(o, columnar.Row):
+            return dict(o)
+        if isinstance(o, columnar.Rows):
+            return list(o)
+        return flask.json.provider.DefaultJSONProvider.default(o)
 
-CONFIG = "config.toml"
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        """Serialize data as JSON, timed as a span of the request."""
+        with tracing.span("json"):
+            return super().dumps(obj, **kwargs)
 
 
-def get_db() -> Database:
-    """Provide a Database.
+def json_body(value: t.Any) -> str:
+    """Encode a value as JSON, directly from its columns if it is a result view."""
+    if isinstance(value, columnar.Rows):
+        with tracing.span("json"):
+            return value.to_json()
+    return flask.json.dumps(value)
 
-    May be reused.
+
+def json_item(value: t.Any) -> str:
+    """Encode a value as compact JSON, keeping the order of its keys like json_body."""
+    return json.dumps(value, default=JSONProvider.default, separators=(",", ":"))
+
+
+def json_response(value: t.Any) -> flask.Response:
+    """Respond with a value encoded as JSON."""
+    return flask.Response(json_body(value), mimetype="application/json")
+
+
+def page_request() -> t.Optional[t.Tuple[t.Any, int]]:
+    """Parse the keyset pagination arguments of a request, after and limit.
+
+    Returns None if the request gives neither, i.e. is not paginated.
     """
-    config = toml.load(CONFIG)
-    database = Database(**config["database"])
-    return database
+    args = flask.request.args
+    if "after" not in args and "limit" not in args:
+        return None
+
+    after = None
+    if args.get("after"):
+        try:
+            after = json.loads(base64.urlsafe_b64decode(args["after"].encode()))
+        except ValueError:
+            flask.abort(400)
+        # cursors are the last key of a page, never a structure
+        if not isinstance(after, (str, int)) or isinstance(after, bool):
+            flask.abort(400)
 
+    limit = args.get("limit", default=service.page_size(), type=int)
+    return after, limit
 
-def api_url(name: str) -> str:
-    """Construct an absolute API URL from a relative URL.
 
-    For example, if the site is running on http localhost:5000,
-    api_url(flask.request, 'moods/happy') == http://localhost:5000/api/moods/happy
+def page_response(page: service.Page) -> flask.Response:
+    """Respond with a page of items and an opaque cursor to the next page."""
+    cursor = (
+        None
+        if page.after is None
+        else base64.urlsafe_b64encode(json.dumps(page.after).encode()).decode()
+    )
+    return flask.Response(
+        '{"items":' + json_body(page.items) + ',"next":' + json.dumps(cursor) + "}",
+        mimetype="application/json",
+    )
+
+
+def stream_response(items: t.Iterable[t.Any], chunk: int = 64) -> flask.Response:
+    """Respond with items encoded incrementally, in constant memory.
+
+    Items are written as a JSON array,
+    or as newline delimited JSON if the request asks for format=ndjson
+    or accepts application/x-ndjson.
     """
-    return flask.request.host_url + "api/" + name
+    ndjson = (
+        flask.request.args.get("format") == "ndjson"
+        or flask.request.accept_mimetypes.best == "application/x-ndjson"
+    )
+
+    def encode() -> t.Iterator[str]:
+        separator = "\n" if ndjson else ","
+        buffer: t.List[str] = []
+        first = True
+        if not ndjson:
+            yield "["
+        for item in items:
+            if not first and not ndjson:
+                buffer.append(separator)
+            first = False
+            buffer.append(json_item(item))
+            if ndjson:
+                buffer.append(separator)
+            if len(buffer) >= chunk:
+                yield "".join(buffer)
+                buffer.clear()
+        yield "".join(buffer)
+        if not ndjson:
+            yield "]"
+
+    return flask.Response(
+        flask.stream_with_context(encode()),
+        mimetype="application/x-ndjson" if ndjson else "application/json",
+    )
 
 
 def build_api_mock(app: flask.Flask) -> flask.Flask:
@@ -165,27 +215,6 @@ class Resource:
         return self.attrs[0]
 
 
-@dataclasses.dataclass()
-class Permissions:
-    """Denote the permissions of an admin."""
-
-    create: bool
-    delete: bool
-
-
-def get_admin(admin: int) -> t.Optional[Permissions]:
-    """Retrieve the permissions of an admin."""
-    with get_db() as db:
-        result = db.procedure("get_admin", (admin,)).one()
-        if result is None:
-            return None
-        perm_int = result["permissions"]
-        return Permissions(
-            perm_int & 0b10,
-            perm_int & 0b01,
-        )
-
-
 def build_resource_api(
     resource: Resource, alt: t.Optional[str] = None
 ) -> flask.Blueprint:
@@ -203,23 +232,35 @@ def build_resource_api(
     bp = flask.Blueprint(f"{resource.name}s", __name__, url_prefix=path)
 
     @bp.get("/")
+    @conditional(lambda: [alt])
     def _get_keys() -> flask.Response:
         """Query list of resources."""
-        with get_db() as db:
-            # return flask.jsonify([mood for (mood,) in db.procedure("get_moods").rows])
-            return flask.jsonify(db.procedure(f"get_{alt}s").vertical())
+        paging = page_request()
+        if paging is not None:
+            return page_response(service.get_keys_page(alt, *paging))
+        return flask.jsonify(service.get_keys(alt))
+
+    @bp.put("/")
+    @atomic
+    def _put_many() -> flask.Response:
+        """Put many resources in one transaction."""
+        body = flask.request.json
+        if not isinstance(body, list):
+            flask.abort(400)
+        count, errors = service.put_many(alt, resource.attrs, body)
+        return flask.jsonify({"count": count, "errors": errors})
 
     @bp.get(specific_path)
+    @conditional(lambda key: [alt])
     def _get(key: str) -> flask.Response:
         """Query a resource."""
-        with get_db() as db:
-            result = db.procedure(f"get_{alt}", (key,))
-            packet = result.one()
-            if packet is None:
-                flask.abort(404)
-            return flask.jsonify(packet)
+        packet = service.get(alt, key)
+        if packet is None:
+            flask.abort(404)
+        return flask.jsonify(packet)
 
     @bp.put(specific_path)
+    @atomic
     def _put(key: str) -> flask.Response:
         """Put a resource."""
 
@@ -228,28 +269,27 @@ def build_resource_api(
         if resource.others:
             if body is None:
                 flask.abort(400)
-            parameters: t.Optional[t.Tuple[t.Any, ...]] = tuple(
+            parameters: t.Tuple[t.Any, ...] = tuple(
                 [key] + [body[attr] for attr in resource.others]
             )
         else:
             parameters = (key,)
-        with get_db() as db:
-            db.procedure(f"put_{alt}", parameters)
+        service.put(alt, parameters)
         return flask.jsonify({resource.key: key})
 
     @bp.delete(specific_path)
+    @atomic
     def _delete(key: str) -> flask.Response:
         """Delete a resource."""
         # Verify admin permissions
         admin = flask.request.headers.get("Admin", default=None, type=int)
         if admin is None:
             flask.abort(403)
-        perms = get_admin(admin)
+        perms = service.get_admin(admin)
         if perms is None or not perms.delete:
             flask.abort(403)
 
-        with get_db() as db:
-            db.procedure(f"delete_{alt}", (key,))
+        service.delete(alt, key)
         return flask.jsonify({resource.key: key})
 
     return bp
@@ -269,26 +309,18 @@ def build_connections_api(
     bp = flask.Blueprint(f"{resource.name}s_connections", __name__, url_prefix=path)
 
     @bp.get("")
+    @conditional(lambda: [f"{alt}affects"])
     def _connections() -> flask.Response:
         """Query connections."""
         local_value = flask.request.args.get(resource.name)
         other_value = flask.request.args.get(other.name)
 
-        with get_db() as db:
-            if local_value and other_value:
-                result = db.procedure(
-                    f"get_{alt}affects_{alt}_{other.name}", (local_value, other_value)
-                )
-            elif local_value:
-                result = db.procedure(f"get_{alt}affects_{alt}", (local_value,))
-            elif other_value:
-                result = db.procedure(f"get_{alt}affects_{other.name}", (other_value,))
-            else:
-                result = db.procedure(f"get_{alt}affects")
-
-        return flask.jsonify(result.all())
+        return json_response(
+            service.get_connections(alt, other.name, local_value, other_value)
+        )
 
     @bp.post("")
+    @atomic
     def _post_connection() -> flask.Response:
         """Put a connection."""
 
@@ -299,15 +331,21 @@ def build_connections_api(
 
         logger.info("Received data: %s", data)
 
+        if isinstance(data, list):
+            count, errors = service.put_connections(
+                alt, (resource.name, other.name), data
+            )
+            return flask.jsonify({"count": count, "errors": errors})
+
         local_value = data[resource.name]
         other_value = data[other.name]
 
-        with get_db() as db:
-            db.procedure(f"put_{alt}affects", (local_value, other_value))
+        service.put_connection(alt, local_value, other_value)
 
         return flask.jsonify({resource.name: local_value, other.name: other_value})
 
     @bp.delete("")
+    @atomic
     def _delete_connection() -> flask.Response:
         """Delete a connection."""
 
@@ -315,7 +353,7 @@ def build_connections_api(
         admin = flask.request.headers.get("Admin", default=None, type=int)
         if admin is None:
             flask.abort(403)
-        perms = get_admin(admin)
+        perms = service.get_admin(admin)
         if perms is None or not perms.delete:
             flask.abort(403)
 
@@ -324,30 +362,158 @@ def build_connections_api(
         if data is None:
             flask.abort(400)
 
+        if isinstance(data, list):
+            count, errors = service.delete_connections(
+                alt, (resource.name, other.name), data
+            )
+            return flask.jsonify({"count": count, "errors": errors})
+
         local_value = data[resource.name]
         other_value = data[other.name]
 
-        with get_db() as db:
-            db.procedure(f"delete_{alt}affects", (local_value, other_value))
+        service.delete_connection(alt, local_value, other_value)
 
         return flask.jsonify({resource.name: local_value, other.name: other_value})
 
     return bp
 
 
-def build_custom_api() -> flask.Blueprint:
-    """Build custom API endpoints."""
+def describe_cluster(cluster: storage.Cluster) -> t.Mapping[str, t.Any]:
+    """Describe the pools of the primary and each replica of a node."""
+    described = [
+        {
+            **dataclasses.asdict(pool.stats),
+            "size": pool.size,
+            "leased": pool.leased,
+            "idle": pool.idle,
+        }
+        for pool in cluster.pools
+    ]
+    return {
+        **described[0],
+        "replicas": described[1:],
+        "routing": dataclasses.asdict(cluster.stats),
+    }
+
+
+def register_status_routes(bp: flask.Blueprint) -> None:
+    """Register the pool and cache counter endpoints on a blueprint."""
+
+    @bp.get("/pool")
+    def _get_pool() -> flask.Response:
+        """Get connection pool counters, of home and of each other shard."""
+        clusters = dict(storage.get_clusters(flask.current_app))
+        home = clusters.pop(storage.HOME)
+        return flask.jsonify(
+            {
+                **describe_cluster(home),
+                "shards": {
+                    name: describe_cluster(cluster)
+                    for name, cluster in clusters.items()
+                },
+            }
+        )
 
-    path = "/api"
-    bp = flask.Blueprint("api", __name__, url_prefix=path)
+    @bp.get("/cache")
+    def _get_cache() -> flask.Response:
+        """Get read cache counters."""
+        return flask.jsonify(dataclasses.asdict(cache.current().stats))
+
+
+def register_qualia_routes(bp: flask.Blueprint) -> None:
+    """Register the catalog, color, suggestion and statistics endpoints on a blueprint."""
+
+    @bp.get("/catalog")
+    @conditional(service.CATALOG.values)
+    def _get_catalog() -> flask.Response:
+        """Get every qualia list, conditional on the catalog version."""
+        return flask.jsonify(service.get_catalog())
+
+    @bp.get("/colors/nearest")
+    @conditional(lambda: ["color"])
+    def _get_nearest_colors() -> flask.Response:
+        """Get the colors nearest a hue, saturation and brightness."""
+
+        args = flask.request.args
+        try:
+            hue, saturation, brightness = (float(args[name]) for name in "hsb")
+        except (KeyError, ValueError):
+            flask.abort(400)
+        # nan and inf parse, but have no distance
+        if not all(math.isfinite(value) for value in (hue, saturation, brightness)):
+            flask.abort(400)
+        k = args.get("k", default=5, type=int)
+
+        return flask.jsonify(service.get_nearest_colors(hue, saturation, brightness, k))
+
+    @bp.get("/moods/<mood>/suggestions")
+    def _get_suggestions(mood: str) -> flask.Response:
+        """Get ranked suggestions of each qualia for a mood."""
+
+        qualia = flask.request.args.getlist("qualia") or list(recommend.QUALIA)
+        if any(q not in recommend.QUALIA for q in qualia):
+            flask.abort(400)
+        limit = flask.request.args.get("limit", default=5, type=int)
+
+        return flask.jsonify(
+            {"mood": mood, "suggestions": service.get_suggestions(mood, qualia, limit)}
+        )
+
+    @bp.get("/stats/moods")
+    @conditional(lambda: ["stats"])
+    def _get_mood_stats() -> flask.Response:
+        """Get the number of results of each mood."""
+        return flask.jsonify(service.get_mood_stats())
+
+    @bp.get("/stats/<qualia>")
+    @conditional(lambda qualia: ["stats"])
+    def _get_qualia_stats(qualia: str) -> flask.Response:
+        """Get how often each value of a qualia was picked per mood."""
+
+        if qualia not in service.RESULT_QUALIA[1:]:
+            flask.abort(404)
+        mood = flask.request.args.get("mood")
+        return flask.jsonify(service.get_qualia_stats(qualia, mood))
+
+    @bp.get("/stats/<qualia>/top")
+    @conditional(lambda qualia: ["stats"])
+    def _get_qualia_top(qualia: str) -> flask.Response:
+        """Get the most often picked value of a qualia for each mood."""
+
+        if qualia not in service.RESULT_QUALIA[1:]:
+            flask.abort(404)
+        return flask.jsonify(service.get_qualia_top(qualia))
+
+    @bp.post("/stats/rebuild")
+    @atomic
+    def _rebuild_stats() -> flask.Response:
+        """Recount the result statistics, for admins that can create."""
+
+        admin = flask.request.headers.get("Admin", default=None, type=int)
+        if admin is None:
+            flask.abort(403)
+        perms = service.get_admin(admin)
+        if perms is None or not perms.create:
+            flask.abort(403)
+
+        service.rebuild_stats()
+        return flask.jsonify(service.get_mood_stats())
+
+
+def register_user_routes(bp: flask.Blueprint) -> None:
+    """Register the user, username and profile endpoints on a blueprint."""
 
     @bp.get("/users/")
+    @conditional(lambda: ["user"])
     def _get_users() -> flask.Response:
         """Get all users."""
-        with get_db() as db:
-            return flask.jsonify(db.procedure("get_users").vertical())
+        paging = page_request()
+        if paging is not None:
+            return page_response(service.get_users_page(*paging))
+        return flask.jsonify(service.get_users())
 
     @bp.post("/users/")
+    @atomic
     def _post_users() -> flask.Response:
         """Make a user."""
 
@@ -358,103 +524,190 @@ def build_custom_api() -> flask.Blueprint:
 
         username = body["username"]
 
-        with get_db() as db:
-            db.procedure("post_user", (username,))
+        service.post_user(username)
 
         return flask.jsonify({"username": username})
 
     @bp.get("/users/<user>")
+    @conditional(lambda user: ["user"])
     def _get_user(user: int) -> flask.Response:
         """Get a single user."""
 
-        with get_db() as db:
-            result = db.procedure("get_user", (user,))
-
-        packet = result.one()
+        packet = service.get_user(user)
         if packet is None:
             flask.abort(404)
         return flask.jsonify(packet)
 
     @bp.delete("/users/<user>")
+    @atomic
     def _delete_user(user: int) -> flask.Response:
         """Delete a user."""
 
-        with get_db() as db:
-            db.procedure("delete_user", (user,))
+        service.delete_user(user)
         return flask.jsonify({"id": user})
 
     @bp.get("/usernames/")
+    @conditional(lambda: ["user"])
     def _get_usernames() -> flask.Response:
         """Get all usernames."""
-
-        with get_db() as db:
-            return flask.jsonify(db.procedure("get_usernames").vertical())
+        paging = page_request()
+        if paging is not None:
+            return page_response(service.get_usernames_page(*paging))
+        return flask.jsonify(service.get_usernames())
 
     @bp.get("/usernames/<username>")
+    @conditional(lambda username: ["user"])
     def _get_username(username: str) -> flask.Response:
         """Get a user for a username."""
 
-        with get_db() as db:
-            packet = db.procedure("get_username", (username,)).one()
+        packet = service.get_username(username)
         if packet is None:
             flask.abort(404)
         return flask.jsonify(packet)
 
+    @bp.put("/usernames/<username>")
+    @atomic
+    def _get_or_create_client(username: str) -> t.Tuple[flask.Response, int]:
+        """Get the profile of a username, creating it if new."""
+
+        client = service.get_or_create_client(username)
+        return flask.jsonify(client), 201 if client["created"] else 200
+
+    @bp.get("/profiles/<username>")
+    def _get_profile(username: str) -> flask.Response:
+        """Get the user, profile and results of a username."""
+
+        profile = service.get_profile(username)
+        if profile is None:
+            flask.abort(404)
+        return flask.jsonify(profile)
+
+
+def register_result_routes(bp: flask.Blueprint) -> None:
+    """Register the result and quiz endpoints of clients on a blueprint."""
+
     @bp.get("/clients/<clientId>/results/")
+    @conditional(lambda clientId: [f"result:{clientId}"])
     def _get_results(clientId: int) -> flask.Response:
         """Get result ids for a client."""
-
-        with get_db() as db:
-            return flask.jsonify(db.procedure("get_results", (clientId,)).vertical())
+        paging = page_request()
+        if paging is not None:
+            return page_response(service.get_results_page(clientId, *paging))
+        return flask.jsonify(service.get_results(clientId))
 
     @bp.post("/clients/<clientId>/results/")
+    @atomic
     def _post_results(clientId: int) -> flask.Response:
         """Create a result for a client."""
 
         body = flask.request.json
         if body is None:
             flask.abort(400)
-        # (clientId, mood, taste, scent, color, shape, media, music)
 
         try:
-            parameters = (
-                clientId,
-                body["mood"],
-                body["taste"],
-                body["scent"],
-                body["color"],
-                body["shape"],
-                body["media"],
-                body["music"],
-            )
+            service.post_result(clientId, body)
         except KeyError:
             flask.abort(400)
-
-        with get_db() as db:
-            db.procedure("post_result", parameters)
         return flask.jsonify({"client": clientId})
 
+    @bp.post("/quiz/submit")
+    @atomic
+    def _submit_quiz() -> flask.Response:
+        """Record a quiz submission, creating the user if needed."""
+
+        body = flask.request.json
+        if body is None or not body.get("username") or not body.get("mood"):
+            flask.abort(400)
+
+        unknown = service.unknown_answers(body)
+        if unknown:
+            response = flask.jsonify({"error": "Unknown answers", "unknown": unknown})
+            response.status_code = 422
+            return response
+
+        return flask.jsonify(service.submit_quiz(body["username"], body))
+
     @bp.get("/clients/<clientId>/results/all")
+    @conditional(lambda clientId: [f"result:{clientId}"])
     def _get_all_results(clientId: int) -> flask.Response:
         """Get full response set for a client."""
+        paging = page_request()
+        if paging is not None:
+            return page_response(service.get_result_all_page(clientId, *paging))
+        return json_response(service.get_result_all(clientId))
 
-        with get_db() as db:
-            return flask.jsonify(db.procedure("get_result_all", (clientId,)).all())
+    @bp.get("/clients/<clientId>/results/export")
+    @conditional(lambda clientId: [f"result:{clientId}"])
+    def _export_results(clientId: int) -> flask.Response:
+        """Stream every result of a client."""
+        return stream_response(service.stream_result_all(clientId))
 
     @bp.get("/clients/<clientId>/results/<number>")
+    @conditional(lambda clientId, number: [f"result:{clientId}"])
     def _get_result(clientId: int, number: int) -> flask.Response:
         """Get a single response of a client."""
 
-        with get_db() as db:
-            return flask.jsonify(db.procedure("get_result", (clientId, number)).one())
+        return flask.jsonify(service.get_result(clientId, number))
 
     @bp.delete("/clients/<clientId>/results/<number>")
+    @atomic
     def _delete_result(clientId: int, number: int) -> flask.Response:
         """Delete a result of a client."""
-        with get_db() as db:
-            db.procedure("delete_result", (clientId, number))
+        service.delete_result(clientId, number)
         return flask.jsonify({"client": clientId, "number": number})
 
+
+def build_custom_api() -> flask.Blueprint:
+    """Build custom API endpoints."""
+
+    path = "/api"
+    bp = flask.Blueprint("api", __name__, url_prefix=path)
+
+    register_status_routes(bp)
+    register_qualia_routes(bp)
+    register_user_routes(bp)
+    register_result_routes(bp)
+
+    return bp
+
+
+def build_metrics_api() -> flask.Blueprint:
+    """Build the endpoint scraped by Prometheus."""
+
+    bp = flask.Blueprint("metrics", __name__)
+
+    @bp.get("/metrics")
+    def _get_metrics() -> flask.Response:
+        """Get procedure, endpoint, pool and cache metrics in the text format."""
+        clusters = storage.get_clusters(flask.current_app)
+        connections = metrics.Gauge(
+            "vibe_pool_connections",
+            "Connections of the pool of each node.",
+            ("node", "state"),
+        )
+        size = metrics.Gauge(
+            "vibe_pool_size", "Maximum connections of the pool of each node.", ("node",)
+        )
+        for name, cluster in clusters.items():
+            for number, pool in enumerate(cluster.pools):
+                node = f"{name}-replica{number}" if number else name
+                connections.set((node, "leased"), pool.leased)
+                connections.set((node, "idle"), pool.idle)
+                size.set((node,), pool.size)
+        home = clusters[storage.HOME]
+        extra = [
+            *metrics.export("vibe_pool", home.primary.stats),
+            connections,
+            size,
+            *metrics.export("vibe_routing", home.stats),
+            *metrics.export("vibe_cache", cache.current().stats),
+            *metrics.export("vibe_coalesce", coalesce.current().stats),
+        ]
+        return flask.Response(
+            metrics.current().render(extra),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
     return bp
 
 
@@ -467,6 +720,12 @@ def build_api(app: flask.Flask, mock: bool = False) -> flask.Flask:
     if mock:
         return build_api_mock(app)
 
+    metrics.init_app(app)
+    tracing.init_app(app)
+    storage.init_app(app)
+    sharding.init_app(app)
+    app.json = JSONProvider(app)
+
     mood = Resource("mood", ["name"])
 
     simple_resources: t.List[t.Tuple[Resource, t.Optional[str]]] = [
@@ -505,5 +764,6 @@ def build_api(app: flask.Flask, mock: bool = False) -> flask.Flask:
         app.register_blueprint(build_connections_api(resource, mood, alt))
 
     app.register_blueprint(build_custom_api())
+    app.register_blueprint(build_metrics_api())
 
     return app
@@ -4,10 +4,9 @@ import logging
 import typing as t
 
 import flask
-import requests
-from requests.api import get, request
 
 import api
+import service
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
@@ -29,31 +28,13 @@ for _handler in list(werkzeug_logger.handlers):
 
 
 def getuserinfo(username):
-    p = "usernames/" + username
-    resp = requests.get(api.api_url(p))
-    # parse response
-    user = resp.json()
-    p = "clients/" + str(user["id"])
-    resp = requests.get(api.api_url(p))
-    userinfo = resp.json()
+    user = service.get_username(username)
+    if user is None:
+        return None
+    userinfo = service.get("client", user["id"])
     return userinfo
 
 
-def getuserresults(id):
-    p = "clients/" + str(id) + "/results/all"
-    resp = requests.get(api.api_url(p))
-    # parse response
-    results = resp.json()
-    return results
-
-
-def getqualia(q):
-    resp = requests.get(api.api_url(q))
-    # parse response
-    moods = resp.json()
-    return moods
-
-
 def currentinfo(s, userinfo):
     if flask.request.form[s] != "":
         return flask.request.form[s]
@@ -61,33 +42,6 @@ def currentinfo(s, userinfo):
         return userinfo[s]
 
 
-def getconnections(q, m):
-    resp = requests.get(api.api_url(q + "_connections"), params={"mood": m})
-    # parse response
-    moods = resp.json()
-    return moods
-
-
-def makeconnection(q, m, s):
-    requests.post(api.api_url(q + "s_connections"), json={q: s, "mood": m})
-    # parse response
-    return
-
-
-def newuser(username):
-    requests.post(api.api_url("users/"), json={"username": username})
-    newuser = requests.get(api.api_url("usernames/" + username)).json()
-    # make a new, empty profile
-    newuserdata = {
-        "birthday": "YYYY/MM/DD",
-        "email": "email",
-        "displayName": "display name",
-        "bio": "biography",
-    }
-    requests.put(api.api_url("clients/" + str(newuser["id"])), json=newuserdata)
-    return
-
-
 def create_app() -> flask.Flask:
     """Create the Flask instance."""
 
@@ -104,12 +58,12 @@ def create_app() -> flask.Flask:
 
     @app.route("/profile/<username>")
     def _profile(username) -> str:
-        try:
-            userinfo = getuserinfo(username)
-            results = getuserresults(userinfo["id"])
-        except:
+        profile = service.get_profile(username)
+        if profile is None or profile["client"] is None:
             flask.abort(404)
-        print(results)
+        userinfo = profile["client"]
+        results = profile["results"]
+        logger.debug("Profile of %s has %s results", username, len(results))
         return flask.render_template(
             "profile.html", username=username, userinfo=userinfo, results=results
         )
@@ -120,102 +74,59 @@ def create_app() -> flask.Flask:
         if flask.request.method == "POST":
             username = flask.request.form["username"]
 
-            # check if they are a new user. if they are, makes a new, empty profile
-            response = requests.get(api.api_url("usernames/" + username))
-            if not response.ok:
-                newuser(username)
+            # makes a new, empty profile if they are a new user
+            service.get_or_create_client(username)
 
             return flask.redirect(flask.url_for("_profile", username=username))
         return flask.render_template("login.html", error=error)
 
     @app.route("/quiz", methods=["GET", "POST"])
     def _quiz() -> str:
+        error = None
         if flask.request.method == "POST":
             ## --- based on user input and connections from database creates the client's result and put it in the database
-            # make a result to fill in
-            client_result = {
-                "mood": "",
-                "taste": "",
-                "scent": "",
-                "color": "",
-                "shape": "",
-                "media": "",
-                "music": "",
-            }
-
             # get their mood
             try:
                 selected_mood = flask.request.form["mood"]
             # if they didn't cooperate just send them back to the quiz like a loser
             except:
                 return flask.redirect(flask.url_for("_quiz"))
-            # if they did cooperate then update their result
-            client_result["mood"] = selected_mood
-
-            print("mood: " + client_result["mood"])
-
-            # fill in the rest of the result
-            for q in [
-                "color",
-                "scent",
-                "taste",
-                "shape",
-                "media",
-                "music",
-            ]:
-                # get value from the radio buttons
-                selected = flask.request.form[q]
-                # if they didn't pick anything then we give them a suggestions
-                if selected == "":
-                    qualia_connections = getconnections((q + "s"), selected_mood)
-                    selected = qualia_connections[0][q]
-                # if they did then we make a connection with that
-                else:
-                    makeconnection(q, selected_mood, selected)
-                    print(
-                        "made connection: ", q + ": " + selected, "  " + selected_mood
-                    )
-                # then add whatever it was to their result
-                client_result[q] = selected
-
-            # now we put the result in the database for the client using the API
+
             username = flask.request.form["username"]
             if not username:
                 return flask.redirect(flask.url_for("_quiz"))
 
-            # check if they are a new user. if they are, makes a new, empty profile
-            response = requests.get(api.api_url("usernames/" + username))
-            if not response.ok:
-                newuser(username)
-
-            # now there is a user id to get B)
-            userinfo = getuserinfo(username)
-
-            print(client_result)
-            requests.post(
-                api.api_url("clients/" + str(userinfo["id"]) + "/results/"),
-                json=client_result,
-            )
-            ## --- end
-
-            return flask.redirect(flask.url_for("_profile", username=username))
-
-        moods = getqualia("moods")
-        colors = getqualia("colors")
-        scents = getqualia("scents")
-        tastes = getqualia("tastes")
-        shapes = getqualia("shapes")
-        medias = getqualia("medias")
-        musics = getqualia("musics")
+            # get values from the radio buttons, blank ones are filled with suggestions
+            answers = {
+                q: flask.request.form.get(q, "")
+                for q in ["color", "scent", "taste", "shape", "media", "music"]
+            }
+            answers["mood"] = selected_mood
+
+            # answers no longer in the catalog (e.g. deleted since the quiz was shown)
+            # are sent back to the quiz rather than failing the submission
+            unknown = service.unknown_answers(answers)
+            if unknown:
+                error = f"Unknown answers for {', '.join(unknown)}, please pick again"
+            else:
+                # creates the user if new, and stores their connected picks at once
+                client_result = service.submit_quiz(username, answers)
+                logger.debug("Recorded quiz result %s", client_result)
+                ## --- end
+
+                return flask.redirect(flask.url_for("_profile", username=username))
+
+        catalog = service.get_catalog()
         return flask.render_template(
             "quiz.html",
-            moods=moods,
-            colors=colors,
-            scents=scents,
-            tastes=tastes,
-            shapes=shapes,
-            medias=medias,
-            musics=musics,
+            error=error,
+            moods=catalog["moods"],
+            colors=catalog["colors"],
+            scents=catalog["scents"],
+            tastes=catalog["tastes"],
+            shapes=catalog["shapes"],
+            medias=catalog["medias"],
+            musics=catalog["musics"],
         )
 
     @app.route("/<username>/edit", methods=["GET", "POST"])
@@ -234,7 +145,10 @@ def create_app() -> flask.Flask:
                 "bio": bio,
             }
             logger.info("Sending data %s", data)
-            requests.put(api.api_url("clients/" + str(userinfo["id"])), json=data)
+            service.put(
+                "client",
+                (userinfo["id"], birthday, email, displayname, bio),
+            )
             return flask.redirect(flask.url_for("_profile", username=username))
         return flask.render_template(
             "editprofile.html", username=username, userinfo=userinfo
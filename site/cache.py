@@ -0,0 +1,354 @@
+"""Read-through caching of database reads."""
+
+import collections
+import dataclasses
+import json
+import logging
+import threading
+import time
+import typing as t
+import uuid
+
+import flask
+
+import storage
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+Key = t.Tuple[t.Any, ...]
+T = t.TypeVar("T")
+
+
+@dataclasses.dataclass()
+class CacheStats:
+    """Counters describing the effectiveness of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    # Entries dropped to make room for new ones
+    evictions: int = 0
+    # Entries dropped because they outlived the ttl
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class Cache:
+    """A key value cache.
+
+    Subclasses provide _load, _store and _remove;
+    keys are tuples whose parts are compared by their string form.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a Cache."""
+        self.stats = CacheStats()
+
+    @staticmethod
+    def encode(key: Key) -> str:
+        """Produce a canonical string for a key."""
+        return json.dumps([str(part) for part in key])
+
+    def _load(self, key: str) -> t.Tuple[bool, t.Any]:
+        """Look up an encoded key, returning whether it was found and its value."""
+        raise NotImplementedError()
+
+    def _store(self, key: str, value: t.Any) -> None:
+        """Store a value under an encoded key."""
+        raise NotImplementedError()
+
+    def _remove(self, key: str) -> bool:
+        """Remove an encoded key, returning whether it was present."""
+        raise NotImplementedError()
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        raise NotImplementedError()
+
+    def fetch(self, key: Key, loader: t.Callable[[], T]) -> T:
+        """Return the cached value for a key, loading and caching it if missing."""
+        encoded = self.encode(key)
+        found, value = self._load(encoded)
+        if found:
+            self.stats.hits += 1
+            cached: T = value
+            return cached
+        self.stats.misses += 1
+        loaded = loader()
+        self._store(encoded, loaded)
+        return loaded
+
+    def invalidate(self, *keys: Key) -> None:
+        """Remove entries, if present."""
+        for key in keys:
+            if self._remove(self.encode(key)):
+                self.stats.invalidations += 1
+
+
+class LRUCache(Cache):
+    """An in-process cache that evicts the least recently used entries."""
+
+    def __init__(self, size: int = 1024, ttl: float = 60.0) -> None:
+        """Initialize a LRUCache holding at most size entries for ttl seconds."""
+        super().__init__()
+        self.size = size
+        self.ttl = ttl
+        self._entries: "collections.OrderedDict[str, t.Tuple[float, t.Any]]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> t.Tuple[bool, t.Any]:
+        """Look up an encoded key, expiring it if stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def _store(self, key: str, value: t.Any) -> None:
+        """Store a value, evicting the oldest entries if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def _remove(self, key: str) -> bool:
+        """Remove an encoded key."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class Store:
+    """Interface of a shared key value store, as provided by e.g. redis."""
+
+    def get(self, key: str) -> t.Optional[bytes]:
+        """Get the value of a key."""
+        raise NotImplementedError()
+
+    def set(self, key: str, value: bytes, ex: t.Optional[int] = None) -> t.Any:
+        """Set the value of a key, expiring after ex seconds."""
+        raise NotImplementedError()
+
+    def delete(self, *keys: str) -> int:
+        """Delete keys, returning how many existed."""
+        raise NotImplementedError()
+
+    def incr(self, key: str) -> int:
+        """Increment the integer value of a key, returning the new value."""
+        raise NotImplementedError()
+
+
+class LocalStore(Store):
+    """An in-process stand-in for a shared Store."""
+
+    def __init__(self) -> None:
+        """Initialize an empty LocalStore."""
+        self._values: t.Dict[str, t.Tuple[t.Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> t.Optional[bytes]:
+        """Get the value of a key."""
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._values[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: t.Optional[int] = None) -> t.Any:
+        """Set the value of a key, expiring after ex seconds."""
+        with self._lock:
+            expires = None if ex is None else time.monotonic() + ex
+            self._values[key] = (expires, value)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        """Delete keys, returning how many existed."""
+        with self._lock:
+            return sum(self._values.pop(key, None) is not None for key in keys)
+
+    def incr(self, key: str) -> int:
+        """Increment the integer value of a key, returning the new value."""
+        with self._lock:
+            expires, value = self._values.get(key, (None, b"0"))
+            value = str(int(value) + 1).encode()
+            self._values[key] = (expires, value)
+            return int(value)
+
+
+class SharedCache(Cache):
+    """A cache kept in a Store shared between processes.
+
+    Values must be JSON serializable.
+    Evictions and expirations are handled by the store, and are not counted.
+    """
+
+    def __init__(self, store: Store, ttl: float = 60.0, prefix: str = "vibe:") -> None:
+        """Initialize a SharedCache over a store."""
+        super().__init__()
+        self.store = store
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _load(self, key: str) -> t.Tuple[bool, t.Any]:
+        """Look up an encoded key."""
+        raw = self.store.get(self.prefix + key)
+        if raw is None:
+            return False, None
+        # values are wrapped so that a cached None is distinguishable
+        return True, json.loads(raw)[0]
+
+    def _store(self, key: str, value: t.Any) -> None:
+        """Store a value under an encoded key."""
+        raw = json.dumps([value], default=str).encode()
+        self.store.set(self.prefix + key, raw, ex=max(1, int(self.ttl)))
+
+    def _remove(self, key: str) -> bool:
+        """Remove an encoded key."""
+        return bool(self.store.delete(self.prefix + key))
+
+    def clear(self) -> None:
+        """Entries of a shared store are left to expire."""
+        logger.warning("SharedCache entries cannot be cleared, they will expire")
+
+
+def from_config(config: t.Mapping[str, t.Any]) -> Cache:
+    """Construct a Cache from a config with an optional [cache] section.
+
+    The backend may be "memory" (the default), "local", or "redis";
+    redis requires the redis package to be installed.
+    """
+    options = config.get("cache", {})
+    backend = options.get("backend", "memory")
+    ttl = options.get("ttl", 60.0)
+    if backend == "memory":
+        return LRUCache(size=options.get("size", 1024), ttl=ttl)
+    if backend == "local":
+        return SharedCache(LocalStore(), ttl=ttl)
+    if backend == "redis":
+        import redis  # pylint: disable=import-outside-toplevel
+
+        client: Store = redis.Redis.from_url(options["url"])
+        return SharedCache(client, ttl=ttl)
+    raise ValueError(f"Unknown cache backend {backend}")
+
+
+class Versions:
+    """Version counters of resources, used to build ETags.
+
+    Counters are kept in process unless given a shared Store.
+    In process counters are tagged with a random epoch,
+    so tags are never reused after a restart,
+    but only see the writes of their own process,
+    so are only authoritative if it is the only one.
+    """
+
+    def __init__(
+        self,
+        store: t.Optional[Store] = None,
+        prefix: str = "vibe:",
+        single_process: bool = False,
+    ) -> None:
+        """Initialize Versions, optionally kept in a store."""
+        self.store = store
+        # Whether the counters see every write, so a current tag proves freshness
+        self.authoritative = store is not None or single_process
+        self.prefix = prefix + "version:"
+        self.epoch = "s" if store is not None else uuid.uuid4().hex[:8]
+        self._counters: t.Dict[str, int] = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> int:
+        """Get the version of a resource."""
+        if self.store is not None:
+            return int(self.store.get(self.prefix + name) or 0)
+        with self._lock:
+            return self._counters[name]
+
+    def bump(self, *names: str) -> None:
+        """Advance the versions of resources that have been written."""
+        for name in names:
+            if self.store is not None:
+                self.store.incr(self.prefix + name)
+            else:
+                with self._lock:
+                    self._counters[name] += 1
+
+    def tag(self, *names: str) -> str:
+        """Produce a strong ETag value covering the current version of resources."""
+        return f"{self.epoch}-" + ".".join(str(self.get(name)) for name in names)
+
+
+_cache_lock = threading.Lock()
+
+
+def get_cache(app: flask.Flask) -> Cache:
+    """Provide the Cache owned by an app, creating it on first use."""
+    with _cache_lock:
+        if "cache" not in app.extensions:
+            app.extensions["cache"] = from_config(storage.load_config())
+        cache: Cache = app.extensions["cache"]
+        return cache
+
+
+def current() -> Cache:
+    """Provide the Cache of the current app."""
+    return get_cache(flask.current_app)
+
+
+def get_versions(app: flask.Flask) -> Versions:
+    """Provide the Versions owned by an app, sharing the cache's store if any."""
+    shared = get_cache(app)
+    with _cache_lock:
+        if "versions" not in app.extensions:
+            store = shared.store if isinstance(shared, SharedCache) else None
+            options = storage.load_config().get("cache", {})
+            app.extensions["versions"] = Versions(
+                store, single_process=options.get("single_process", False)
+            )
+        versions: Versions = app.extensions["versions"]
+        return versions
+
+
+def current_versions() -> Versions:
+    """Provide the Versions of the current app."""
+    return get_versions(flask.current_app)
+
+
+def get_permissions(app: flask.Flask) -> Cache:
+    """Provide the short lived, in process cache of admin permissions owned by an app.
+
+    Kept apart from the main cache so that revoked permissions
+    held by other processes expire quickly.
+    """
+    with _cache_lock:
+        if "permissions" not in app.extensions:
+            options = storage.load_config().get("cache", {})
+            app.extensions["permissions"] = LRUCache(
+                size=options.get("size", 1024),
+                ttl=options.get("permissions_ttl", 5.0),
+            )
+        permissions: Cache = app.extensions["permissions"]
+        return permissions
+
+
+def current_permissions() -> Cache:
+    """Provide the admin permissions cache of the current app."""
+    return get_permissions(flask.current_app)
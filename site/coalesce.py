@@ -0,0 +1,136 @@
+"""Single-flight coalescing of identical concurrent reads.
+
+When many requests make the same read at once, as on a cold cache under a spike,
+one of them queries the database and the others wait for and share its result.
+"""
+
+import dataclasses
+import json
+import logging
+import threading
+import typing as t
+
+import flask
+
+import storage
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+Key = t.Tuple[t.Any, ...]
+T = t.TypeVar("T")
+
+
+@dataclasses.dataclass()
+class CoalesceStats:
+    """Counters describing how many reads were shared."""
+
+    # Reads that were run
+    calls: int = 0
+    # Reads that waited for an identical one in flight instead of running
+    coalesced: int = 0
+
+
+class _Flight:
+    """A read in flight, and its outcome once it lands."""
+
+    def __init__(self) -> None:
+        """Initialize a _Flight."""
+        self.landed = threading.Event()
+        self.value: t.Any = None
+        self.error: t.Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs one of identical concurrent calls, giving its outcome to all of them.
+
+    Calls are identical when their keys are equal.
+    Nothing is kept once a call lands, so later calls run again.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        """Initialize a SingleFlight, which runs every call itself unless enabled."""
+        self.enabled = enabled
+        self.stats = CoalesceStats()
+        self._flights: t.Dict[Key, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Key, call: t.Callable[[], T]) -> T:
+        """Run a call, or wait for the identical one in flight and share its outcome.
+
+        Errors are shared too, raised in every waiting caller.
+        """
+        if not self.enabled:
+            return call()
+        with self._lock:
+            flight = self._flights.get(key)
+            leading = flight is None
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.stats.calls += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leading:
+            flight.landed.wait()
+            if flight.error is not None:
+                raise flight.error
+            landed: T = flight.value
+            return landed
+
+        try:
+            value = call()
+            flight.value = value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.landed.set()
+        return value
+
+
+def from_config(config: t.Mapping[str, t.Any]) -> SingleFlight:
+    """Construct a SingleFlight from the coalesce option of an optional [cache]."""
+    return SingleFlight(enabled=config.get("cache", {}).get("coalesce", True))
+
+
+_flight_lock = threading.Lock()
+
+
+def get_flights(app: flask.Flask) -> SingleFlight:
+    """Provide the SingleFlight owned by an app, creating it on first use."""
+    with _flight_lock:
+        if "coalesce" not in app.extensions:
+            app.extensions["coalesce"] = from_config(storage.load_config())
+        flights: SingleFlight = app.extensions["coalesce"]
+        return flights
+
+
+def current() -> SingleFlight:
+    """Provide the SingleFlight of the current app."""
+    return get_flights(flask.current_app)
+
+
+def shared(
+    node: t.Optional[str],
+    name: str,
+    arguments: t.Optional[t.Tuple[t.Any, ...]],
+    call: t.Callable[[], T],
+) -> T:
+    """Run a read of a procedure on a node through the SingleFlight of the current app.
+
+    Reads are identical if they call the same procedure with the same arguments
+    on the same node (None for every shard), and are routed alike:
+    reads that must see a write of their client only share a read of the primary.
+    Reads of a request that has written are run on their own,
+    as they must see its writes, which may not be committed yet,
+    and so are reads outside of an app.
+    """
+    if not flask.has_app_context() or flask.g.get("wrote"):
+        return call()
+    nodes = [node] if node is not None else storage.get_clusters(flask.current_app)
+    primary = any(storage.follows_write(each) for each in nodes)
+    key = (node, primary, name, json.dumps(arguments, default=str))
+    return current().do(key, call)
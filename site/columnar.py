@@ -0,0 +1,188 @@
+"""Compact, column oriented database results."""
+
+import array
+import json
+import json.encoder
+import typing as t
+
+_encode_string: t.Callable[[str], str] = json.encoder.encode_basestring_ascii
+
+Column = t.Union["array.array[int]", "array.array[float]", t.List[t.Any]]
+
+
+def _pack(values: t.List[t.Any]) -> Column:
+    """Store a column in an array if every value is an int or float.
+
+    Bools are ints, but are kept in a list so they are encoded as JSON booleans.
+    """
+    if values and all(
+        isinstance(value, int) and not isinstance(value, bool) for value in values
+    ):
+        try:
+            return array.array("q", values)
+        except OverflowError:
+            return values
+    if values and all(isinstance(value, float) for value in values):
+        return array.array("d", values)
+    return values
+
+
+def _encode(column: Column) -> t.Iterable[str]:
+    """Encode every value of a column as JSON."""
+    if isinstance(column, array.array):
+        if column.typecode == "q":
+            return map(str, column)
+        return map(json.dumps, column)
+    if all(isinstance(value, str) for value in column):
+        # the C string encoder used by json.dumps itself
+        return map(_encode_string, column)
+    return (json.dumps(value, default=str) for value in column)
+
+
+class Result:
+    """Database result.
+
+    Rows are stored by column, and are exposed through views
+    rather than being copied into a mapping each.
+    """
+
+    __slots__ = ("headers", "columns", "auto", "length", "_index")
+
+    def __init__(
+        self,
+        headers: t.Tuple[str, ...],
+        rows: t.Sequence[t.Tuple[t.Any, ...]],
+        auto: t.Optional[int] = None,
+    ) -> None:
+        """Initialize a Result from rows, transposing them into columns."""
+        self.headers = headers
+        self.auto = auto
+        self.length = len(rows)
+        # the longer of headers and row is truncated, like zip
+        width = min(len(headers), len(rows[0])) if rows else len(headers)
+        self.columns: t.List[Column] = [
+            _pack([row[column] for row in rows]) for column in range(width)
+        ]
+        self._index = {header: column for column, header in enumerate(headers)}
+
+    @property
+    def rows(self) -> t.Sequence[t.Tuple[t.Any, ...]]:
+        """Rows as tuples, rebuilt from the columns."""
+        return list(zip(*self.columns))
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return self.length
+
+    def vertical(self, column: int = 0) -> t.Sequence[t.Any]:
+        """Return a vertical column extracted from this Result rows."""
+        if column >= len(self.columns):
+            return []
+        return list(self.columns[column])
+
+    @staticmethod
+    def weave(
+        headers: t.Tuple[str, ...], row: t.Tuple[t.Any, ...]
+    ) -> t.Mapping[str, t.Any]:
+        """Weave a headers tuple with a row to produce a mapping.
+
+        Although headers and row should be the same size,
+        if they are not the longer is truncated.
+        """
+        return dict(zip(headers, row))
+
+    def one(self, index: int = 0) -> t.Optional["Row"]:
+        """Return a view of a single row."""
+        if not -self.length <= index < self.length:
+            return None
+        return Row(self, index % self.length)
+
+    def all(self) -> "Rows":
+        """Return a view of every row."""
+        return Rows(self, range(self.length))
+
+    @staticmethod
+    def _select(column: Column, indices: range) -> Column:
+        """Select the values of a column at some indices."""
+        if indices.step == 1:
+            return column[indices.start : indices.stop]
+        return [column[index] for index in indices]
+
+    def to_json(self, indices: t.Optional[range] = None) -> str:
+        """Serialize rows to a JSON array of objects, without building mappings."""
+        if indices is None:
+            indices = range(self.length)
+        if not indices:
+            return "[]"
+        prefixes = [json.dumps(header) + ":" for header in self.headers]
+        columns = [
+            map(prefix.__add__, _encode(self._select(column, indices)))
+            for prefix, column in zip(prefixes, self.columns)
+        ]
+        return "[{" + "},{".join(map(",".join, zip(*columns))) + "}]"
+
+
+class Row(t.Mapping[str, t.Any]):
+    """A read only view of a row of a Result."""
+
+    __slots__ = ("_result", "_row")
+
+    def __init__(self, result: Result, row: int) -> None:
+        """Initialize a view of a row of a result."""
+        self._result = result
+        self._row = row
+
+    def __getitem__(self, key: str) -> t.Any:
+        """Get the value of a column."""
+        # pylint: disable=protected-access
+        column = self._result._index.get(key)
+        if column is None or column >= len(self._result.columns):
+            raise KeyError(key)
+        return self._result.columns[column][self._row]
+
+    def __iter__(self) -> t.Iterator[str]:
+        """Iterate over the column names."""
+        return iter(self._result.headers[: len(self._result.columns)])
+
+    def __len__(self) -> int:
+        """Number of columns."""
+        return len(self._result.columns)
+
+    def __repr__(self) -> str:
+        """Represent the row as a mapping."""
+        return repr(dict(self))
+
+
+class Rows(t.Sequence[Row]):
+    """A read only view of some rows of a Result."""
+
+    __slots__ = ("_result", "_indices")
+
+    def __init__(self, result: Result, indices: range) -> None:
+        """Initialize a view of a range of rows of a result."""
+        self._result = result
+        self._indices = indices
+
+    @t.overload
+    def __getitem__(self, index: int) -> Row: ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> "Rows": ...
+
+    def __getitem__(self, index: t.Union[int, slice]) -> t.Union[Row, "Rows"]:
+        """Get a row, or a view of a slice of rows."""
+        if isinstance(index, slice):
+            return Rows(self._result, self._indices[index])
+        return Row(self._result, self._indices[index])
+
+    def __len__(self) -> int:
+        """Number of rows."""
+        return len(self._indices)
+
+    def to_json(self) -> str:
+        """Serialize the rows to a JSON array of objects."""
+        return self._result.to_json(self._indices)
+
+    def __repr__(self) -> str:
+        """Represent the rows as a list."""
+        return repr(list(self))
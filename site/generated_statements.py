@@ -0,0 +1,1004 @@
+"""Statements of the generated resource procedures, for running them directly.
+
+Generated by utilities/generate_resources.py from database/rawsql.txt.
+"""
+
+import typing as t
+
+Procedures = t.Dict[str, t.Tuple[t.Tuple[str, ...], t.Tuple[str, ...]]]
+
+# Procedure name to its parameter names and statements, for SQLite
+SQLITE: Procedures = {
+    "get_moods": (
+        (),
+        ("SELECT name FROM Mood",),
+    ),
+    "get_moods_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Mood WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_mood": (
+        ("name",),
+        ("SELECT name FROM Mood WHERE name = :name",),
+    ),
+    "put_mood": (
+        ("name",),
+        ("INSERT INTO Mood (name) VALUES (:name) ON CONFLICT (name) DO NOTHING",),
+    ),
+    "put_mood_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Mood (name) SELECT json_extract(item.value, '$.name') FROM json_each(:items) AS item WHERE true ON CONFLICT (name) DO NOTHING",
+        ),
+    ),
+    "delete_mood": (
+        ("name",),
+        ("DELETE FROM Mood WHERE name = :name",),
+    ),
+    "get_tastes": (
+        (),
+        ("SELECT type FROM Taste",),
+    ),
+    "get_tastes_page": (
+        ("after", "size"),
+        (
+            "SELECT type FROM Taste WHERE :after IS NULL OR type > :after ORDER BY type LIMIT :size",
+        ),
+    ),
+    "get_taste": (
+        ("type",),
+        ("SELECT type FROM Taste WHERE type = :type",),
+    ),
+    "put_taste": (
+        ("type",),
+        ("INSERT INTO Taste (type) VALUES (:type) ON CONFLICT (type) DO NOTHING",),
+    ),
+    "put_taste_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Taste (type) SELECT json_extract(item.value, '$.type') FROM json_each(:items) AS item WHERE true ON CONFLICT (type) DO NOTHING",
+        ),
+    ),
+    "delete_taste": (
+        ("type",),
+        ("DELETE FROM Taste WHERE type = :type",),
+    ),
+    "put_tasteaffects": (
+        ("taste", "mood"),
+        (
+            "INSERT INTO TasteAffects (taste, mood) VALUES (:taste, :mood) ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_tasteaffects": (
+        ("taste", "mood"),
+        ("DELETE FROM TasteAffects WHERE taste = :taste AND mood = :mood",),
+    ),
+    "put_tasteaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO TasteAffects (taste, mood) SELECT json_extract(item.value, '$.taste'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item WHERE true ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_tasteaffects_bulk": (
+        ("items",),
+        (
+            "DELETE FROM TasteAffects WHERE (taste, mood) IN (SELECT json_extract(item.value, '$.taste'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item)",
+        ),
+    ),
+    "get_tasteaffects_mood": (
+        ("mood",),
+        ("SELECT taste, mood FROM TasteAffects WHERE mood = :mood",),
+    ),
+    "get_tasteaffects_taste": (
+        ("taste",),
+        ("SELECT taste, mood FROM TasteAffects WHERE taste = :taste",),
+    ),
+    "get_tasteaffects_taste_mood": (
+        ("taste", "mood"),
+        ("SELECT taste, mood FROM TasteAffects WHERE taste = :taste AND mood = :mood",),
+    ),
+    "get_tasteaffects": (
+        (),
+        ("SELECT taste, mood FROM TasteAffects",),
+    ),
+    "get_scents": (
+        (),
+        ("SELECT name FROM Scent",),
+    ),
+    "get_scents_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Scent WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_scent": (
+        ("name",),
+        ("SELECT name, family FROM Scent WHERE name = :name",),
+    ),
+    "put_scent": (
+        ("name", "family"),
+        (
+            "INSERT INTO Scent (name, family) VALUES (:name, :family) ON CONFLICT (name) DO UPDATE SET family = excluded.family",
+        ),
+    ),
+    "put_scent_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Scent (name, family) SELECT json_extract(item.value, '$.name'), json_extract(item.value, '$.family') FROM json_each(:items) AS item WHERE true ON CONFLICT (name) DO UPDATE SET family = excluded.family",
+        ),
+    ),
+    "delete_scent": (
+        ("name",),
+        ("DELETE FROM Scent WHERE name = :name",),
+    ),
+    "put_scentaffects": (
+        ("scent", "mood"),
+        (
+            "INSERT INTO ScentAffects (scent, mood) VALUES (:scent, :mood) ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_scentaffects": (
+        ("scent", "mood"),
+        ("DELETE FROM ScentAffects WHERE scent = :scent AND mood = :mood",),
+    ),
+    "put_scentaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO ScentAffects (scent, mood) SELECT json_extract(item.value, '$.scent'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item WHERE true ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_scentaffects_bulk": (
+        ("items",),
+        (
+            "DELETE FROM ScentAffects WHERE (scent, mood) IN (SELECT json_extract(item.value, '$.scent'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item)",
+        ),
+    ),
+    "get_scentaffects_mood": (
+        ("mood",),
+        ("SELECT scent, mood FROM ScentAffects WHERE mood = :mood",),
+    ),
+    "get_scentaffects_scent": (
+        ("scent",),
+        ("SELECT scent, mood FROM ScentAffects WHERE scent = :scent",),
+    ),
+    "get_scentaffects_scent_mood": (
+        ("scent", "mood"),
+        ("SELECT scent, mood FROM ScentAffects WHERE scent = :scent AND mood = :mood",),
+    ),
+    "get_scentaffects": (
+        (),
+        ("SELECT scent, mood FROM ScentAffects",),
+    ),
+    "get_colors": (
+        (),
+        ("SELECT name FROM Color",),
+    ),
+    "get_colors_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Color WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_color": (
+        ("name",),
+        ("SELECT name, hue, saturation, brightness FROM Color WHERE name = :name",),
+    ),
+    "put_color": (
+        ("name", "hue", "saturation", "brightness"),
+        (
+            "INSERT INTO Color (name, hue, saturation, brightness) VALUES (:name, :hue, :saturation, :brightness) ON CONFLICT (name) DO UPDATE SET hue = excluded.hue, saturation = excluded.saturation, brightness = excluded.brightness",
+        ),
+    ),
+    "put_color_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Color (name, hue, saturation, brightness) SELECT json_extract(item.value, '$.name'), json_extract(item.value, '$.hue'), json_extract(item.value, '$.saturation'), json_extract(item.value, '$.brightness') FROM json_each(:items) AS item WHERE true ON CONFLICT (name) DO UPDATE SET hue = excluded.hue, saturation = excluded.saturation, brightness = excluded.brightness",
+        ),
+    ),
+    "delete_color": (
+        ("name",),
+        ("DELETE FROM Color WHERE name = :name",),
+    ),
+    "put_coloraffects": (
+        ("color", "mood"),
+        (
+            "INSERT INTO ColorAffects (color, mood) VALUES (:color, :mood) ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_coloraffects": (
+        ("color", "mood"),
+        ("DELETE FROM ColorAffects WHERE color = :color AND mood = :mood",),
+    ),
+    "put_coloraffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO ColorAffects (color, mood) SELECT json_extract(item.value, '$.color'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item WHERE true ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_coloraffects_bulk": (
+        ("items",),
+        (
+            "DELETE FROM ColorAffects WHERE (color, mood) IN (SELECT json_extract(item.value, '$.color'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item)",
+        ),
+    ),
+    "get_coloraffects_mood": (
+        ("mood",),
+        ("SELECT color, mood FROM ColorAffects WHERE mood = :mood",),
+    ),
+    "get_coloraffects_color": (
+        ("color",),
+        ("SELECT color, mood FROM ColorAffects WHERE color = :color",),
+    ),
+    "get_coloraffects_color_mood": (
+        ("color", "mood"),
+        ("SELECT color, mood FROM ColorAffects WHERE color = :color AND mood = :mood",),
+    ),
+    "get_coloraffects": (
+        (),
+        ("SELECT color, mood FROM ColorAffects",),
+    ),
+    "get_shapes": (
+        (),
+        ("SELECT name FROM Shape",),
+    ),
+    "get_shapes_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Shape WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_shape": (
+        ("name",),
+        ("SELECT name, sides FROM Shape WHERE name = :name",),
+    ),
+    "put_shape": (
+        ("name", "sides"),
+        (
+            "INSERT INTO Shape (name, sides) VALUES (:name, :sides) ON CONFLICT (name) DO UPDATE SET sides = excluded.sides",
+        ),
+    ),
+    "put_shape_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Shape (name, sides) SELECT json_extract(item.value, '$.name'), json_extract(item.value, '$.sides') FROM json_each(:items) AS item WHERE true ON CONFLICT (name) DO UPDATE SET sides = excluded.sides",
+        ),
+    ),
+    "delete_shape": (
+        ("name",),
+        ("DELETE FROM Shape WHERE name = :name",),
+    ),
+    "put_shapeaffects": (
+        ("shape", "mood"),
+        (
+            "INSERT INTO ShapeAffects (shape, mood) VALUES (:shape, :mood) ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_shapeaffects": (
+        ("shape", "mood"),
+        ("DELETE FROM ShapeAffects WHERE shape = :shape AND mood = :mood",),
+    ),
+    "put_shapeaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO ShapeAffects (shape, mood) SELECT json_extract(item.value, '$.shape'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item WHERE true ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_shapeaffects_bulk": (
+        ("items",),
+        (
+            "DELETE FROM ShapeAffects WHERE (shape, mood) IN (SELECT json_extract(item.value, '$.shape'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item)",
+        ),
+    ),
+    "get_shapeaffects_mood": (
+        ("mood",),
+        ("SELECT shape, mood FROM ShapeAffects WHERE mood = :mood",),
+    ),
+    "get_shapeaffects_shape": (
+        ("shape",),
+        ("SELECT shape, mood FROM ShapeAffects WHERE shape = :shape",),
+    ),
+    "get_shapeaffects_shape_mood": (
+        ("shape", "mood"),
+        ("SELECT shape, mood FROM ShapeAffects WHERE shape = :shape AND mood = :mood",),
+    ),
+    "get_shapeaffects": (
+        (),
+        ("SELECT shape, mood FROM ShapeAffects",),
+    ),
+    "get_mediagenres": (
+        (),
+        ("SELECT name FROM MediaGenre",),
+    ),
+    "get_mediagenres_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM MediaGenre WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_mediagenre": (
+        ("name",),
+        ("SELECT name FROM MediaGenre WHERE name = :name",),
+    ),
+    "put_mediagenre": (
+        ("name",),
+        ("INSERT INTO MediaGenre (name) VALUES (:name) ON CONFLICT (name) DO NOTHING",),
+    ),
+    "put_mediagenre_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MediaGenre (name) SELECT json_extract(item.value, '$.name') FROM json_each(:items) AS item WHERE true ON CONFLICT (name) DO NOTHING",
+        ),
+    ),
+    "delete_mediagenre": (
+        ("name",),
+        ("DELETE FROM MediaGenre WHERE name = :name",),
+    ),
+    "put_mediaaffects": (
+        ("media", "mood"),
+        (
+            "INSERT INTO MediaAffects (media, mood) VALUES (:media, :mood) ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_mediaaffects": (
+        ("media", "mood"),
+        ("DELETE FROM MediaAffects WHERE media = :media AND mood = :mood",),
+    ),
+    "put_mediaaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MediaAffects (media, mood) SELECT json_extract(item.value, '$.media'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item WHERE true ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_mediaaffects_bulk": (
+        ("items",),
+        (
+            "DELETE FROM MediaAffects WHERE (media, mood) IN (SELECT json_extract(item.value, '$.media'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item)",
+        ),
+    ),
+    "get_mediaaffects_mood": (
+        ("mood",),
+        ("SELECT media, mood FROM MediaAffects WHERE mood = :mood",),
+    ),
+    "get_mediaaffects_media": (
+        ("media",),
+        ("SELECT media, mood FROM MediaAffects WHERE media = :media",),
+    ),
+    "get_mediaaffects_media_mood": (
+        ("media", "mood"),
+        ("SELECT media, mood FROM MediaAffects WHERE media = :media AND mood = :mood",),
+    ),
+    "get_mediaaffects": (
+        (),
+        ("SELECT media, mood FROM MediaAffects",),
+    ),
+    "get_musicgenres": (
+        (),
+        ("SELECT name FROM MusicGenre",),
+    ),
+    "get_musicgenres_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM MusicGenre WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_musicgenre": (
+        ("name",),
+        ("SELECT name FROM MusicGenre WHERE name = :name",),
+    ),
+    "put_musicgenre": (
+        ("name",),
+        ("INSERT INTO MusicGenre (name) VALUES (:name) ON CONFLICT (name) DO NOTHING",),
+    ),
+    "put_musicgenre_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MusicGenre (name) SELECT json_extract(item.value, '$.name') FROM json_each(:items) AS item WHERE true ON CONFLICT (name) DO NOTHING",
+        ),
+    ),
+    "delete_musicgenre": (
+        ("name",),
+        ("DELETE FROM MusicGenre WHERE name = :name",),
+    ),
+    "put_musicaffects": (
+        ("music", "mood"),
+        (
+            "INSERT INTO MusicAffects (music, mood) VALUES (:music, :mood) ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_musicaffects": (
+        ("music", "mood"),
+        ("DELETE FROM MusicAffects WHERE music = :music AND mood = :mood",),
+    ),
+    "put_musicaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MusicAffects (music, mood) SELECT json_extract(item.value, '$.music'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item WHERE true ON CONFLICT DO NOTHING",
+        ),
+    ),
+    "delete_musicaffects_bulk": (
+        ("items",),
+        (
+            "DELETE FROM MusicAffects WHERE (music, mood) IN (SELECT json_extract(item.value, '$.music'), json_extract(item.value, '$.mood') FROM json_each(:items) AS item)",
+        ),
+    ),
+    "get_musicaffects_mood": (
+        ("mood",),
+        ("SELECT music, mood FROM MusicAffects WHERE mood = :mood",),
+    ),
+    "get_musicaffects_music": (
+        ("music",),
+        ("SELECT music, mood FROM MusicAffects WHERE music = :music",),
+    ),
+    "get_musicaffects_music_mood": (
+        ("music", "mood"),
+        ("SELECT music, mood FROM MusicAffects WHERE music = :music AND mood = :mood",),
+    ),
+    "get_musicaffects": (
+        (),
+        ("SELECT music, mood FROM MusicAffects",),
+    ),
+    "get_admins": (
+        (),
+        ("SELECT id FROM Admin",),
+    ),
+    "get_admins_page": (
+        ("after", "size"),
+        (
+            "SELECT id FROM Admin WHERE :after IS NULL OR id > :after ORDER BY id LIMIT :size",
+        ),
+    ),
+    "get_admin": (
+        ("id",),
+        ("SELECT id, permissions FROM Admin WHERE id = :id",),
+    ),
+    "put_admin": (
+        ("id", "permissions"),
+        (
+            "INSERT INTO Admin (id, permissions) VALUES (:id, :permissions) ON CONFLICT (id) DO UPDATE SET permissions = excluded.permissions",
+        ),
+    ),
+    "put_admin_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Admin (id, permissions) SELECT json_extract(item.value, '$.id'), json_extract(item.value, '$.permissions') FROM json_each(:items) AS item WHERE true ON CONFLICT (id) DO UPDATE SET permissions = excluded.permissions",
+        ),
+    ),
+    "delete_admin": (
+        ("id",),
+        ("DELETE FROM Admin WHERE id = :id",),
+    ),
+    "get_clients": (
+        (),
+        ("SELECT id FROM Client",),
+    ),
+    "get_clients_page": (
+        ("after", "size"),
+        (
+            "SELECT id FROM Client WHERE :after IS NULL OR id > :after ORDER BY id LIMIT :size",
+        ),
+    ),
+    "get_client": (
+        ("id",),
+        ("SELECT id, birthday, email, displayName, bio FROM Client WHERE id = :id",),
+    ),
+    "put_client": (
+        ("id", "birthday", "email", "displayName", "bio"),
+        (
+            "INSERT INTO Client (id, birthday, email, displayName, bio) VALUES (:id, :birthday, :email, :displayName, :bio) ON CONFLICT (id) DO UPDATE SET birthday = excluded.birthday, email = excluded.email, displayName = excluded.displayName, bio = excluded.bio",
+        ),
+    ),
+    "put_client_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Client (id, birthday, email, displayName, bio) SELECT json_extract(item.value, '$.id'), json_extract(item.value, '$.birthday'), json_extract(item.value, '$.email'), json_extract(item.value, '$.displayName'), json_extract(item.value, '$.bio') FROM json_each(:items) AS item WHERE true ON CONFLICT (id) DO UPDATE SET birthday = excluded.birthday, email = excluded.email, displayName = excluded.displayName, bio = excluded.bio",
+        ),
+    ),
+    "delete_client": (
+        ("id",),
+        ("DELETE FROM Client WHERE id = :id",),
+    ),
+}
+
+# Procedure name to its parameter names and statements, prepared by MariaDB
+MARIADB: Procedures = {
+    "get_moods": (
+        (),
+        ("SELECT name FROM Mood",),
+    ),
+    "get_moods_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Mood WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_mood": (
+        ("name",),
+        ("SELECT name FROM Mood WHERE name = :name",),
+    ),
+    "put_mood": (
+        ("name",),
+        (
+            "INSERT INTO Mood (name) VALUES (:name) ON DUPLICATE KEY UPDATE Mood.name = VALUES(name)",
+        ),
+    ),
+    "put_mood_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Mood (name) SELECT name FROM JSON_TABLE(:items, '$[*]' COLUMNS (name NVARCHAR(255) PATH '$.name' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE Mood.name = VALUES(name)",
+        ),
+    ),
+    "delete_mood": (
+        ("name",),
+        ("DELETE FROM Mood WHERE name = :name",),
+    ),
+    "get_tastes": (
+        (),
+        ("SELECT type FROM Taste",),
+    ),
+    "get_tastes_page": (
+        ("after", "size"),
+        (
+            "SELECT type FROM Taste WHERE :after IS NULL OR type > :after ORDER BY type LIMIT :size",
+        ),
+    ),
+    "get_taste": (
+        ("type",),
+        ("SELECT type FROM Taste WHERE type = :type",),
+    ),
+    "put_taste": (
+        ("type",),
+        (
+            "INSERT INTO Taste (type) VALUES (:type) ON DUPLICATE KEY UPDATE Taste.type = VALUES(type)",
+        ),
+    ),
+    "put_taste_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Taste (type) SELECT type FROM JSON_TABLE(:items, '$[*]' COLUMNS (type NVARCHAR(255) PATH '$.type' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE Taste.type = VALUES(type)",
+        ),
+    ),
+    "delete_taste": (
+        ("type",),
+        ("DELETE FROM Taste WHERE type = :type",),
+    ),
+    "put_tasteaffects": (
+        ("taste", "mood"),
+        (
+            "INSERT INTO TasteAffects (taste, mood) VALUES (:taste, :mood) ON DUPLICATE KEY UPDATE TasteAffects.taste = VALUES(taste), TasteAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_tasteaffects": (
+        ("taste", "mood"),
+        ("DELETE FROM TasteAffects WHERE taste = :taste AND mood = :mood",),
+    ),
+    "put_tasteaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO TasteAffects (taste, mood) SELECT taste, mood FROM JSON_TABLE(:items, '$[*]' COLUMNS (taste NVARCHAR(255) PATH '$.taste' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE TasteAffects.taste = VALUES(taste), TasteAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_tasteaffects_bulk": (
+        ("items",),
+        (
+            "DELETE TasteAffects FROM TasteAffects JOIN JSON_TABLE(:items, '$[*]' COLUMNS (taste NVARCHAR(255) PATH '$.taste' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON TasteAffects.taste = item.taste AND TasteAffects.mood = item.mood",
+        ),
+    ),
+    "get_tasteaffects_mood": (
+        ("mood",),
+        ("SELECT taste, mood FROM TasteAffects WHERE mood = :mood",),
+    ),
+    "get_tasteaffects_taste": (
+        ("taste",),
+        ("SELECT taste, mood FROM TasteAffects WHERE taste = :taste",),
+    ),
+    "get_tasteaffects_taste_mood": (
+        ("taste", "mood"),
+        ("SELECT taste, mood FROM TasteAffects WHERE taste = :taste AND mood = :mood",),
+    ),
+    "get_tasteaffects": (
+        (),
+        ("SELECT taste, mood FROM TasteAffects",),
+    ),
+    "get_scents": (
+        (),
+        ("SELECT name FROM Scent",),
+    ),
+    "get_scents_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Scent WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_scent": (
+        ("name",),
+        ("SELECT name, family FROM Scent WHERE name = :name",),
+    ),
+    "put_scent": (
+        ("name", "family"),
+        (
+            "INSERT INTO Scent (name, family) VALUES (:name, :family) ON DUPLICATE KEY UPDATE Scent.name = VALUES(name), Scent.family = VALUES(family)",
+        ),
+    ),
+    "put_scent_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Scent (name, family) SELECT name, family FROM JSON_TABLE(:items, '$[*]' COLUMNS (name NVARCHAR(255) PATH '$.name' ERROR ON ERROR, family NVARCHAR(255) PATH '$.family' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE Scent.name = VALUES(name), Scent.family = VALUES(family)",
+        ),
+    ),
+    "delete_scent": (
+        ("name",),
+        ("DELETE FROM Scent WHERE name = :name",),
+    ),
+    "put_scentaffects": (
+        ("scent", "mood"),
+        (
+            "INSERT INTO ScentAffects (scent, mood) VALUES (:scent, :mood) ON DUPLICATE KEY UPDATE ScentAffects.scent = VALUES(scent), ScentAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_scentaffects": (
+        ("scent", "mood"),
+        ("DELETE FROM ScentAffects WHERE scent = :scent AND mood = :mood",),
+    ),
+    "put_scentaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO ScentAffects (scent, mood) SELECT scent, mood FROM JSON_TABLE(:items, '$[*]' COLUMNS (scent NVARCHAR(255) PATH '$.scent' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE ScentAffects.scent = VALUES(scent), ScentAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_scentaffects_bulk": (
+        ("items",),
+        (
+            "DELETE ScentAffects FROM ScentAffects JOIN JSON_TABLE(:items, '$[*]' COLUMNS (scent NVARCHAR(255) PATH '$.scent' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON ScentAffects.scent = item.scent AND ScentAffects.mood = item.mood",
+        ),
+    ),
+    "get_scentaffects_mood": (
+        ("mood",),
+        ("SELECT scent, mood FROM ScentAffects WHERE mood = :mood",),
+    ),
+    "get_scentaffects_scent": (
+        ("scent",),
+        ("SELECT scent, mood FROM ScentAffects WHERE scent = :scent",),
+    ),
+    "get_scentaffects_scent_mood": (
+        ("scent", "mood"),
+        ("SELECT scent, mood FROM ScentAffects WHERE scent = :scent AND mood = :mood",),
+    ),
+    "get_scentaffects": (
+        (),
+        ("SELECT scent, mood FROM ScentAffects",),
+    ),
+    "get_colors": (
+        (),
+        ("SELECT name FROM Color",),
+    ),
+    "get_colors_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Color WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_color": (
+        ("name",),
+        ("SELECT name, hue, saturation, brightness FROM Color WHERE name = :name",),
+    ),
+    "put_color": (
+        ("name", "hue", "saturation", "brightness"),
+        (
+            "INSERT INTO Color (name, hue, saturation, brightness) VALUES (:name, :hue, :saturation, :brightness) ON DUPLICATE KEY UPDATE Color.name = VALUES(name), Color.hue = VALUES(hue), Color.saturation = VALUES(saturation), Color.brightness = VALUES(brightness)",
+        ),
+    ),
+    "put_color_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Color (name, hue, saturation, brightness) SELECT name, hue, saturation, brightness FROM JSON_TABLE(:items, '$[*]' COLUMNS (name NVARCHAR(255) PATH '$.name' ERROR ON ERROR, hue INT PATH '$.hue' ERROR ON ERROR, saturation INT PATH '$.saturation' ERROR ON ERROR, brightness INT PATH '$.brightness' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE Color.name = VALUES(name), Color.hue = VALUES(hue), Color.saturation = VALUES(saturation), Color.brightness = VALUES(brightness)",
+        ),
+    ),
+    "delete_color": (
+        ("name",),
+        ("DELETE FROM Color WHERE name = :name",),
+    ),
+    "put_coloraffects": (
+        ("color", "mood"),
+        (
+            "INSERT INTO ColorAffects (color, mood) VALUES (:color, :mood) ON DUPLICATE KEY UPDATE ColorAffects.color = VALUES(color), ColorAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_coloraffects": (
+        ("color", "mood"),
+        ("DELETE FROM ColorAffects WHERE color = :color AND mood = :mood",),
+    ),
+    "put_coloraffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO ColorAffects (color, mood) SELECT color, mood FROM JSON_TABLE(:items, '$[*]' COLUMNS (color NVARCHAR(255) PATH '$.color' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE ColorAffects.color = VALUES(color), ColorAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_coloraffects_bulk": (
+        ("items",),
+        (
+            "DELETE ColorAffects FROM ColorAffects JOIN JSON_TABLE(:items, '$[*]' COLUMNS (color NVARCHAR(255) PATH '$.color' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON ColorAffects.color = item.color AND ColorAffects.mood = item.mood",
+        ),
+    ),
+    "get_coloraffects_mood": (
+        ("mood",),
+        ("SELECT color, mood FROM ColorAffects WHERE mood = :mood",),
+    ),
+    "get_coloraffects_color": (
+        ("color",),
+        ("SELECT color, mood FROM ColorAffects WHERE color = :color",),
+    ),
+    "get_coloraffects_color_mood": (
+        ("color", "mood"),
+        ("SELECT color, mood FROM ColorAffects WHERE color = :color AND mood = :mood",),
+    ),
+    "get_coloraffects": (
+        (),
+        ("SELECT color, mood FROM ColorAffects",),
+    ),
+    "get_shapes": (
+        (),
+        ("SELECT name FROM Shape",),
+    ),
+    "get_shapes_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM Shape WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_shape": (
+        ("name",),
+        ("SELECT name, sides FROM Shape WHERE name = :name",),
+    ),
+    "put_shape": (
+        ("name", "sides"),
+        (
+            "INSERT INTO Shape (name, sides) VALUES (:name, :sides) ON DUPLICATE KEY UPDATE Shape.name = VALUES(name), Shape.sides = VALUES(sides)",
+        ),
+    ),
+    "put_shape_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Shape (name, sides) SELECT name, sides FROM JSON_TABLE(:items, '$[*]' COLUMNS (name NVARCHAR(255) PATH '$.name' ERROR ON ERROR, sides INT PATH '$.sides' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE Shape.name = VALUES(name), Shape.sides = VALUES(sides)",
+        ),
+    ),
+    "delete_shape": (
+        ("name",),
+        ("DELETE FROM Shape WHERE name = :name",),
+    ),
+    "put_shapeaffects": (
+        ("shape", "mood"),
+        (
+            "INSERT INTO ShapeAffects (shape, mood) VALUES (:shape, :mood) ON DUPLICATE KEY UPDATE ShapeAffects.shape = VALUES(shape), ShapeAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_shapeaffects": (
+        ("shape", "mood"),
+        ("DELETE FROM ShapeAffects WHERE shape = :shape AND mood = :mood",),
+    ),
+    "put_shapeaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO ShapeAffects (shape, mood) SELECT shape, mood FROM JSON_TABLE(:items, '$[*]' COLUMNS (shape NVARCHAR(255) PATH '$.shape' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE ShapeAffects.shape = VALUES(shape), ShapeAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_shapeaffects_bulk": (
+        ("items",),
+        (
+            "DELETE ShapeAffects FROM ShapeAffects JOIN JSON_TABLE(:items, '$[*]' COLUMNS (shape NVARCHAR(255) PATH '$.shape' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON ShapeAffects.shape = item.shape AND ShapeAffects.mood = item.mood",
+        ),
+    ),
+    "get_shapeaffects_mood": (
+        ("mood",),
+        ("SELECT shape, mood FROM ShapeAffects WHERE mood = :mood",),
+    ),
+    "get_shapeaffects_shape": (
+        ("shape",),
+        ("SELECT shape, mood FROM ShapeAffects WHERE shape = :shape",),
+    ),
+    "get_shapeaffects_shape_mood": (
+        ("shape", "mood"),
+        ("SELECT shape, mood FROM ShapeAffects WHERE shape = :shape AND mood = :mood",),
+    ),
+    "get_shapeaffects": (
+        (),
+        ("SELECT shape, mood FROM ShapeAffects",),
+    ),
+    "get_mediagenres": (
+        (),
+        ("SELECT name FROM MediaGenre",),
+    ),
+    "get_mediagenres_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM MediaGenre WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_mediagenre": (
+        ("name",),
+        ("SELECT name FROM MediaGenre WHERE name = :name",),
+    ),
+    "put_mediagenre": (
+        ("name",),
+        (
+            "INSERT INTO MediaGenre (name) VALUES (:name) ON DUPLICATE KEY UPDATE MediaGenre.name = VALUES(name)",
+        ),
+    ),
+    "put_mediagenre_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MediaGenre (name) SELECT name FROM JSON_TABLE(:items, '$[*]' COLUMNS (name NVARCHAR(255) PATH '$.name' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE MediaGenre.name = VALUES(name)",
+        ),
+    ),
+    "delete_mediagenre": (
+        ("name",),
+        ("DELETE FROM MediaGenre WHERE name = :name",),
+    ),
+    "put_mediaaffects": (
+        ("media", "mood"),
+        (
+            "INSERT INTO MediaAffects (media, mood) VALUES (:media, :mood) ON DUPLICATE KEY UPDATE MediaAffects.media = VALUES(media), MediaAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_mediaaffects": (
+        ("media", "mood"),
+        ("DELETE FROM MediaAffects WHERE media = :media AND mood = :mood",),
+    ),
+    "put_mediaaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MediaAffects (media, mood) SELECT media, mood FROM JSON_TABLE(:items, '$[*]' COLUMNS (media NVARCHAR(255) PATH '$.media' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE MediaAffects.media = VALUES(media), MediaAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_mediaaffects_bulk": (
+        ("items",),
+        (
+            "DELETE MediaAffects FROM MediaAffects JOIN JSON_TABLE(:items, '$[*]' COLUMNS (media NVARCHAR(255) PATH '$.media' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON MediaAffects.media = item.media AND MediaAffects.mood = item.mood",
+        ),
+    ),
+    "get_mediaaffects_mood": (
+        ("mood",),
+        ("SELECT media, mood FROM MediaAffects WHERE mood = :mood",),
+    ),
+    "get_mediaaffects_media": (
+        ("media",),
+        ("SELECT media, mood FROM MediaAffects WHERE media = :media",),
+    ),
+    "get_mediaaffects_media_mood": (
+        ("media", "mood"),
+        ("SELECT media, mood FROM MediaAffects WHERE media = :media AND mood = :mood",),
+    ),
+    "get_mediaaffects": (
+        (),
+        ("SELECT media, mood FROM MediaAffects",),
+    ),
+    "get_musicgenres": (
+        (),
+        ("SELECT name FROM MusicGenre",),
+    ),
+    "get_musicgenres_page": (
+        ("after", "size"),
+        (
+            "SELECT name FROM MusicGenre WHERE :after IS NULL OR name > :after ORDER BY name LIMIT :size",
+        ),
+    ),
+    "get_musicgenre": (
+        ("name",),
+        ("SELECT name FROM MusicGenre WHERE name = :name",),
+    ),
+    "put_musicgenre": (
+        ("name",),
+        (
+            "INSERT INTO MusicGenre (name) VALUES (:name) ON DUPLICATE KEY UPDATE MusicGenre.name = VALUES(name)",
+        ),
+    ),
+    "put_musicgenre_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MusicGenre (name) SELECT name FROM JSON_TABLE(:items, '$[*]' COLUMNS (name NVARCHAR(255) PATH '$.name' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE MusicGenre.name = VALUES(name)",
+        ),
+    ),
+    "delete_musicgenre": (
+        ("name",),
+        ("DELETE FROM MusicGenre WHERE name = :name",),
+    ),
+    "put_musicaffects": (
+        ("music", "mood"),
+        (
+            "INSERT INTO MusicAffects (music, mood) VALUES (:music, :mood) ON DUPLICATE KEY UPDATE MusicAffects.music = VALUES(music), MusicAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_musicaffects": (
+        ("music", "mood"),
+        ("DELETE FROM MusicAffects WHERE music = :music AND mood = :mood",),
+    ),
+    "put_musicaffects_bulk": (
+        ("items",),
+        (
+            "INSERT INTO MusicAffects (music, mood) SELECT music, mood FROM JSON_TABLE(:items, '$[*]' COLUMNS (music NVARCHAR(255) PATH '$.music' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE MusicAffects.music = VALUES(music), MusicAffects.mood = VALUES(mood)",
+        ),
+    ),
+    "delete_musicaffects_bulk": (
+        ("items",),
+        (
+            "DELETE MusicAffects FROM MusicAffects JOIN JSON_TABLE(:items, '$[*]' COLUMNS (music NVARCHAR(255) PATH '$.music' ERROR ON ERROR, mood NVARCHAR(255) PATH '$.mood' ERROR ON ERROR)) AS item ON MusicAffects.music = item.music AND MusicAffects.mood = item.mood",
+        ),
+    ),
+    "get_musicaffects_mood": (
+        ("mood",),
+        ("SELECT music, mood FROM MusicAffects WHERE mood = :mood",),
+    ),
+    "get_musicaffects_music": (
+        ("music",),
+        ("SELECT music, mood FROM MusicAffects WHERE music = :music",),
+    ),
+    "get_musicaffects_music_mood": (
+        ("music", "mood"),
+        ("SELECT music, mood FROM MusicAffects WHERE music = :music AND mood = :mood",),
+    ),
+    "get_musicaffects": (
+        (),
+        ("SELECT music, mood FROM MusicAffects",),
+    ),
+    "get_admins": (
+        (),
+        ("SELECT id FROM Admin",),
+    ),
+    "get_admins_page": (
+        ("after", "size"),
+        (
+            "SELECT id FROM Admin WHERE :after IS NULL OR id > :after ORDER BY id LIMIT :size",
+        ),
+    ),
+    "get_admin": (
+        ("id",),
+        ("SELECT id, permissions FROM Admin WHERE id = :id",),
+    ),
+    "put_admin": (
+        ("id", "permissions"),
+        (
+            "INSERT INTO Admin (id, permissions) VALUES (:id, :permissions) ON DUPLICATE KEY UPDATE Admin.id = VALUES(id), Admin.permissions = VALUES(permissions)",
+        ),
+    ),
+    "put_admin_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Admin (id, permissions) SELECT id, permissions FROM JSON_TABLE(:items, '$[*]' COLUMNS (id INT PATH '$.id' ERROR ON ERROR, permissions INT PATH '$.permissions' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE Admin.id = VALUES(id), Admin.permissions = VALUES(permissions)",
+        ),
+    ),
+    "delete_admin": (
+        ("id",),
+        ("DELETE FROM Admin WHERE id = :id",),
+    ),
+    "get_clients": (
+        (),
+        ("SELECT id FROM Client",),
+    ),
+    "get_clients_page": (
+        ("after", "size"),
+        (
+            "SELECT id FROM Client WHERE :after IS NULL OR id > :after ORDER BY id LIMIT :size",
+        ),
+    ),
+    "get_client": (
+        ("id",),
+        ("SELECT id, birthday, email, displayName, bio FROM Client WHERE id = :id",),
+    ),
+    "put_client": (
+        ("id", "birthday", "email", "displayName", "bio"),
+        (
+            "INSERT INTO Client (id, birthday, email, displayName, bio) VALUES (:id, :birthday, :email, :displayName, :bio) ON DUPLICATE KEY UPDATE Client.id = VALUES(id), Client.birthday = VALUES(birthday), Client.email = VALUES(email), Client.displayName = VALUES(displayName), Client.bio = VALUES(bio)",
+        ),
+    ),
+    "put_client_bulk": (
+        ("items",),
+        (
+            "INSERT INTO Client (id, birthday, email, displayName, bio) SELECT id, birthday, email, displayName, bio FROM JSON_TABLE(:items, '$[*]' COLUMNS (id INT PATH '$.id' ERROR ON ERROR, birthday NVARCHAR(255) PATH '$.birthday' ERROR ON ERROR, email NVARCHAR(255) PATH '$.email' ERROR ON ERROR, displayName NVARCHAR(255) PATH '$.displayName' ERROR ON ERROR, bio NVARCHAR(255) PATH '$.bio' ERROR ON ERROR)) AS item ON DUPLICATE KEY UPDATE Client.id = VALUES(id), Client.birthday = VALUES(birthday), Client.email = VALUES(email), Client.displayName = VALUES(displayName), Client.bio = VALUES(bio)",
+        ),
+    ),
+    "delete_client": (
+        ("id",),
+        ("DELETE FROM Client WHERE id = :id",),
+    ),
+}
@@ -0,0 +1,341 @@
+"""Instrumentation of procedure calls and endpoints, exposed in Prometheus format."""
+
+import bisect
+import dataclasses
+import logging
+import threading
+import time
+import typing as t
+
+import flask
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Upper bounds of the latency histograms, in seconds
+BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = t.Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(
+    name: str, names: t.Sequence[str], values: t.Sequence[str], value: float
+) -> str:
+    """Format a single sample line."""
+    if not names:
+        return f"{name} {value!r}"
+    labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return f"{name}{{{labels}}} {value!r}"
+
+
+class Counter:
+    """A value per combination of labels, that only goes up."""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labels: t.Sequence[str] = ()
+    ) -> None:
+        """Initialize a Counter without any values."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values: t.Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        """Increase the value of some labels."""
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def lines(self) -> t.Iterator[str]:
+        """Yield the metric in the text format."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self.values.items()):
+            yield _sample(self.name, self.labels, labels, value)
+
+
+class Gauge(Counter):
+    """A value per combination of labels, that may go up or down."""
+
+    kind = "gauge"
+
+    def set(self, labels: Labels, value: float) -> None:
+        """Set the value of some labels."""
+        self.values[labels] = value
+
+
+@dataclasses.dataclass()
+class Observations:
+    """Observations of a histogram for one combination of labels."""
+
+    # Not cumulative, the last bucket holds observations above every bound
+    buckets: t.List[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class Histogram:
+    """Distributions of observed values per combination of labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: t.Sequence[str] = (),
+        buckets: t.Sequence[float] = BUCKETS,
+    ) -> None:
+        """Initialize a Histogram without any observations."""
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.bounds = tuple(buckets)
+        self.values: t.Dict[Labels, Observations] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        """Record an observation for some labels."""
+        observations = self.values.get(labels)
+        if observations is None:
+            observations = Observations([0] * (len(self.bounds) + 1))
+            self.values[labels] = observations
+        # the bounds are inclusive
+        observations.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        observations.total += value
+        observations.count += 1
+
+    def lines(self) -> t.Iterator[str]:
+        """Yield the metric in the text format."""
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        names = self.labels + ("le",)
+        for labels, observations in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, observations.buckets):
+                cumulative += count
+                values = labels + (repr(bound),)
+                yield _sample(f"{self.name}_bucket", names, values, cumulative)
+            values = labels + ("+Inf",)
+            yield _sample(f"{self.name}_bucket", names, values, observations.count)
+            yield _sample(f"{self.name}_sum", self.labels, labels, observations.total)
+            yield _sample(f"{self.name}_count", self.labels, labels, observations.count)
+
+
+Family = t.Union[Counter, Histogram]
+
+
+class Call:
+    """The time spent in each phase of a procedure call.
+
+    Phases are timed by lap, each one lasting from the end of the previous.
+    """
+
+    __slots__ = ("procedure", "phases", "rows", "error", "started", "_last")
+
+    def __init__(self, procedure: str) -> None:
+        """Start timing a call."""
+        self.procedure = procedure
+        self.phases: t.Dict[str, float] = {}
+        self.rows = 0
+        self.error = False
+        self.started = self._last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """End a phase, which began when the last one ended."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+
+@dataclasses.dataclass()
+class Tally:
+    """What a request has done so far."""
+
+    started: float
+    calls: int = 0
+    rows: int = 0
+
+
+class Metrics:
+    """Counters and latency histograms of procedure calls and endpoints."""
+
+    def __init__(self) -> None:
+        """Initialize empty Metrics."""
+        self._lock = threading.Lock()
+        self.calls = Counter(
+            "vibe_procedure_calls_total", "Procedure calls.", ("procedure",)
+        )
+        self.call_errors = Counter(
+            "vibe_procedure_errors_total",
+            "Procedure calls that failed.",
+            ("procedure",),
+        )
+        self.call_rows = Counter(
+            "vibe_procedure_rows_total",
+            "Rows returned by procedures, or given to procedures called per row.",
+            ("procedure",),
+        )
+        self.call_seconds = Histogram(
+            "vibe_procedure_seconds",
+            "Time spent in each phase of procedure calls"
+            " (connect, execute, fetch, commit).",
+            ("procedure", "phase"),
+        )
+        self.requests = Counter(
+            "vibe_http_requests_total",
+            "Requests answered.",
+            ("endpoint", "method", "status"),
+        )
+        self.request_errors = Counter(
+            "vibe_http_request_errors_total",
+            "Requests answered with a server error.",
+            ("endpoint", "method"),
+        )
+        self.request_seconds = Histogram(
+            "vibe_http_request_seconds",
+            "Time taken to answer requests.",
+            ("endpoint", "method"),
+        )
+        self.request_calls = Counter(
+            "vibe_http_request_procedure_calls_total",
+            "Procedure calls made while answering requests.",
+            ("endpoint",),
+        )
+        self.request_rows = Counter(
+            "vibe_http_request_rows_total",
+            "Procedure rows read while answering requests.",
+            ("endpoint",),
+        )
+
+    @property
+    def families(self) -> t.List[Family]:
+        """Every metric recorded."""
+        return [
+            self.calls,
+            self.call_errors,
+            self.call_rows,
+            self.call_seconds,
+            self.requests,
+            self.request_errors,
+            self.request_seconds,
+            self.request_calls,
+            self.request_rows,
+        ]
+
+    def record_call(self, call: Call) -> None:
+        """Record a finished procedure call."""
+        key = (call.procedure,)
+        with self._lock:
+            self.calls.inc(key)
+            if call.error:
+                self.call_errors.inc(key)
+            self.call_rows.inc(key, call.rows)
+            for phase, seconds in call.phases.items():
+                self.call_seconds.observe((call.procedure, phase), seconds)
+
+        tally: t.Optional[Tally] = (
+            flask.g.get("metrics") if flask.has_app_context() else None
+        )
+        if tally is not None:
+            tally.calls += 1
+            tally.rows += call.rows
+
+    def record_request(
+        self, endpoint: str, method: str, status: int, tally: Tally
+    ) -> None:
+        """Record an answered request."""
+        elapsed = time.perf_counter() - tally.started
+        with self._lock:
+            self.requests.inc((endpoint, method, str(status)))
+            if status >= 500:
+                self.request_errors.inc((endpoint, method))
+            self.request_seconds.observe((endpoint, method), elapsed)
+            self.request_calls.inc((endpoint,), tally.calls)
+            self.request_rows.inc((endpoint,), tally.rows)
+
+    def render(self, extra: t.Iterable[Family] = ()) -> str:
+        """Produce every metric, and some extra ones, in the text format."""
+        with self._lock:
+            lines = [line for family in self.families for line in family.lines()]
+        lines.extend(line for family in extra for line in family.lines())
+        return "\n".join(lines) + "\n"
+
+
+def export(prefix: str, stats: t.Any) -> t.List[Family]:
+    """Export the fields of a counters dataclass as metrics.
+
+    Fields named max_* are exported as gauges, the others as counters.
+    """
+    families: t.List[Family] = []
+    for field in dataclasses.fields(stats):
+        value = getattr(stats, field.name)
+        family: Counter
+        if field.name.startswith("max_"):
+            family = Gauge(f"{prefix}_{field.name}", f"{prefix} {field.name}.")
+        else:
+            family = Counter(f"{prefix}_{field.name}_total", f"{prefix} {field.name}.")
+        family.inc((), value)
+        families.append(family)
+    return families
+
+
+_metrics_lock = threading.Lock()
+
+
+def get_metrics(app: flask.Flask) -> Metrics:
+    """Provide the Metrics owned by an app, creating them on first use."""
+    with _metrics_lock:
+        if "metrics" not in app.extensions:
+            app.extensions["metrics"] = Metrics()
+        metrics: Metrics = app.extensions["metrics"]
+        return metrics
+
+
+def current() -> Metrics:
+    """Provide the Metrics of the current app."""
+    return get_metrics(flask.current_app)
+
+
+def _start_request() -> None:
+    """Start tallying a request."""
+    flask.g.metrics = Tally(time.perf_counter())
+
+
+def _finish_request(response: flask.Response) -> flask.Response:
+    """Record a request once its response is ready."""
+    tally: t.Optional[Tally] = flask.g.pop("metrics", None)
+    if tally is not None:
+        # requests that matched no route share one label
+        endpoint = flask.request.endpoint or "unmatched"
+        current().record_request(
+            endpoint, flask.request.method, response.status_code, tally
+        )
+    return response
+
+
+def init_app(app: flask.Flask) -> flask.Flask:
+    """Register request instrumentation on the provided Flask app."""
+    get_metrics(app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    return app
@@ -0,0 +1,132 @@
+"""Nearest neighbour search over colors."""
+
+import dataclasses
+import logging
+import threading
+import time
+import typing as t
+
+import flask
+import numpy as np
+import numpy.typing as npt
+
+import cache
+import columnar
+import storage
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+Points = npt.NDArray[np.float64]
+
+# Ranges of the attributes of a Color
+HUE = 360.0
+SATURATION = 100.0
+BRIGHTNESS = 100.0
+
+
+def cone(hue: t.Any, saturation: t.Any, brightness: t.Any) -> Points:
+    """Place HSV colors in the HSV cone.
+
+    Saturation is scaled by brightness, so dark colors are close whatever their hue,
+    and hue is an angle, so hues either side of red are close.
+    """
+    angle = np.radians(np.asarray(hue, dtype=np.float64) * (360.0 / HUE))
+    value = np.asarray(brightness, dtype=np.float64) / BRIGHTNESS
+    radius = np.asarray(saturation, dtype=np.float64) / SATURATION * value
+    return np.stack([radius * np.cos(angle), radius * np.sin(angle), value], axis=-1)
+
+
+@dataclasses.dataclass()
+class Neighbour:
+    """A color near another, and its distance in the HSV cone."""
+
+    name: str
+    hue: int
+    saturation: int
+    brightness: int
+    distance: float
+
+
+class ColorIndex:
+    """Every color placed in the HSV cone.
+
+    The index is rebuilt whenever the version of the color resource changes,
+    and, if given a ttl, once it is older than the ttl,
+    for versions that miss the writes of other processes.
+    """
+
+    def __init__(self, ttl: t.Optional[float] = None) -> None:
+        """Initialize an empty ColorIndex."""
+        self.ttl = ttl
+        self.version: t.Optional[int] = None
+        self.loaded: t.Optional[float] = None
+        # the colors and their points, replaced together so readers never mix builds
+        self.indexed: t.Tuple[columnar.Result, Points] = (
+            columnar.Result(("name", "hue", "saturation", "brightness"), []),
+            np.zeros((0, 3)),
+        )
+        self._lock = threading.Lock()
+
+    def stale(self, version: int) -> bool:
+        """Whether the index must be rebuilt before use at a version of the colors."""
+        if self.version != version or self.loaded is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self.loaded > self.ttl
+
+    def ensure(self, version: int, loader: t.Callable[[], columnar.Result]) -> None:
+        """Rebuild the index if stale.
+
+        The loader returns every color, with its name, hue, saturation and brightness.
+        """
+        if not self.stale(version):
+            return
+        with self._lock:
+            if not self.stale(version):
+                return
+            colors = loader()
+            _, hue, saturation, brightness = (colors.vertical(i) for i in range(4))
+            points = cone(hue, saturation, brightness).reshape(-1, 3)
+            self.indexed = (colors, points)
+            self.version = version
+            self.loaded = time.monotonic()
+            logger.info("Indexed %s colors", len(colors))
+
+    def nearest(
+        self, hue: float, saturation: float, brightness: float, k: int
+    ) -> t.List[Neighbour]:
+        """Find the k colors nearest a color, nearest first."""
+        colors, points = self.indexed
+        k = min(k, len(colors))
+        if k <= 0:
+            return []
+        distances = np.linalg.norm(points - cone(hue, saturation, brightness), axis=1)
+        # only the k nearest are sorted
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind="stable")]
+        return [
+            Neighbour(**dict(colors.all()[i]), distance=float(distances[i]))
+            for i in nearest
+        ]
+
+
+_index_lock = threading.Lock()
+
+
+def get_index(app: flask.Flask) -> ColorIndex:
+    """Provide the ColorIndex owned by an app, creating it on first use.
+
+    Unless the versions are authoritative, it is also rebuilt every cache ttl.
+    """
+    with _index_lock:
+        if "palette" not in app.extensions:
+            ttl = storage.load_config().get("cache", {}).get("ttl", 60.0)
+            authoritative = cache.get_versions(app).authoritative
+            app.extensions["palette"] = ColorIndex(None if authoritative else ttl)
+        index: ColorIndex = app.extensions["palette"]
+        return index
+
+
+def current() -> ColorIndex:
+    """Provide the ColorIndex of the current app."""
+    return get_index(flask.current_app)
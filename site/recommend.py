@@ -0,0 +1,190 @@
+"""Suggest qualia for moods from connections and past results."""
+
+import dataclasses
+import logging
+import threading
+import time
+import typing as t
+
+import flask
+import numpy as np
+import numpy.typing as npt
+
+import columnar
+import storage
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+QUALIA = ("taste", "scent", "color", "shape", "media", "music")
+
+Matrix = npt.NDArray[np.float64]
+
+
+@dataclasses.dataclass()
+class Suggestion:
+    """A suggested qualia value and its score."""
+
+    name: str
+    score: float
+
+
+class Cooccurrence:
+    """Mood by qualia matrices of connections and result counts.
+
+    Both matrices share their indices, and grow by doubling
+    as new moods and qualia values are seen.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty matrices."""
+        self.moods: t.Dict[str, int] = {}
+        self.values: t.Dict[str, int] = {}
+        self.names: t.List[str] = []
+        self.connected: Matrix = np.zeros((8, 8))
+        self.counts: Matrix = np.zeros((8, 8))
+
+    def _grow(self, rows: int, columns: int) -> None:
+        """Ensure the matrices have room for a number of rows and columns."""
+        height, width = self.connected.shape
+        if rows <= height and columns <= width:
+            return
+        shape = (max(rows, height * 2), max(columns, width * 2))
+        for attr in ("connected", "counts"):
+            grown = np.zeros(shape)
+            grown[:height, :width] = getattr(self, attr)
+            setattr(self, attr, grown)
+
+    def index(self, mood: str, value: str) -> t.Tuple[int, int]:
+        """Get the position of a mood and a value, adding them if new."""
+        row = self.moods.setdefault(mood, len(self.moods))
+        column = self.values.get(value)
+        if column is None:
+            column = self.values[value] = len(self.names)
+            self.names.append(value)
+        self._grow(len(self.moods), len(self.names))
+        return row, column
+
+    def scores(self, mood: str, weight: float, connected: bool) -> Matrix:
+        """Score every value for a mood.
+
+        Past results count once each, and a connection counts as weight results.
+        If connected, values that are not connected to the mood score zero.
+        """
+        row = self.moods.get(mood)
+        if row is None:
+            return np.zeros(0)
+        width = len(self.names)
+        links = self.connected[row, :width]
+        scores = self.counts[row, :width] + weight * links
+        if connected:
+            scores = scores * (links > 0)
+        return scores
+
+
+class Engine:
+    """In memory recommendation engine.
+
+    The matrices are rebuilt from the database once they are older than the ttl,
+    and are updated in place as connections and results are written in between.
+    """
+
+    def __init__(self, ttl: float = 300.0, weight: float = 1.0) -> None:
+        """Initialize an empty Engine."""
+        self.ttl = ttl
+        self.weight = weight
+        self.qualia: t.Dict[str, Cooccurrence] = {q: Cooccurrence() for q in QUALIA}
+        self.loaded: t.Optional[float] = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    @property
+    def stale(self) -> bool:
+        """Whether the matrices must be rebuilt before use."""
+        return self.loaded is None or time.monotonic() - self.loaded > self.ttl
+
+    def ensure(self, loader: t.Callable[[], t.Sequence[columnar.Result]]) -> None:
+        """Rebuild the matrices if stale.
+
+        The loader returns a result set of (mood, value) connections per qualia,
+        followed by a set of (mood, value, count) result counts per qualia.
+        """
+        if not self.stale:
+            return
+        with self._rebuild_lock:
+            if not self.stale:
+                return
+            started = time.monotonic()
+            sets = loader()
+            qualia = {q: Cooccurrence() for q in QUALIA}
+            for q, links, counts in zip(QUALIA, sets, sets[len(QUALIA) :]):
+                matrices = qualia[q]
+                for mood, value in links.rows:
+                    matrices.connected[matrices.index(mood, value)] = 1
+                for mood, value, count in counts.rows:
+                    matrices.counts[matrices.index(mood, value)] = count
+            with self._lock:
+                self.qualia = qualia
+                self.loaded = time.monotonic()
+            logger.info("Rebuilt recommendations in %.3fs", self.loaded - started)
+
+    def invalidate(self) -> None:
+        """Force a rebuild on next use, after writes that cannot be applied in place."""
+        with self._lock:
+            self.loaded = None
+
+    def connect(self, q: str, value: str, mood: str, connected: bool = True) -> None:
+        """Record that a connection was created or deleted."""
+        if q not in self.qualia:
+            return
+        with self._lock:
+            matrices = self.qualia[q]
+            matrices.connected[matrices.index(mood, value)] = 1 if connected else 0
+
+    def record(self, result: t.Mapping[str, t.Any]) -> None:
+        """Record a new result."""
+        mood = result.get("mood")
+        if not mood:
+            return
+        with self._lock:
+            for q, matrices in self.qualia.items():
+                if result.get(q):
+                    matrices.counts[matrices.index(mood, result[q])] += 1
+
+    def suggest(
+        self, mood: str, q: str, limit: int = 5, connected: bool = False
+    ) -> t.List[Suggestion]:
+        """Rank the values of a qualia for a mood, best first.
+
+        Only values with a positive score are suggested.
+        If connected, only values connected to the mood are suggested.
+        """
+        with self._lock:
+            matrices = self.qualia[q]
+            scores = matrices.scores(mood, self.weight, connected)
+            names = matrices.names
+        # stable, so that ties keep the order values were first seen in
+        order = np.argsort(-scores, kind="stable")[:limit]
+        order = order[scores[order] > 0]
+        return [Suggestion(names[i], float(scores[i])) for i in order]
+
+
+_engine_lock = threading.Lock()
+
+
+def get_engine(app: flask.Flask) -> Engine:
+    """Provide the Engine owned by an app, creating it on first use."""
+    with _engine_lock:
+        if "recommend" not in app.extensions:
+            options = storage.load_config().get("recommend", {})
+            app.extensions["recommend"] = Engine(
+                ttl=options.get("ttl", 300.0),
+                weight=options.get("connection_weight", 1.0),
+            )
+        engine: Engine = app.extensions["recommend"]
+        return engine
+
+
+def current() -> Engine:
+    """Provide the Engine of the current app."""
+    return get_engine(flask.current_app)
@@ -0,0 +1,780 @@
+"""Service layer over the database.
+
+Used directly by both the API blueprints and the page views,
+so rendering a page never loops back through HTTP.
+"""
+
+import contextlib
+import dataclasses
+import json
+import logging
+import typing as t
+
+import flask
+
+import cache
+import coalesce
+import columnar
+import palette
+import recommend
+import sharding
+import storage
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+Record = t.Mapping[str, t.Any]
+
+
+@dataclasses.dataclass()
+class Permissions:
+    """Denote the permissions of an admin."""
+
+    create: bool
+    delete: bool
+
+
+def _load_permissions(admin: int) -> t.Optional[int]:
+    """Query the permissions number of an admin from the database."""
+    with storage.filling(), storage.read() as db:
+        result = db.procedure("get_admin", (admin,)).one()
+    if result is None:
+        return None
+    perm_int: int = result["permissions"]
+    return perm_int
+
+
+def get_admin(admin: int) -> t.Optional[Permissions]:
+    """Retrieve the permissions of an admin.
+
+    Permissions are resolved at most once per request,
+    on the request's connection, and are briefly cached between requests.
+    """
+    resolved: t.Dict[int, t.Optional[int]] = flask.g.setdefault("permissions", {})
+    if admin not in resolved:
+        resolved[admin] = cache.current_permissions().fetch(
+            _versioned("admin", "admin", admin), lambda: _load_permissions(admin)
+        )
+    perm_int = resolved[admin]
+    if perm_int is None:
+        return None
+    return Permissions(
+        bool(perm_int & 0b10),
+        bool(perm_int & 0b01),
+    )
+
+
+@dataclasses.dataclass()
+class Page:
+    """A page of a keyset paginated list."""
+
+    items: t.Sequence[t.Any]
+    # Key to continue after, or None if this is the last page
+    after: t.Optional[t.Any] = None
+
+
+def max_rows() -> int:
+    """Hard cap on the number of rows in a list or page."""
+    return int(storage.load_config().get("api", {}).get("max_rows", 1000))
+
+
+def page_size() -> int:
+    """Number of rows in a page if not otherwise requested."""
+    return int(storage.load_config().get("api", {}).get("page_size", 100))
+
+
+def _page(
+    name: str,
+    arguments: t.Tuple[t.Any, ...],
+    after: t.Optional[t.Any],
+    limit: int,
+    vertical: bool = True,
+    key: str = "",
+    node: t.Optional[str] = storage.HOME,
+) -> Page:
+    """Query a page of rows from a paginated procedure of a node.
+
+    The procedure takes the given arguments followed by after and a size.
+    One extra row is queried to determine whether another page follows.
+    Without a node the pages of every shard are merged.
+    """
+    limit = max(1, min(limit, max_rows()))
+    arguments = arguments + (after, limit + 1)
+
+    def query() -> columnar.Result:
+        if node is None:
+            gathered = sharding.gather(name, arguments)
+            return sharding.merged([sets[0] for sets in gathered], limit + 1)
+        with storage.read(node) as db:
+            return db.procedure(name, arguments)
+
+    result = coalesce.shared(node, name, arguments, query)
+    items = result.vertical() if vertical else result.all()
+    if len(items) <= limit:
+        return Page(items)
+    items = items[:limit]
+    last = items[-1] if vertical else items[-1][key]
+    return Page(items, last)
+
+
+def _read(
+    name: str,
+    arguments: t.Optional[t.Tuple[t.Any, ...]] = None,
+    node: str = storage.HOME,
+) -> columnar.Result:
+    """Call a procedure that only reads on a node.
+
+    Identical concurrent calls share one query (see coalesce).
+    """
+
+    def query() -> columnar.Result:
+        with storage.read(node) as db:
+            return db.procedure(name, arguments)
+
+    return coalesce.shared(node, name, arguments, query)
+
+
+def _capped(
+    name: str,
+    arguments: t.Tuple[t.Any, ...] = (),
+    vertical: bool = True,
+    key: str = "",
+    node: t.Optional[str] = storage.HOME,
+) -> Page:
+    """Query the first page of an unpaginated list, up to the hard cap."""
+    page = _page(name, arguments, None, max_rows(), vertical, key, node)
+    if page.after is not None:
+        logger.warning("Truncated %s at %s rows", name, len(page.items))
+    return page
+
+
+# Resources of clients, which are kept on the shard of their client
+SHARDED = ("client",)
+# Resources that refer to users, which are kept at home with them
+HOMED = ("admin",)
+
+
+def _node(alt: str, key: t.Any = None) -> t.Optional[str]:
+    """Give the node holding a resource, or None for the every shard.
+
+    Without a key, the node holding the list of its keys.
+    """
+    if alt in SHARDED:
+        return None if key is None else sharding.node(key)
+    return storage.HOME
+
+
+def _writer(alt: str, key: t.Any) -> t.ContextManager[t.Any]:
+    """Provide what writes to a resource are made on.
+
+    The catalog is written to every node, so that each can refer to it.
+    """
+    if alt in SHARDED:
+        return sharding.write(key)
+    if alt in HOMED:
+        return storage.write()
+    return sharding.everywhere()
+
+
+def _load_keys(alt: str) -> t.Sequence[t.Any]:
+    """Query list of resource keys from the database."""
+    with storage.filling():
+        return _capped(f"get_{alt}s_page", node=_node(alt)).items
+
+
+def get_keys_page(alt: str, after: t.Optional[t.Any], limit: int) -> Page:
+    """Query a page of resource keys."""
+    return _page(f"get_{alt}s_page", (), after, limit, node=_node(alt))
+
+
+def _load(alt: str, key: t.Any) -> t.Optional[Record]:
+    """Query a resource from the database, copied out of its result to be cached."""
+    node = _node(alt, key) or storage.HOME
+    with storage.filling():
+        row = _read(f"get_{alt}", (key,), node).one()
+    return None if row is None else dict(row)
+
+
+def _versioned(alt: str, *key: t.Any) -> cache.Key:
+    """Key a cached read of a resource by the version of the resource it was read at.
+
+    A read loaded from before a write but stored once the write is committed
+    is stored under the old version, which is no longer looked up.
+    """
+    return (*key, cache.current_versions().get(alt))
+
+
+def get_keys(alt: str) -> t.Sequence[t.Any]:
+    """Query list of resource keys, through the cache."""
+    return cache.current().fetch(_versioned(alt, "keys", alt), lambda: _load_keys(alt))
+
+
+def get(alt: str, key: t.Any) -> t.Optional[Record]:
+    """Query a resource, through the cache."""
+    return cache.current().fetch(
+        _versioned(alt, "get", alt, key), lambda: _load(alt, key)
+    )
+
+
+def bump(*names: str) -> None:
+    """Advance the versions of written resources, once the writes are committed."""
+    versions = cache.current_versions()
+    storage.on_commit(lambda: versions.bump(*names))
+
+
+def invalidate(alt: str, *keys: t.Any) -> None:
+    """Drop cached reads affected by writes to resources and bump their version.
+
+    Waits for the writes to be committed, then drops the entries of the old version,
+    as cached reads are keyed by version and those of the new one are read after.
+    """
+
+    def drop() -> None:
+        cache.current().invalidate(
+            _versioned(alt, "keys", alt),
+            *[_versioned(alt, "get", alt, key) for key in keys],
+        )
+        if alt == "admin":
+            cache.current_permissions().invalidate(
+                *[_versioned(alt, "admin", key) for key in keys]
+            )
+            flask.g.pop("permissions", None)
+
+    storage.on_commit(drop)
+    bump(alt)
+
+
+def put(alt: str, parameters: t.Tuple[t.Any, ...]) -> None:
+    """Create or update a resource, key first.
+
+    The user of a client is copied to its shard first (see sharding.copy_user).
+    """
+    with _writer(alt, parameters[0]) as db:
+        if alt in SHARDED:
+            sharding.copy_user(parameters[0])
+        db.procedure(f"put_{alt}", parameters)
+    invalidate(alt, parameters[0])
+
+
+def delete(alt: str, key: t.Any) -> None:
+    """Delete a resource."""
+    with _writer(alt, key) as db:
+        db.procedure(f"delete_{alt}", (key,))
+    invalidate(alt, key)
+
+
+def _copy_users(
+    group: t.List[t.Tuple[int, t.Tuple[t.Any, ...]]], errors: t.List[Record]
+) -> t.List[t.Tuple[int, t.Tuple[t.Any, ...]]]:
+    """Copy the users of records of clients to their shard, keyed by client.
+
+    Records whose user does not exist are left out, with an error.
+    """
+    copied = []
+    for index, row in group:
+        try:
+            sharding.copy_user(row[0])
+        except sharding.NoUser as e:
+            errors.append({"index": index, "error": str(e)})
+            continue
+        copied.append((index, row))
+    return copied
+
+
+def _apply_many(
+    alt: str,
+    bulk: str,
+    each: str,
+    attrs: t.Sequence[str],
+    records: t.Sequence[t.Any],
+) -> t.Tuple[t.Sequence[t.Tuple[t.Any, ...]], t.Sequence[Record]]:
+    """Apply many records of a resource in one transaction (per node).
+
+    Records are mappings of every attr, key first.
+    They are applied by a single call of the bulk procedure,
+    falling back to a call of the each procedure per record if the bulk call fails
+    so that the records at fault can be reported.
+    Returns the rows applied and an error for each record that was not.
+    """
+    errors: t.List[Record] = []
+    valid: t.List[t.Tuple[int, t.Tuple[t.Any, ...]]] = []
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append({"index": index, "error": "record is not an object"})
+            continue
+        missing = [attr for attr in attrs if attr not in record]
+        if missing:
+            errors.append({"index": index, "error": f"missing {', '.join(missing)}"})
+            continue
+        valid.append((index, tuple(record[attr] for attr in attrs)))
+
+    # records of clients are applied on the shard of each
+    groups: t.Dict[t.Optional[str], t.List[t.Tuple[int, t.Tuple[t.Any, ...]]]] = {}
+    for index, row in valid:
+        groups.setdefault(_node(alt, row[0]), []).append((index, row))
+
+    outcomes: t.List[t.Tuple[t.Tuple[int, t.Tuple[t.Any, ...]], t.Optional[str]]] = []
+    for group in groups.values():
+        with _writer(alt, group[0][1][0]) as db:
+            if alt in SHARDED:
+                group = _copy_users(group, errors)
+                if not group:
+                    continue
+            items = json.dumps([dict(zip(attrs, row)) for _, row in group])
+            try:
+                db.procedure(bulk, (items,))
+                failures: t.Sequence[t.Optional[str]] = [None] * len(group)
+            except storage.Error as e:
+                # the failed call was undone alone, keeping the rest of the unit of work
+                logger.info("Bulk procedure %s failed, retrying each: %s", bulk, e)
+                failures = db.procedure_each(each, [row for _, row in group])
+        outcomes.extend(zip(group, failures))
+
+    applied = []
+    for (index, row), failure in outcomes:
+        if failure is None:
+            applied.append(row)
+        else:
+            errors.append({"index": index, "error": failure})
+    errors.sort(key=lambda error: t.cast(int, error["index"]))
+    return applied, errors
+
+
+def put_many(
+    alt: str, attrs: t.Sequence[str], records: t.Sequence[t.Any]
+) -> t.Tuple[int, t.Sequence[Record]]:
+    """Create or update many resources in one transaction.
+
+    Records are mappings of every attr, key first.
+    Returns the number applied and an error for each record that was not.
+    """
+    applied, errors = _apply_many(alt, f"put_{alt}_bulk", f"put_{alt}", attrs, records)
+    invalidate(alt, *[row[0] for row in applied])
+    return len(applied), errors
+
+
+def _load_colors() -> columnar.Result:
+    """Query every color with its hue, saturation and brightness."""
+    with storage.filling(), storage.read() as db:
+        return db.procedure("get_color_all")
+
+
+def get_nearest_colors(
+    hue: float, saturation: float, brightness: float, k: int
+) -> t.Sequence[Record]:
+    """Find the k colors nearest a color in the HSV cone, nearest first."""
+    index = palette.current()
+    index.ensure(cache.current_versions().get("color"), _load_colors)
+    k = max(0, min(k, max_rows()))
+    return [
+        dataclasses.asdict(neighbour)
+        for neighbour in index.nearest(hue, saturation, brightness, k)
+    ]
+
+
+# Catalog entry name to resource procedure name
+CATALOG = {
+    "moods": "mood",
+    "colors": "color",
+    "scents": "scent",
+    "tastes": "taste",
+    "shapes": "shape",
+    "medias": "mediagenre",
+    "musics": "musicgenre",
+}
+
+
+def get_catalog() -> t.Mapping[str, t.Any]:
+    """Query every qualia list at once.
+
+    All of the lists are read through the cache or over a single connection,
+    and are stamped with the combined version of their resources
+    if the versions are authoritative, as otherwise they miss other processes' writes.
+    """
+    versions = cache.current_versions()
+    catalog = {name: get_keys(alt) for name, alt in CATALOG.items()}
+    if not versions.authoritative:
+        return catalog
+    return {"version": versions.tag(*CATALOG.values()), **catalog}
+
+
+def get_connections(
+    alt: str,
+    other: str,
+    local_value: t.Optional[t.Any] = None,
+    other_value: t.Optional[t.Any] = None,
+) -> t.Sequence[Record]:
+    """Query connections, optionally filtered by either side."""
+    if local_value and other_value:
+        result = _read(f"get_{alt}affects_{alt}_{other}", (local_value, other_value))
+    elif local_value:
+        result = _read(f"get_{alt}affects_{alt}", (local_value,))
+    elif other_value:
+        result = _read(f"get_{alt}affects_{other}", (other_value,))
+    else:
+        result = _read(f"get_{alt}affects")
+    return result.all()
+
+
+def put_connection(alt: str, local_value: t.Any, other_value: t.Any) -> None:
+    """Create a connection."""
+    with sharding.everywhere() as db:
+        db.procedure(f"put_{alt}affects", (local_value, other_value))
+    bump(f"{alt}affects")
+    engine = recommend.current()
+    storage.on_commit(lambda: engine.connect(alt, local_value, other_value))
+
+
+def delete_connection(alt: str, local_value: t.Any, other_value: t.Any) -> None:
+    """Delete a connection."""
+    with sharding.everywhere() as db:
+        db.procedure(f"delete_{alt}affects", (local_value, other_value))
+    bump(f"{alt}affects")
+    engine = recommend.current()
+    storage.on_commit(
+        lambda: engine.connect(alt, local_value, other_value, connected=False)
+    )
+
+
+def put_connections(
+    alt: str, names: t.Tuple[str, str], records: t.Sequence[t.Any]
+) -> t.Tuple[int, t.Sequence[Record]]:
+    """Create many connections in one transaction.
+
+    Records are mappings of both names, local first.
+    Returns the number applied and an error for each record that was not.
+    """
+    applied, errors = _apply_many(
+        f"{alt}affects", f"put_{alt}affects_bulk", f"put_{alt}affects", names, records
+    )
+    bump(f"{alt}affects")
+    engine = recommend.current()
+
+    def connect() -> None:
+        for local_value, other_value in applied:
+            engine.connect(alt, local_value, other_value)
+
+    storage.on_commit(connect)
+    return len(applied), errors
+
+
+def delete_connections(
+    alt: str, names: t.Tuple[str, str], records: t.Sequence[t.Any]
+) -> t.Tuple[int, t.Sequence[Record]]:
+    """Delete many connections in one transaction.
+
+    Records are mappings of both names, local first.
+    Returns the number applied and an error for each record that was not.
+    """
+    applied, errors = _apply_many(
+        f"{alt}affects",
+        f"delete_{alt}affects_bulk",
+        f"delete_{alt}affects",
+        names,
+        records,
+    )
+    bump(f"{alt}affects")
+    engine = recommend.current()
+
+    def disconnect() -> None:
+        for local_value, other_value in applied:
+            engine.connect(alt, local_value, other_value, connected=False)
+
+    storage.on_commit(disconnect)
+    return len(applied), errors
+
+
+def get_users() -> t.Sequence[int]:
+    """Get all user ids, up to the hard cap."""
+    return _capped("get_users_page").items
+
+
+def get_users_page(after: t.Optional[int], limit: int) -> Page:
+    """Get a page of user ids."""
+    return _page("get_users_page", (), after, limit)
+
+
+def post_user(username: str) -> None:
+    """Make a user."""
+    with storage.write() as db:
+        db.procedure("post_user", (username,))
+    bump("user")
+
+
+def get_user(user: int) -> t.Optional[Record]:
+    """Get a single user."""
+    with storage.read() as db:
+        return db.procedure("get_user", (user,)).one()
+
+
+def delete_user(user: int) -> None:
+    """Delete a user, and its client data from its shard."""
+    if sharding.node(user) != storage.HOME:
+        with sharding.write(user) as db:
+            db.procedure("delete_user", (user,))
+    with storage.write() as db:
+        db.procedure("delete_user", (user,))
+    # deletion cascades to the client, admin and results of the user
+    bump("user", f"result:{user}", "stats")
+    invalidate("client", user)
+    invalidate("admin", user)
+    storage.on_commit(recommend.current().invalidate)
+
+
+def get_usernames() -> t.Sequence[str]:
+    """Get all usernames, up to the hard cap."""
+    return _capped("get_usernames_page").items
+
+
+def get_usernames_page(after: t.Optional[str], limit: int) -> Page:
+    """Get a page of usernames."""
+    return _page("get_usernames_page", (), after, limit)
+
+
+def get_username(username: str) -> t.Optional[Record]:
+    """Get a user for a username."""
+    with storage.read() as db:
+        return db.procedure("get_username", (username,)).one()
+
+
+def get_profile(username: str) -> t.Optional[Record]:
+    """Get the user, profile and results of a username in one round trip.
+
+    Results are capped like results/all.
+    """
+    node = sharding.place(username)
+    if node is None:
+        return None
+    with storage.read(node) as db:
+        user, client, results = db.procedure_sets("get_profile", (username, max_rows()))
+    found = user.one()
+    if found is None:
+        return None
+    return {"user": found, "client": client.one(), "results": results.all()}
+
+
+def get_or_create_client(username: str) -> Record:
+    """Get the profile of a username, creating the user and an empty profile if new.
+
+    The returned record has a created flag telling whether the user was made.
+    """
+    node = sharding.place(username, create=True)
+    with storage.write(node or storage.HOME) as db:
+        row = db.procedure("get_or_create_client", (username,)).one()
+    if row is None:
+        raise storage.Error("get_or_create_client returned no profile")
+    client = dict(row)
+    client["created"] = bool(client["created"])
+
+    if client["created"]:
+        invalidate("client", client["id"])
+        bump("user")
+    return client
+
+
+RESULT_QUALIA = ("mood", "taste", "scent", "color", "shape", "media", "music")
+
+
+def get_results(clientId: int) -> t.Sequence[int]:
+    """Get result numbers for a client, up to the hard cap."""
+    return _capped("get_results_page", (clientId,), node=sharding.node(clientId)).items
+
+
+def get_results_page(clientId: int, after: t.Optional[int], limit: int) -> Page:
+    """Get a page of result numbers for a client."""
+    return _page(
+        "get_results_page", (clientId,), after, limit, node=sharding.node(clientId)
+    )
+
+
+def post_result(clientId: int, result: Record) -> None:
+    """Create a result for a client.
+
+    Raises KeyError if the result is missing any qualia.
+    """
+    parameters = (clientId,) + tuple(result[q] for q in RESULT_QUALIA)
+    with sharding.write(clientId) as db:
+        db.procedure("post_result", parameters)
+    bump(f"result:{clientId}", "stats")
+    engine = recommend.current()
+    storage.on_commit(lambda: engine.record(result))
+
+
+def get_result_all(clientId: int) -> t.Sequence[Record]:
+    """Get full result set for a client, up to the hard cap."""
+    return _capped(
+        "get_result_all_page",
+        (clientId,),
+        vertical=False,
+        key="number",
+        node=sharding.node(clientId),
+    ).items
+
+
+def get_result_all_page(clientId: int, after: t.Optional[int], limit: int) -> Page:
+    """Get a page of full results for a client."""
+    return _page(
+        "get_result_all_page",
+        (clientId,),
+        after,
+        limit,
+        vertical=False,
+        key="number",
+        node=sharding.node(clientId),
+    )
+
+
+def unknown_answers(answers: Record) -> t.List[str]:
+    """Give the qualia whose quiz answers are not in the catalog.
+
+    Blank answers are known, to be filled in.
+    """
+    unknown = []
+    for q in RESULT_QUALIA:
+        value = answers.get(q)
+        if not value:
+            continue
+        if not isinstance(value, str) or get(CATALOG[f"{q}s"], value) is None:
+            unknown.append(q)
+    return unknown
+
+
+def submit_quiz(username: str, answers: Record) -> Record:
+    """Record a quiz submission in one transaction.
+
+    The user is created with an empty profile if they do not exist,
+    blank or missing qualia answers are filled in with the best suggestion
+    connected to the mood, and the others are connected to the mood.
+    Returns the result that was recorded.
+    """
+    engine = _recommendations()
+    filled = dict(answers)
+    for q in recommend.QUALIA:
+        if not filled.get(q):
+            best = engine.suggest(answers["mood"], q, limit=1, connected=True)
+            filled[q] = best[0].name if best else ""
+
+    parameters = (username,) + tuple(filled.get(q) or "" for q in RESULT_QUALIA)
+    node = sharding.place(username, create=True)
+    with storage.write(node or storage.HOME) as db:
+        row = db.procedure("submit_quiz", parameters).one()
+    if row is None:
+        raise storage.Error("submit_quiz returned no result")
+    result = dict(row)
+
+    clientId = result["clientId"]
+    invalidate("client", clientId)
+    bump("user", f"result:{clientId}", "stats")
+    bump(*[f"{q}affects" for q in RESULT_QUALIA[1:] if answers.get(q)])
+
+    def learn() -> None:
+        engine.record(result)
+        for q in recommend.QUALIA:
+            if answers.get(q):
+                engine.connect(q, answers[q], answers["mood"])
+
+    storage.on_commit(learn)
+    return result
+
+
+def get_mood_stats() -> t.Sequence[Record]:
+    """Get the number of results of each mood, most popular first.
+
+    Each shard counts its own results, which are added up.
+    """
+    gathered = sharding.gather("get_mood_stats")
+    stats = sharding.summed([sets[0] for sets in gathered]).all()
+    return sorted(stats, key=lambda row: (-row["results"], row["mood"]))
+
+
+def get_qualia_stats(q: str, mood: t.Optional[str] = None) -> t.Sequence[Record]:
+    """Get how often each value of a qualia was picked per mood, or for one mood."""
+    gathered = sharding.gather("get_qualia_stats", (q, mood))
+    stats = sharding.summed([sets[0] for sets in gathered]).all()
+    return sorted(stats, key=lambda row: (row["mood"], -row["results"], row["value"]))
+
+
+def get_qualia_top(q: str) -> t.Sequence[Record]:
+    """Get the most often picked value of a qualia for each mood.
+
+    Ranked from the stats added up over every shard, rather than each shard's top.
+    """
+    top: t.Dict[str, Record] = {}
+    for row in get_qualia_stats(q):
+        top.setdefault(row["mood"], row)
+    return list(top.values())
+
+
+def rebuild_stats() -> None:
+    """Recount the result statistics from every result, on every shard."""
+    with sharding.everywhere() as db:
+        db.procedure("rebuild_stats")
+    bump("stats")
+    storage.on_commit(recommend.current().invalidate)
+
+
+def _load_cooccurrence() -> t.Sequence[columnar.Result]:
+    """Query the connections and result counts of every qualia.
+
+    Connections are read from home, and counts are added up over every shard.
+    """
+    with storage.filling():
+        gathered = sharding.gather("get_cooccurrence")
+    half = len(gathered[0]) // 2
+    counts = [
+        sharding.summed([sets[index] for sets in gathered])
+        for index in range(half, 2 * half)
+    ]
+    return gathered[0][:half] + counts
+
+
+def _recommendations() -> recommend.Engine:
+    """Provide the recommendation engine, rebuilt if stale."""
+    engine = recommend.current()
+    engine.ensure(_load_cooccurrence)
+    return engine
+
+
+def get_suggestions(
+    mood: str, qualia: t.Sequence[str] = recommend.QUALIA, limit: int = 5
+) -> t.Mapping[str, t.Sequence[Record]]:
+    """Rank suggestions of each qualia for a mood, best first."""
+    limit = max(0, min(limit, max_rows()))
+    engine = _recommendations()
+    return {
+        q: [dataclasses.asdict(s) for s in engine.suggest(mood, q, limit)]
+        for q in qualia
+    }
+
+
+def stream_result_all(clientId: int) -> t.Iterator[Record]:
+    """Stream every result of a client, without a cap.
+
+    The connection is leased and the procedure called before returning,
+    so that their failures are raised before a response is started,
+    and the connection is held until the rows are exhausted.
+    """
+    with contextlib.ExitStack() as stack:
+        db = stack.enter_context(sharding.read(clientId))
+        rows = db.stream("get_result_all", (clientId,)).all()
+        held = stack.pop_all()
+
+    def stream() -> t.Iterator[Record]:
+        with held:
+            yield from rows
+
+    return stream()
+
+
+def get_result(clientId: int, number: int) -> t.Optional[Record]:
+    """Get a single result of a client."""
+    with sharding.read(clientId) as db:
+        return db.procedure("get_result", (clientId, number)).one()
+
+
+def delete_result(clientId: int, number: int) -> None:
+    """Delete a result of a client."""
+    with sharding.write(clientId) as db:
+        db.procedure("delete_result", (clientId, number))
+    bump(f"result:{clientId}", "stats")
+    storage.on_commit(recommend.current().invalidate)
@@ -0,0 +1,319 @@
+"""Client data spread over database nodes by consistent hashing of client ids.
+
+The home node (the [database] of the config) holds the catalog, users and admins,
+and is a shard like the others.
+Each shard holds the clients and results of the clients hashed to it,
+along with their users, and a copy of the catalog, which is written to every node.
+"""
+
+import bisect
+import contextlib
+import dataclasses
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+import typing as t
+
+import flask
+
+import storage
+from columnar import Result
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def _hash(key: str) -> int:
+    """Hash a key to a point of the ring."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class Ring:
+    """Consistent hashing of client ids onto named nodes.
+
+    Each node is placed at many points of the ring,
+    and a client belongs to the node of the first point after its own hash,
+    so adding or removing a node only moves the clients of the points it gains or loses.
+    """
+
+    def __init__(self, nodes: t.Sequence[str], points: int = 64) -> None:
+        """Initialize a Ring of nodes, each placed at the given number of points."""
+        self.nodes = tuple(nodes)
+        placed = sorted(
+            (_hash(f"{node}#{point}"), node)
+            for node in self.nodes
+            for point in range(points)
+        )
+        self._hashes = [hashed for hashed, _ in placed]
+        self._owners = [node for _, node in placed]
+
+    def node(self, client: int) -> str:
+        """Give the node a client belongs to."""
+        index = bisect.bisect(self._hashes, _hash(str(client)))
+        return self._owners[index % len(self._owners)]
+
+
+@dataclasses.dataclass(frozen=True)
+class Placement:
+    """Where the data of a client is."""
+
+    node: str
+    # Writes are refused while the client is copied to another node
+    moving: bool = False
+
+
+class Directory:
+    """Locates the data of clients.
+
+    Clients are where the ring places them,
+    unless they are recorded elsewhere in the ClientShard table of the home node,
+    as they are while a change of shards moves them.
+    The records are reloaded every ttl seconds.
+    """
+
+    def __init__(self, ring: Ring, ttl: float = 5.0) -> None:
+        """Initialize a Directory."""
+        self.ring = ring
+        self.ttl = ttl
+        # keyed like the ring, by the id as text, as clients can be given either way
+        self._recorded: t.Dict[str, Placement] = {}
+        self._loaded = -math.inf
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: t.Mapping[str, t.Any]) -> "Directory":
+        """Construct a Directory from a config with an optional [sharding]."""
+        options = config.get("sharding", {})
+        return cls(
+            Ring(list(storage.shards(config)), points=options.get("points", 64)),
+            ttl=options.get("ttl", 5.0),
+        )
+
+    @property
+    def sharded(self) -> bool:
+        """Whether there are shards other than home."""
+        return len(self.ring.nodes) > 1
+
+    def reload(self) -> None:
+        """Load the clients recorded away from the ring."""
+        with storage.read() as db:
+            rows = db.procedure("get_client_shards").all()
+        recorded = {
+            str(row["clientId"]): Placement(row["shard"], bool(row["moving"]))
+            for row in rows
+        }
+        with self._lock:
+            self._recorded = recorded
+            self._loaded = time.monotonic()
+
+    def locate(self, client: int) -> Placement:
+        """Find where the data of a client is."""
+        if not self.sharded:
+            return Placement(storage.HOME)
+        if time.monotonic() - self._loaded > self.ttl:
+            self.reload()
+        return self._recorded.get(str(client)) or Placement(self.ring.node(client))
+
+
+_directory_lock = threading.Lock()
+
+
+def get_directory(app: flask.Flask) -> Directory:
+    """Provide the Directory owned by an app, creating it on first use."""
+    with _directory_lock:
+        if "sharding" not in app.extensions:
+            app.extensions["sharding"] = Directory.from_config(storage.load_config())
+        directory: Directory = app.extensions["sharding"]
+        return directory
+
+
+def current() -> Directory:
+    """Provide the Directory of the current app, or of the config outside of one."""
+    if not flask.has_app_context():
+        return Directory.from_config(storage.load_config())
+    return get_directory(flask.current_app)
+
+
+class Moving(storage.Error):
+    """A client cannot be written to while it is moved to another shard.
+
+    Answered with 503, to be retried once the client has moved.
+    """
+
+
+class NoUser(storage.Error):
+    """A client cannot be written to a shard as its user does not exist.
+
+    Answered with 404.
+    """
+
+
+def node(client: int) -> str:
+    """Give the node to read the data of a client from."""
+    return current().locate(client).node
+
+
+@contextlib.contextmanager
+def read(client: int) -> t.Iterator[storage.Database]:
+    """Provide the Database of the node of a client, for procedures that only read."""
+    with storage.read(node(client)) as database:
+        yield database
+
+
+@contextlib.contextmanager
+def write(client: int) -> t.Iterator[storage.Database]:
+    """Provide the Database of the node of a client, for a unit of work.
+
+    Raises Moving while the client is being moved.
+    """
+    placement = current().locate(client)
+    if placement.moving:
+        raise Moving(f"Client {client} is being moved from {placement.node}")
+    with storage.write(placement.node) as database:
+        yield database
+
+
+def copy_user(client: int) -> None:
+    """Copy the user of a client from home to the node of the client.
+
+    Users are made at home, e.g. by POST /api/users/,
+    so one must be copied to another node before its client is written there,
+    as place does for the users it creates.
+    Raises NoUser if the user does not exist, whichever node the client is on.
+    """
+    with storage.read() as db:
+        row = db.procedure("get_user", (client,)).one()
+    if row is None:
+        raise NoUser(f"User {client} does not exist")
+    placement = current().locate(client)
+    if placement.node == storage.HOME:
+        return
+    with storage.write(placement.node) as db:
+        db.procedure("put_user", (client, row["username"]))
+
+
+def place(username: str, create: bool = False) -> t.Optional[str]:
+    """Find the node of the client data of a username.
+
+    If asked to create, a new user is made on the home node, which allocates ids,
+    and copied to the node of its client, for the client to be made there.
+    Gives None if the user does not exist, and was not asked to be created.
+    Without shards every client is at home, where the procedures find or make the user.
+    """
+    directory = current()
+    if not directory.sharded:
+        return storage.HOME
+    if create:
+        with storage.write() as db:
+            row = db.procedure("ensure_user", (username,)).one()
+    else:
+        with storage.read() as db:
+            row = db.procedure("get_username", (username,)).one()
+    if row is None:
+        return None
+    client: int = row["id"]
+
+    placement = directory.locate(client)
+    if create:
+        if placement.moving:
+            raise Moving(f"Client {client} is being moved from {placement.node}")
+        if placement.node != storage.HOME:
+            with storage.write(placement.node) as db:
+                db.procedure("put_user", (client, username))
+    return placement.node
+
+
+class Everywhere:
+    """The Databases of every node, which make the same calls to each."""
+
+    def __init__(self, databases: t.Sequence[storage.Database]) -> None:
+        """Initialize Everywhere, home first."""
+        self.databases = databases
+
+    def procedure(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+    ) -> Result:
+        """Call a procedure on every node, returning the result of home."""
+        results = [database.procedure(name, arguments) for database in self.databases]
+        return results[0]
+
+    def procedure_each(
+        self, name: str, rows: t.Iterable[t.Tuple[t.Any, ...]]
+    ) -> t.List[t.Optional[str]]:
+        """Call a procedure per row on every node, returning the errors of home."""
+        rows = list(rows)
+        errors = [database.procedure_each(name, rows) for database in self.databases]
+        return errors[0]
+
+
+@contextlib.contextmanager
+def everywhere() -> t.Iterator[Everywhere]:
+    """Provide every node for a unit of work on each, to write the catalog.
+
+    Each node commits on its own, the last first,
+    so a failure to commit can leave the nodes apart.
+    """
+    with contextlib.ExitStack() as stack:
+        yield Everywhere(
+            [
+                stack.enter_context(storage.write(shard))
+                for shard in current().ring.nodes
+            ]
+        )
+
+
+def gather(
+    name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+) -> t.List[t.List[Result]]:
+    """Call a procedure on every node, giving the result sets of each, home first."""
+    gathered = []
+    for shard in current().ring.nodes:
+        with storage.read(shard) as db:
+            gathered.append(db.procedure_sets(name, arguments))
+    return gathered
+
+
+def summed(results: t.Sequence[Result], count: str = "results") -> Result:
+    """Merge results of every node, adding the counts of rows alike otherwise."""
+    headers = results[0].headers
+    index = headers.index(count)
+    totals: t.Dict[t.Tuple[t.Any, ...], int] = {}
+    for result in results:
+        for row in result.rows:
+            key = tuple(row[:index]) + tuple(row[index + 1 :])
+            totals[key] = totals.get(key, 0) + row[index]
+    rows = [key[:index] + (total,) + key[index:] for key, total in totals.items()]
+    return Result(headers=headers, rows=rows)
+
+
+def merged(results: t.Sequence[Result], limit: int) -> Result:
+    """Merge pages of every node ordered by their first column, up to a limit."""
+    rows = heapq.merge(*(result.rows for result in results), key=lambda row: row[0])
+    return Result(headers=results[0].headers, rows=list(itertools.islice(rows, limit)))
+
+
+def _moving(error: Moving) -> flask.Response:
+    """Answer a write to a client being moved, to be retried once it has moved."""
+    logger.warning("Refused write: %s", error)
+    response = flask.jsonify({"error": str(error)})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(math.ceil(current().ttl))
+    return response
+
+
+def _no_user(error: NoUser) -> flask.Response:
+    """Answer a write to a client whose user does not exist."""
+    response = flask.jsonify({"error": str(error)})
+    response.status_code = 404
+    return response
+
+
+def init_app(app: flask.Flask) -> flask.Flask:
+    """Register the answers to refused writes of clients on a Flask app."""
+    app.register_error_handler(Moving, _moving)
+    app.register_error_handler(NoUser, _no_user)
+    return app
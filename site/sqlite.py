@@ -0,0 +1,505 @@
+"""Embedded SQLite backend, implementing the stored procedures in Python."""
+
+import contextlib
+import functools
+import logging
+import os
+import sqlite3
+import typing as t
+
+import metrics
+import storage
+from columnar import Result
+from generated_statements import SQLITE
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+SCHEMA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, "database", "sqlite.sql"
+)
+
+# Qualia of a result, and the table connecting each to moods
+QUALIA = {
+    "taste": "TasteAffects",
+    "scent": "ScentAffects",
+    "color": "ColorAffects",
+    "shape": "ShapeAffects",
+    "media": "MediaAffects",
+    "music": "MusicAffects",
+}
+
+RESULT = ("clientId", "number", "mood") + tuple(QUALIA)
+# Columns given when a result is recorded, the number is generated
+RECORDED = ("clientId", "mood") + tuple(QUALIA)
+
+Procedure = t.Callable[[sqlite3.Cursor, t.Tuple[t.Any, ...]], t.List[Result]]
+
+
+def _read(cursor: sqlite3.Cursor) -> Result:
+    """Read the result set of the last statement executed by a cursor."""
+    headers = tuple(column[0] for column in cursor.description or ())
+    return Result(headers=headers, rows=cursor.fetchall(), auto=cursor.lastrowid)
+
+
+class Statements:
+    """A procedure made of SQL statements, which refer to the parameters by name."""
+
+    def __init__(self, parameters: t.Sequence[str], statements: t.Sequence[str]):
+        """Initialize Statements."""
+        self.parameters = tuple(parameters)
+        self.statements = tuple(statements)
+
+    def bind(self, arguments: t.Tuple[t.Any, ...]) -> t.Dict[str, t.Any]:
+        """Name the arguments of a call."""
+        if len(arguments) != len(self.parameters):
+            raise storage.Error(
+                f"Expected {len(self.parameters)} arguments, got {len(arguments)}"
+            )
+        return dict(zip(self.parameters, arguments))
+
+    def __call__(
+        self, cursor: sqlite3.Cursor, arguments: t.Tuple[t.Any, ...]
+    ) -> t.List[Result]:
+        """Execute every statement, returning the result set of each query."""
+        parameters = self.bind(arguments)
+        results = []
+        for statement in self.statements:
+            cursor.execute(statement, parameters)
+            if cursor.description is not None:
+                results.append(_read(cursor))
+        return results
+
+
+def _ensure_client(cursor: sqlite3.Cursor, username: str) -> t.Tuple[int, bool]:
+    """Resolve a username, creating the user with an empty profile if new.
+
+    Returns the id of the user and whether a profile was created.
+    """
+    cursor.execute(
+        "INSERT INTO User (username) VALUES (?) ON CONFLICT (username) DO NOTHING",
+        (username,),
+    )
+    cursor.execute("SELECT id FROM User WHERE username = ?", (username,))
+    (clientId,) = cursor.fetchone()
+    cursor.execute(
+        "INSERT INTO Client (id, birthday, email, displayName, bio)"
+        " VALUES (?, 'YYYY/MM/DD', 'email', 'display name', 'biography')"
+        " ON CONFLICT (id) DO NOTHING",
+        (clientId,),
+    )
+    return clientId, cursor.rowcount > 0
+
+
+def get_or_create_client(
+    cursor: sqlite3.Cursor, arguments: t.Tuple[t.Any, ...]
+) -> t.List[Result]:
+    """Get the profile of a username, creating it if new."""
+    (username,) = arguments
+    clientId, created = _ensure_client(cursor, username)
+    cursor.execute(
+        "SELECT User.id, User.username, Client.birthday, Client.email,"
+        " Client.displayName, Client.bio, ? AS created"
+        " FROM User JOIN Client ON Client.id = User.id WHERE User.id = ?",
+        (created, clientId),
+    )
+    return [_read(cursor)]
+
+
+def submit_quiz(
+    cursor: sqlite3.Cursor, arguments: t.Tuple[t.Any, ...]
+) -> t.List[Result]:
+    """Record a quiz submission, like the submit_quiz stored procedure."""
+    username, mood, *answers = arguments
+    clientId, _ = _ensure_client(cursor, username)
+
+    values: t.List[t.Optional[str]] = []
+    for (q, table), value in zip(QUALIA.items(), answers):
+        if value:
+            cursor.execute(
+                f"INSERT INTO {table} ({q}, mood) VALUES (?, ?) ON CONFLICT DO NOTHING",
+                (value, mood),
+            )
+        else:
+            cursor.execute(f"SELECT {q} FROM {table} WHERE mood = ? LIMIT 1", (mood,))
+            row = cursor.fetchone()
+            value = None if row is None else row[0]
+        values.append(value)
+
+    cursor.execute(
+        f"INSERT INTO Result ({', '.join(RECORDED)})"
+        f" VALUES ({', '.join('?' * len(RECORDED))})",
+        (clientId, mood, *values),
+    )
+    return [Result(RESULT, [(clientId, cursor.lastrowid, mood, *values)])]
+
+
+RESULT_LIST = ", ".join(RESULT)
+
+CUSTOM: t.Dict[str, Procedure] = {
+    "get_users": Statements([], ["SELECT id FROM User"]),
+    "get_users_page": Statements(
+        ["after", "size"],
+        [
+            "SELECT id FROM User WHERE :after IS NULL OR id > :after"
+            " ORDER BY id LIMIT :size"
+        ],
+    ),
+    "post_user": Statements(
+        ["username"], ["INSERT INTO User (username) VALUES (:username)"]
+    ),
+    "get_user": Statements(["id"], ["SELECT id, username FROM User WHERE id = :id"]),
+    "delete_user": Statements(["id"], ["DELETE FROM User WHERE id = :id"]),
+    "get_usernames": Statements([], ["SELECT username FROM User"]),
+    "get_usernames_page": Statements(
+        ["after", "size"],
+        [
+            "SELECT username FROM User WHERE :after IS NULL OR username > :after"
+            " ORDER BY username LIMIT :size"
+        ],
+    ),
+    "get_username": Statements(
+        ["username"], ["SELECT id, username FROM User WHERE username = :username"]
+    ),
+    "get_results": Statements(
+        ["clientId"], ["SELECT number FROM Result WHERE clientId = :clientId"]
+    ),
+    "get_results_page": Statements(
+        ["clientId", "after", "size"],
+        [
+            "SELECT number FROM Result WHERE clientId = :clientId"
+            " AND (:after IS NULL OR number > :after) ORDER BY number LIMIT :size"
+        ],
+    ),
+    "post_result": Statements(
+        RECORDED,
+        [
+            f"INSERT INTO Result ({', '.join(RECORDED)})"
+            f" VALUES ({', '.join(':' + name for name in RECORDED)})"
+        ],
+    ),
+    "get_result": Statements(
+        ["clientId", "number"],
+        [
+            f"SELECT {RESULT_LIST} FROM Result"
+            " WHERE clientId = :clientId AND number = :number"
+        ],
+    ),
+    "get_result_all": Statements(
+        ["clientId"],
+        [f"SELECT {RESULT_LIST} FROM Result WHERE clientId = :clientId"],
+    ),
+    "get_result_all_page": Statements(
+        ["clientId", "after", "size"],
+        [
+            f"SELECT {RESULT_LIST} FROM Result WHERE clientId = :clientId"
+            " AND (:after IS NULL OR number > :after) ORDER BY number LIMIT :size"
+        ],
+    ),
+    "delete_result": Statements(
+        ["clientId", "number"],
+        ["DELETE FROM Result WHERE clientId = :clientId AND number = :number"],
+    ),
+    "get_profile": Statements(
+        ["username", "size"],
+        [
+            "SELECT id, username FROM User WHERE username = :username",
+            "SELECT Client.id, birthday, email, displayName, bio FROM Client"
+            " JOIN User ON User.id = Client.id WHERE User.username = :username",
+            f"SELECT {', '.join('Result.' + name for name in RESULT)} FROM Result"
+            " JOIN User ON User.id = Result.clientId WHERE User.username = :username"
+            " ORDER BY Result.number LIMIT :size",
+        ],
+    ),
+    "get_color_all": Statements(
+        [], ["SELECT name, hue, saturation, brightness FROM Color ORDER BY name"]
+    ),
+    "get_cooccurrence": Statements(
+        [],
+        [f"SELECT mood, {q} FROM {table}" for q, table in QUALIA.items()]
+        + [
+            "SELECT mood, value, results FROM QualiaStats"
+            f" WHERE qualia = '{q}' AND results > 0"
+            for q in QUALIA
+        ],
+    ),
+    "get_or_create_client": get_or_create_client,
+    "submit_quiz": submit_quiz,
+    "rebuild_stats": Statements(
+        [],
+        [
+            "DELETE FROM QualiaStats",
+            "DELETE FROM MoodStats",
+            "INSERT INTO MoodStats (mood, results)"
+            " SELECT mood, COUNT(*) FROM Result WHERE mood IS NOT NULL GROUP BY mood",
+        ]
+        + [
+            "INSERT INTO QualiaStats (qualia, mood, value, results)"
+            f" SELECT '{q}', mood, {q}, COUNT(*) FROM Result"
+            f" WHERE mood IS NOT NULL AND {q} IS NOT NULL AND {q} != ''"
+            f" GROUP BY mood, {q}"
+            for q in QUALIA
+        ],
+    ),
+    "get_mood_stats": Statements(
+        [],
+        [
+            "SELECT mood, results FROM MoodStats WHERE results > 0"
+            " ORDER BY results DESC, mood"
+        ],
+    ),
+    "get_qualia_stats": Statements(
+        ["qualia", "mood"],
+        [
+            "SELECT mood, value, results FROM QualiaStats"
+            " WHERE qualia = :qualia AND (:mood IS NULL OR mood = :mood)"
+            " AND results > 0 ORDER BY mood, results DESC, value"
+        ],
+    ),
+    "ensure_user": Statements(
+        ["username"],
+        [
+            "INSERT INTO User (username) VALUES (:username)"
+            " ON CONFLICT (username) DO NOTHING",
+            "SELECT id FROM User WHERE username = :username",
+        ],
+    ),
+    "put_user": Statements(
+        ["id", "username"],
+        [
+            "INSERT INTO User (id, username) VALUES (:id, :username)"
+            " ON CONFLICT (id) DO UPDATE SET username = excluded.username"
+        ],
+    ),
+    "put_result": Statements(
+        RESULT,
+        [
+            f"INSERT INTO Result ({RESULT_LIST})"
+            f" VALUES ({', '.join(':' + name for name in RESULT)})"
+        ],
+    ),
+    "delete_client": Statements(
+        ["id"],
+        [
+            # results first, so that their trigger counts them
+            "DELETE FROM Result WHERE clientId = :id",
+            "DELETE FROM Client WHERE id = :id",
+        ],
+    ),
+    "get_client_shards": Statements(
+        [], ["SELECT clientId, shard, moving FROM ClientShard"]
+    ),
+    "put_client_shard": Statements(
+        ["clientId", "shard", "moving"],
+        [
+            "INSERT INTO ClientShard (clientId, shard, moving)"
+            " VALUES (:clientId, :shard, :moving) ON CONFLICT (clientId)"
+            " DO UPDATE SET shard = excluded.shard, moving = excluded.moving"
+        ],
+    ),
+    "delete_client_shard": Statements(
+        ["clientId"], ["DELETE FROM ClientShard WHERE clientId = :clientId"]
+    ),
+}
+
+PROCEDURES: t.Dict[str, Procedure] = {
+    **{
+        name: Statements(parameters, statements)
+        for name, (parameters, statements) in SQLITE.items()
+    },
+    **CUSTOM,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_schema(path: str = SCHEMA) -> str:
+    """Load the script creating the tables, if they do not exist."""
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+class SQLite(storage.Database):
+    """Manage a connection to a SQLite database file.
+
+    Every procedure runs under a savepoint, so it is atomic like a stored procedure.
+    A path starting with file: is opened as a URI,
+    e.g. file::memory:?cache=shared for an in memory database shared by a pool.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0) -> None:
+        """Initialize a SQLite connection, creating the tables if needed."""
+        super().__init__()
+        with storage.translate(sqlite3.Error):
+            # transactions are begun explicitly rather than by the sqlite3 module
+            self.connection = sqlite3.connect(
+                path,
+                timeout=timeout,
+                isolation_level=None,
+                check_same_thread=False,
+                uri=path.startswith("file:"),
+            )
+            self.connection.executescript(load_schema())
+            self.connection.execute("PRAGMA foreign_keys = ON")
+
+    @contextlib.contextmanager
+    def _cursor(self) -> t.Iterator[sqlite3.Cursor]:
+        """Open a cursor, raising the errors of sqlite as the storage Error."""
+        with storage.translate(sqlite3.Error):
+            cursor = self.connection.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def _call(
+        self,
+        cursor: sqlite3.Cursor,
+        name: str,
+        arguments: t.Optional[t.Tuple[t.Any, ...]],
+        call: t.Optional[metrics.Call] = None,
+    ) -> t.List[Result]:
+        """Call a procedure under a savepoint, undoing it entirely if it fails.
+
+        The rows of a procedure are read as it runs, so are timed as executing.
+        """
+        procedure = PROCEDURES.get(name)
+        if procedure is None:
+            raise storage.Error(f"PROCEDURE {name} does not exist")
+        cursor.execute("SAVEPOINT call")
+        try:
+            results = procedure(cursor, tuple(arguments or ()))
+        except BaseException:
+            cursor.execute("ROLLBACK TO call")
+            cursor.execute("RELEASE call")
+            raise
+        cursor.execute("RELEASE call")
+        if call is not None:
+            call.lap("execute")
+            call.rows = sum(map(len, results))
+        return results
+
+    def procedure(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+    ) -> Result:
+        """Call a procedure, returning its first result set."""
+        results = self.procedure_sets(name, arguments)
+        if results:
+            return results[0]
+        return Result(headers=tuple(), rows=[])
+
+    def procedure_sets(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+    ) -> t.List[Result]:
+        """Call a procedure, returning every result set it produces."""
+        logger.info("Performing procedure %s with arguments %s", name, arguments)
+
+        with self._calling(name) as call, self._cursor() as cursor:
+            return self._call(cursor, name, arguments, call)
+
+    def procedure_each(
+        self, name: str, rows: t.Iterable[t.Tuple[t.Any, ...]]
+    ) -> t.List[t.Optional[str]]:
+        """Call a procedure once per row of arguments, in one transaction.
+
+        Each call runs under its own savepoint, so a failing row is rolled back alone.
+        Returns the error of each row, or None if it succeeded.
+        """
+        logger.info("Performing procedure %s for each of many rows", name)
+
+        errors: t.List[t.Optional[str]] = []
+        with self._calling(name) as call, self._cursor() as cursor:
+            for arguments in rows:
+                try:
+                    self._call(cursor, name, arguments)
+                except (sqlite3.Error, storage.Error) as e:
+                    errors.append(str(e))
+                else:
+                    errors.append(None)
+            call.lap("execute")
+            call.rows = len(errors)
+        return errors
+
+    def stream(
+        self,
+        name: str,
+        arguments: t.Optional[t.Tuple[t.Any, ...]] = None,
+        batch: int = 500,
+    ) -> storage.Stream:
+        """Call a procedure, fetching the rows of its first result set lazily.
+
+        Only procedures of a single query are streamed,
+        the results of others are read in full.
+        """
+        logger.info("Streaming procedure %s with arguments %s", name, arguments)
+
+        procedure = PROCEDURES.get(name)
+        if not isinstance(procedure, Statements) or len(procedure.statements) != 1:
+            result = self.procedure(name, arguments)
+            return storage.Stream(headers=result.headers, rows=iter(result.rows))
+
+        call = self._start(name)
+        cursor = self.connection.cursor()
+        try:
+            with storage.translate(sqlite3.Error):
+                cursor.execute(
+                    procedure.statements[0], procedure.bind(tuple(arguments or ()))
+                )
+        except Exception:
+            cursor.close()
+            self._finish(call, error=True)
+            raise
+        call.lap("execute")
+        headers = tuple(column[0] for column in cursor.description or ())
+
+        def rows() -> t.Iterator[t.Tuple[t.Any, ...]]:
+            # the call is recorded once the rows are exhausted or closed
+            try:
+                with storage.translate(sqlite3.Error):
+                    while True:
+                        chunk = cursor.fetchmany(batch)
+                        if not chunk:
+                            break
+                        call.rows += len(chunk)
+                        yield from chunk
+                    call.lap("fetch")
+            except Exception:
+                call.error = True
+                raise
+            finally:
+                cursor.close()
+                self._finish(call, error=call.error)
+
+        return storage.Stream(headers=headers, rows=rows())
+
+    def ping(self) -> bool:
+        """Check that the connection is still usable."""
+        try:
+            self.connection.execute("SELECT 1")
+        except sqlite3.Error as e:
+            logger.debug("Ping failed: %s", e)
+            return False
+        return True
+
+    def begin(self) -> None:
+        """Begin a transaction, taking the write lock up front."""
+        with storage.translate(sqlite3.Error):
+            self.connection.execute("BEGIN IMMEDIATE")
+
+    def commit(self) -> None:
+        """Commit the current transaction."""
+        with storage.translate(sqlite3.Error):
+            self.connection.execute("COMMIT")
+
+    def rollback(self) -> bool:
+        """Roll back any uncommitted work, returning whether it succeeded."""
+        try:
+            self.connection.rollback()
+        except sqlite3.Error as e:
+            logger.debug("Rollback failed: %s", e)
+            return False
+        return True
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with storage.translate(sqlite3.Error):
+            self.connection.close()
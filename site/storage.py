@@ -0,0 +1,1133 @@
+"""Database access: configuration, connections, pooling and results."""
+
+import collections
+import contextlib
+import dataclasses
+import functools
+import logging
+import math
+import re
+import threading
+import time
+import typing as t
+
+import flask
+import toml
+
+try:
+    import mariadb
+except ImportError:
+    # only needed by the mariadb backend
+    mariadb = None  # type: ignore[assignment]
+
+import metrics
+import tracing
+from columnar import Result
+from generated_statements import MARIADB
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+CONFIG = "config.toml"
+
+F = t.TypeVar("F", bound=t.Callable[..., t.Any])
+
+
+class Error(Exception):
+    """Base class of errors raised by the database, whatever its backend."""
+
+
+@contextlib.contextmanager
+def translate(
+    errors: t.Union[t.Type[BaseException], t.Tuple[t.Type[BaseException], ...]],
+) -> t.Iterator[None]:
+    """Raise the errors of a database driver as Error."""
+    try:
+        yield
+    except errors as e:
+        raise Error(str(e)) from e
+
+
+def _mariadb_errors(method: F) -> F:
+    """Decorate a method to raise the errors of mariadb as Error."""
+
+    @functools.wraps(method)
+    def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+        with translate(mariadb.Error):
+            return method(*args, **kwargs)
+
+    return t.cast(F, wrapper)
+
+
+@functools.lru_cache(maxsize=None)
+def load_config() -> t.Mapping[str, t.Any]:
+    """Load the site configuration.
+
+    The file is only parsed once per process.
+    """
+    return toml.load(CONFIG)
+
+
+@dataclasses.dataclass()
+class Stream:
+    """Database result whose rows are fetched lazily."""
+
+    headers: t.Tuple[str, ...]
+    rows: t.Iterator[t.Tuple[t.Any, ...]]
+
+    def all(self) -> t.Iterator[t.Mapping[str, t.Any]]:
+        """Yield the results woven."""
+        for row in self.rows:
+            yield Result.weave(self.headers, row)
+
+
+class Database:
+    """A connection to the database, whose procedures are called by name.
+
+    Procedures run either within a unit of work, one transaction committed once,
+    or while reading, in autocommit without a transaction.
+    A procedure called in neither is run in a unit of work of its own.
+
+    Subclasses implement the procedures for a particular backend.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a Database."""
+        self.created = time.monotonic()
+        self.last_used = self.created
+        # Set when the Database is owned by a Pool
+        self.pool: t.Optional["Pool"] = None
+        self.metrics: t.Optional[metrics.Metrics] = None
+        # Time spent leasing the connection, counted towards the next call
+        self.connect_time = 0.0
+        # Units of work open, and callbacks waiting for the outermost to commit
+        self.depth = 0
+        self.pending: t.List[t.Callable[[], None]] = []
+        # Blocks open that only read
+        self.readers = 0
+
+    @contextlib.contextmanager
+    def unit(self) -> t.Iterator["Database"]:
+        """Run procedures in one transaction, committed once the outermost unit ends.
+
+        Units nest, an inner unit joining the transaction of the outer one.
+        The transaction is rolled back if the outermost unit raises.
+        """
+        if self.depth == 0:
+            with self._observe("BEGIN") as call:
+                self.begin()
+                call.lap("execute")
+        self.depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.depth -= 1
+            if self.depth == 0:
+                self.pending.clear()
+                self.rollback()
+            raise
+        self.depth -= 1
+        if self.depth == 0:
+            with self._observe("COMMIT") as call:
+                try:
+                    self.commit()
+                except BaseException:
+                    self.pending.clear()
+                    self.rollback()
+                    raise
+                call.lap("commit")
+            pending, self.pending = self.pending, []
+            for callback in pending:
+                callback()
+
+    @contextlib.contextmanager
+    def reading(self) -> t.Iterator["Database"]:
+        """Run procedures that only read, without beginning or committing.
+
+        Within a unit of work they read from its transaction.
+        """
+        self.readers += 1
+        try:
+            yield self
+        finally:
+            self.readers -= 1
+
+    @contextlib.contextmanager
+    def _implicit(self) -> t.Iterator[None]:
+        """Run a unit of work for a call, unless within one or reading."""
+        if self.depth or self.readers:
+            yield
+        else:
+            with self.unit():
+                yield
+
+    @contextlib.contextmanager
+    def _calling(self, name: str) -> t.Iterator[metrics.Call]:
+        """Time a call of a procedure, in a unit of work of its own if needed."""
+        with self._implicit(), self._observe(name) as call:
+            yield call
+
+    def on_commit(self, callback: t.Callable[[], None]) -> None:
+        """Call a function once the current unit of work commits, or now if none."""
+        if self.depth:
+            self.pending.append(callback)
+        else:
+            callback()
+
+    def _start(self, name: str) -> metrics.Call:
+        """Start timing a call of a procedure."""
+        call = metrics.Call(name)
+        if self.connect_time:
+            call.phases["connect"] = self.connect_time
+            self.connect_time = 0.0
+        return call
+
+    def _finish(self, call: metrics.Call, error: bool = False) -> None:
+        """Record a timed call of a procedure."""
+        call.error = error
+        if self.metrics is not None:
+            self.metrics.record_call(call)
+        tracing.record_call(call)
+
+    @contextlib.contextmanager
+    def _observe(self, name: str) -> t.Iterator[metrics.Call]:
+        """Time a call of a procedure, recording it once done."""
+        call = self._start(name)
+        try:
+            yield call
+        except BaseException:
+            self._finish(call, error=True)
+            raise
+        self._finish(call)
+
+    def procedure(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+    ) -> Result:
+        """Call a procedure, returning its first result set."""
+        raise NotImplementedError()
+
+    def procedure_sets(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+    ) -> t.List[Result]:
+        """Call a procedure, returning every result set it produces."""
+        raise NotImplementedError()
+
+    def procedure_each(
+        self, name: str, rows: t.Iterable[t.Tuple[t.Any, ...]]
+    ) -> t.List[t.Optional[str]]:
+        """Call a procedure once per row of arguments, in one transaction.
+
+        Returns the error of each row, or None if it succeeded.
+        """
+        raise NotImplementedError()
+
+    def stream(
+        self,
+        name: str,
+        arguments: t.Optional[t.Tuple[t.Any, ...]] = None,
+        batch: int = 500,
+    ) -> Stream:
+        """Call a procedure that only reads, fetching its first result set lazily."""
+        raise NotImplementedError()
+
+    def ping(self) -> bool:
+        """Check that the connection is still usable."""
+        raise NotImplementedError()
+
+    def begin(self) -> None:
+        """Begin a transaction."""
+        raise NotImplementedError()
+
+    def commit(self) -> None:
+        """Commit the current transaction."""
+        raise NotImplementedError()
+
+    def rollback(self) -> bool:
+        """Roll back any uncommitted work, returning whether it succeeded."""
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        raise NotImplementedError()
+
+    def __enter__(self) -> "Database":
+        """Return a Context Manager of this connection."""
+        return self
+
+    def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        """Close this connection, unless it is leased from a pool."""
+        if self.pool is None:
+            self.close()
+
+
+PLACEHOLDER = re.compile(r":(\w+)")
+
+
+class Prepared:
+    """A generated procedure as statements to prepare, in place of calling it.
+
+    The statements refer to the parameters by name,
+    which are replaced by positional placeholders.
+    """
+
+    def __init__(self, parameters: t.Sequence[str], statements: t.Sequence[str]):
+        """Initialize Prepared statements."""
+        self.parameters = tuple(parameters)
+        self.statements: t.List[t.Tuple[str, t.Tuple[int, ...]]] = []
+        for statement in statements:
+            names = PLACEHOLDER.findall(statement)
+            positions = tuple(self.parameters.index(name) for name in names)
+            self.statements.append((PLACEHOLDER.sub("?", statement), positions))
+
+    def bind(
+        self, arguments: t.Tuple[t.Any, ...]
+    ) -> t.Iterator[t.Tuple[str, t.Tuple[t.Any, ...]]]:
+        """Pair each statement with the arguments of its placeholders."""
+        if len(arguments) != len(self.parameters):
+            raise Error(
+                f"Expected {len(self.parameters)} arguments, got {len(arguments)}"
+            )
+        for sql, positions in self.statements:
+            yield sql, tuple(arguments[position] for position in positions)
+
+
+PREPARED: t.Dict[str, Prepared] = {
+    name: Prepared(parameters, statements)
+    for name, (parameters, statements) in MARIADB.items()
+}
+
+
+class MariaDB(Database):
+    """Manage a connection to a MariaDB server and its stored procedures."""
+
+    @_mariadb_errors
+    def __init__(self, prepared: bool = False, **params: t.Union[str, int]) -> None:
+        """Initialize a MariaDB connection.
+
+        If prepared, the generated procedures are run as statements
+        prepared once per connection instead of being called.
+        """
+        super().__init__()
+        # reads need no transaction, writes begin one explicitly
+        self.connection = mariadb.connect(autocommit=True, **params)
+        self.prepared = prepared
+        # prepared cursors of this connection, by statement
+        self._cursors: t.Dict[str, t.Any] = {}
+
+    @staticmethod
+    def _read(cursor: t.Any) -> Result:
+        """Read the current result set of a cursor."""
+        try:
+            data: t.Sequence[t.Tuple[t.Any, ...]] = cursor.fetchall()
+        except mariadb.ProgrammingError as e:
+            logger.debug("Exception getting data from cursor: %s", e)
+            data = []
+
+        if cursor.description is not None:
+            try:
+                headers: t.Tuple[str, ...] = tuple(
+                    column[0] for column in cursor.description
+                )
+            except mariadb.ProgrammingError as e:
+                logger.debug("Exception getting headers: %s", e)
+                headers = tuple()
+        else:
+            headers = tuple()
+
+        auto: t.Optional[int] = cursor.lastrowid
+        return Result(headers=headers, rows=data, auto=auto)
+
+    def _execute(
+        self, prepared: Prepared, arguments: t.Optional[t.Tuple[t.Any, ...]]
+    ) -> t.List[t.Any]:
+        """Execute prepared statements, returning the cursor of each."""
+        cursors = []
+        for sql, bound in prepared.bind(arguments or ()):
+            cursor = self._cursors.get(sql)
+            if cursor is None:
+                cursor = self._cursors[sql] = self.connection.cursor(prepared=True)
+            cursor.execute(sql, bound)
+            cursors.append(cursor)
+        return cursors
+
+    def _statements(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]]
+    ) -> t.Optional[t.List[Result]]:
+        """Run a procedure as prepared statements, if it is one that can be.
+
+        Returns every result set, including those of statements that are not queries,
+        or None if the procedure should be called instead.
+        """
+        if not self.prepared or name not in PREPARED:
+            return None
+        with self._calling(name) as call:
+            cursors = self._execute(PREPARED[name], arguments)
+            call.lap("execute")
+            results = [self._read(cursor) for cursor in cursors]
+            call.lap("fetch")
+            call.rows = sum(map(len, results))
+        return results
+
+    @_mariadb_errors
+    def procedure(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+    ) -> Result:
+        """Call a stored procedure.
+
+        Returns a single result set, exhausting the others if they exist.
+        """
+        logger.info("Performing procedure %s with arguments %s", name, arguments)
+
+        prepared = self._statements(name, arguments)
+        if prepared is not None:
+            queries = [result for result in prepared if result.headers]
+            return (queries or prepared)[0]
+
+        # Create a new cursor, helps ensure not deadlocking
+        connection = self.connection
+        with self._calling(name) as call, connection.cursor() as cursor:
+
+            cursor.callproc(name, arguments)
+            call.lap("execute")
+
+            result = self._read(cursor)
+
+            # documentation sucks real bad about mariadb
+            # but it seems like this will return None if the results have been exhausted
+            # nextset throws exception if non querying statement, e.g. INSERT
+            try:
+                while cursor.nextset():
+                    pass
+            except mariadb.ProgrammingError as e:
+                logger.debug("Exception advancing result sets: %s", e)
+            call.lap("fetch")
+            call.rows = len(result)
+
+            return result
+
+    @_mariadb_errors
+    def procedure_sets(
+        self, name: str, arguments: t.Optional[t.Tuple[t.Any, ...]] = None
+    ) -> t.List[Result]:
+        """Call a stored procedure, returning every result set it produces.
+
+        The status set that ends a procedure call has no columns and is skipped.
+        """
+        logger.info("Performing procedure %s with arguments %s", name, arguments)
+
+        prepared = self._statements(name, arguments)
+        if prepared is not None:
+            return [result for result in prepared if result.headers]
+
+        connection = self.connection
+        with self._calling(name) as call, connection.cursor() as cursor:
+
+            cursor.callproc(name, arguments)
+            call.lap("execute")
+
+            results: t.List[Result] = []
+            while True:
+                if cursor.description is not None:
+                    results.append(self._read(cursor))
+                try:
+                    if not cursor.nextset():
+                        break
+                except mariadb.ProgrammingError as e:
+                    logger.debug("Exception advancing result sets: %s", e)
+                    break
+            call.lap("fetch")
+            call.rows = sum(map(len, results))
+
+            return results
+
+    @_mariadb_errors
+    def procedure_each(
+        self, name: str, rows: t.Iterable[t.Tuple[t.Any, ...]]
+    ) -> t.List[t.Optional[str]]:
+        """Call a stored procedure once per row of arguments, in one transaction.
+
+        Each call runs under a savepoint, so a failing row is rolled back alone.
+        Returns the error of each row, or None if it succeeded.
+        """
+        logger.info("Performing procedure %s for each of many rows", name)
+
+        errors: t.List[t.Optional[str]] = []
+        connection = self.connection
+        with self._calling(name) as call, connection.cursor() as cursor:
+            for arguments in rows:
+                cursor.execute("SAVEPOINT each_row")
+                try:
+                    if self.prepared and name in PREPARED:
+                        for executed in self._execute(PREPARED[name], arguments):
+                            self._read(executed)
+                    else:
+                        cursor.callproc(name, arguments)
+                        try:
+                            while cursor.nextset():
+                                pass
+                        except mariadb.ProgrammingError as e:
+                            logger.debug("Exception advancing result sets: %s", e)
+                except (mariadb.Error, Error) as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT each_row")
+                    errors.append(str(e))
+                else:
+                    errors.append(None)
+            call.lap("execute")
+            call.rows = len(errors)
+        return errors
+
+    @_mariadb_errors
+    def stream(
+        self,
+        name: str,
+        arguments: t.Optional[t.Tuple[t.Any, ...]] = None,
+        batch: int = 500,
+    ) -> Stream:
+        """Call a stored procedure, fetching the rows of its first result set lazily.
+
+        Rows are read from an unbuffered cursor in batches,
+        so the connection must not be used for anything else
+        until the rows have been exhausted (or closed).
+        """
+        logger.info("Streaming procedure %s with arguments %s", name, arguments)
+
+        connection = self.connection
+        call = self._start(name)
+        cursor = connection.cursor(buffered=False)
+        try:
+            cursor.callproc(name, arguments)
+            headers: t.Tuple[str, ...] = tuple(
+                column[0] for column in cursor.description or ()
+            )
+        except Exception:
+            cursor.close()
+            self._finish(call, error=True)
+            raise
+        call.lap("execute")
+
+        def rows() -> t.Iterator[t.Tuple[t.Any, ...]]:
+            # the call is recorded once the rows are exhausted or closed
+            try:
+                with translate(mariadb.Error):
+                    while True:
+                        chunk = cursor.fetchmany(batch)
+                        if not chunk:
+                            break
+                        call.rows += len(chunk)
+                        yield from chunk
+                    try:
+                        while cursor.nextset():
+                            pass
+                    except mariadb.ProgrammingError as e:
+                        logger.debug("Exception advancing result sets: %s", e)
+                    call.lap("fetch")
+            except Exception:
+                call.error = True
+                raise
+            finally:
+                cursor.close()
+                self._finish(call, error=call.error)
+
+        return Stream(headers=headers, rows=rows())
+
+    def ping(self) -> bool:
+        """Check that the connection is still usable."""
+        try:
+            self.connection.ping()
+        except mariadb.Error as e:
+            logger.debug("Ping failed: %s", e)
+            return False
+        return True
+
+    @_mariadb_errors
+    def begin(self) -> None:
+        """Begin a transaction."""
+        self.connection.begin()
+
+    @_mariadb_errors
+    def commit(self) -> None:
+        """Commit the current transaction."""
+        self.connection.commit()
+
+    def rollback(self) -> bool:
+        """Roll back any uncommitted work, returning whether it succeeded."""
+        try:
+            self.connection.rollback()
+        except mariadb.Error as e:
+            logger.debug("Rollback failed: %s", e)
+            return False
+        return True
+
+    @_mariadb_errors
+    def close(self) -> None:
+        """Close the database connection, and the statements prepared on it."""
+        for cursor in self._cursors.values():
+            cursor.close()
+        self._cursors.clear()
+        self.connection.close()
+
+
+# Options of the [database] section that describe replication, not a connection
+REPLICATION = ("replicas", "balance", "sticky")
+
+
+def nodes(
+    config: t.Mapping[str, t.Any],
+) -> t.Tuple[t.Mapping[str, t.Any], t.List[t.Mapping[str, t.Any]]]:
+    """Split a config into a config per node, the primary's and each replica's.
+
+    Replicas are given as [[database.replicas]] tables,
+    whose options override those of the primary.
+    """
+    params = {
+        option: value
+        for option, value in config["database"].items()
+        if option not in REPLICATION
+    }
+    replicas = config["database"].get("replicas", [])
+    return {**config, "database": params}, [
+        {**config, "database": {**params, **replica}} for replica in replicas
+    ]
+
+
+# Name of the node that holds everything but the data of clients on other shards
+HOME = "home"
+
+
+def shards(config: t.Mapping[str, t.Any]) -> t.Dict[str, t.Mapping[str, t.Any]]:
+    """Give the config of every database node by name, the [database] itself as home.
+
+    Shards are given as [[sharding.shards]] tables, named by their name option,
+    whose other options override those of [database] (apart from its replicas).
+    """
+    base = {
+        option: value
+        for option, value in config["database"].items()
+        if option not in REPLICATION
+    }
+    configs: t.Dict[str, t.Mapping[str, t.Any]] = {HOME: config}
+    for shard in config.get("sharding", {}).get("shards", []):
+        options = dict(shard)
+        name = options.pop("name")
+        if name in configs:
+            raise ValueError(f"Duplicate shard {name}")
+        configs[name] = {**config, "database": {**base, **options}}
+    return configs
+
+
+def connect(config: t.Mapping[str, t.Any]) -> Database:
+    """Open a Database as given by the [database] section of a config.
+
+    The backend may be "mariadb" (the default), whose other options are passed to
+    mariadb.connect apart from prepared, or "sqlite",
+    which stores the database in a file at path.
+    Replicas are ignored, the Database is of the primary.
+    """
+    params = dict(nodes(config)[0]["database"])
+    backend = params.pop("backend", "mariadb")
+    if backend == "mariadb":
+        return MariaDB(**params)
+    if backend == "sqlite":
+        import sqlite  # pylint: disable=import-outside-toplevel
+
+        return sqlite.SQLite(
+            params.get("path", "vibe.db"), timeout=params.get("timeout", 5.0)
+        )
+    raise ValueError(f"Unknown database backend {backend}")
+
+
+class PoolTimeout(Exception):
+    """No connection could be leased from a pool in time."""
+
+
+@dataclasses.dataclass()
+class PoolStats:
+    """Counters describing the lifetime of a pool."""
+
+    created: int = 0
+    closed: int = 0
+    acquired: int = 0
+    # Acquisitions that found every connection leased and had to wait
+    exhausted: int = 0
+    # Acquisitions that gave up waiting
+    timeouts: int = 0
+    failed_checks: int = 0
+    wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+
+class Pool:
+    """A bounded pool of Database connections.
+
+    Idle connections are health checked before being leased,
+    and are retired once they exceed their maximum lifetime
+    or have sat idle for too long.
+    """
+
+    def __init__(
+        self,
+        factory: t.Callable[[], Database],
+        size: int = 8,
+        timeout: float = 5.0,
+        max_lifetime: float = 1800.0,
+        idle_timeout: float = 300.0,
+        check_interval: float = 30.0,
+    ) -> None:
+        """Initialize a Pool that opens connections with the given factory."""
+        self.factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+
+        self.stats = PoolStats()
+        # Given to every connection, to record their calls
+        self.metrics: t.Optional[metrics.Metrics] = None
+
+        self._idle: t.Deque[Database] = collections.deque()
+        self._leased = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config: t.Mapping[str, t.Any]) -> "Pool":
+        """Construct a Pool from a config with a [database] and optional [pool]."""
+        options = config.get("pool", {})
+        return cls(
+            lambda: connect(config),
+            size=options.get("size", 8),
+            timeout=options.get("timeout", 5.0),
+            max_lifetime=options.get("max_lifetime", 1800.0),
+            idle_timeout=options.get("idle_timeout", 300.0),
+            check_interval=options.get("check_interval", 30.0),
+        )
+
+    @property
+    def leased(self) -> int:
+        """Number of connections currently leased out."""
+        return self._leased
+
+    @property
+    def idle(self) -> int:
+        """Number of connections waiting in the pool."""
+        return len(self._idle)
+
+    def _expired(self, database: Database, now: float) -> bool:
+        """Determine if a connection should be retired."""
+        return (
+            now - database.created > self.max_lifetime
+            or now - database.last_used > self.idle_timeout
+        )
+
+    def _discard(self, database: Database) -> None:
+        """Close a connection that is no longer tracked by the pool."""
+        self.stats.closed += 1
+        try:
+            database.close()
+        except Error as e:
+            logger.debug("Exception closing pooled connection: %s", e)
+
+    def reap(self) -> None:
+        """Close idle connections that have expired."""
+        now = time.monotonic()
+        with self._condition:
+            expired = [db for db in self._idle if self._expired(db, now)]
+            for database in expired:
+                self._idle.remove(database)
+        for database in expired:
+            self._discard(database)
+
+    def acquire(self) -> Database:
+        """Lease a connection, waiting for one to be released if needed.
+
+        Raises PoolTimeout if none become available within the timeout.
+        """
+        self.reap()
+        start = time.monotonic()
+        with self._condition:
+            if not self._idle and self._leased >= self.size:
+                self.stats.exhausted += 1
+            while not self._idle and self._leased >= self.size:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.stats.timeouts += 1
+                    raise PoolTimeout(f"No connection available after {self.timeout}s")
+                self._condition.wait(remaining)
+
+            waited = time.monotonic() - start
+            self.stats.wait_time += waited
+            self.stats.max_wait_time = max(self.stats.max_wait_time, waited)
+            self.stats.acquired += 1
+
+            database = self._idle.pop() if self._idle else None
+            self._leased += 1
+
+        try:
+            database = self._prepare(database)
+        except Exception:
+            with self._condition:
+                self._leased -= 1
+                self._condition.notify()
+            raise
+        # waiting, checking and opening count as connecting
+        database.metrics = self.metrics
+        database.connect_time += time.monotonic() - start
+        return database
+
+    def _prepare(self, database: t.Optional[Database]) -> Database:
+        """Health check an idle connection, or open a new one."""
+        now = time.monotonic()
+        if database is not None and now - database.last_used > self.check_interval:
+            if not database.ping():
+                self.stats.failed_checks += 1
+                self._discard(database)
+                database = None
+
+        if database is None:
+            database = self.factory()
+            database.pool = self
+            self.stats.created += 1
+
+        database.last_used = now
+        return database
+
+    def release(self, database: Database, broken: bool = False) -> None:
+        """Return a leased connection to the pool.
+
+        A broken lease, or one left within a unit of work, is rolled back,
+        and discarded if that fails.
+        """
+        broken = broken or database.depth > 0
+        database.depth = database.readers = 0
+        database.pending.clear()
+        now = time.monotonic()
+        database.last_used = now
+        keep = not (broken and not database.rollback())
+        keep = keep and now - database.created <= self.max_lifetime
+        if not keep:
+            self._discard(database)
+
+        with self._condition:
+            self._leased -= 1
+            if keep:
+                self._idle.append(database)
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+        for database in idle:
+            self._discard(database)
+
+
+@dataclasses.dataclass()
+class RoutingStats:
+    """Counters describing where reads were sent."""
+
+    replica_reads: int = 0
+    # Reads sent to the primary despite replicas, as they followed a write
+    sticky_reads: int = 0
+
+
+# the routing state is kept together, as it is shared under one lock
+# pylint: disable-next=too-many-instance-attributes
+class Cluster:
+    """A Pool of the primary database, which takes every write, and of each replica.
+
+    Reads are balanced over the replicas, either round robin or to the least loaded,
+    but go to the primary when they follow a write:
+    for the rest of a request once it has written,
+    and for sticky seconds after a write of its client, to read past replication lag.
+    Reads filling a cache shared by every client go to the primary
+    for sticky seconds after any write committed by the process.
+    """
+
+    BALANCES = ("round_robin", "least_loaded")
+
+    def __init__(
+        self,
+        primary: Pool,
+        replicas: t.Sequence[Pool] = (),
+        balance: str = "round_robin",
+        sticky: float = 1.0,
+    ) -> None:
+        """Initialize a Cluster of Pools."""
+        if balance not in self.BALANCES:
+            raise ValueError(f"Unknown balance {balance}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.balance = balance
+        self.sticky = sticky
+
+        self.stats = RoutingStats()
+        # When the process last committed a write to the primary, if it has
+        self.committed: t.Optional[float] = None
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: t.Mapping[str, t.Any]) -> "Cluster":
+        """Construct a Cluster from a config with a [database] and optional [pool].
+
+        Every node is pooled with the same [pool] options.
+        """
+        primary, replicas = nodes(config)
+        return cls(
+            Pool.from_config(primary),
+            [Pool.from_config(replica) for replica in replicas],
+            balance=config["database"].get("balance", "round_robin"),
+            sticky=config["database"].get("sticky", 1.0),
+        )
+
+    @property
+    def pools(self) -> t.List[Pool]:
+        """The Pool of every node, the primary first."""
+        return [self.primary, *self.replicas]
+
+    def commit(self) -> None:
+        """Note that the process has committed a write to the primary."""
+        with self._lock:
+            self.committed = time.monotonic()
+
+    def recently_committed(self) -> bool:
+        """Whether the process has committed a write within sticky seconds."""
+        committed = self.committed
+        return committed is not None and time.monotonic() - committed < self.sticky
+
+    def stick(self) -> None:
+        """Count a read sent to the primary as it followed a write."""
+        with self._lock:
+            self.stats.sticky_reads += 1
+
+    def replica(self, wrote: bool = False) -> t.Optional[Pool]:
+        """Choose the replica to read from, or None to read from the primary.
+
+        Reads that follow a write are read from the primary.
+        """
+        if not self.replicas:
+            return None
+        with self._lock:
+            if wrote:
+                self.stats.sticky_reads += 1
+                return None
+            self.stats.replica_reads += 1
+            # start from the next replica in turn, so ties are spread
+            start = self._turn % len(self.replicas)
+            self._turn += 1
+        turn = self.replicas[start:] + self.replicas[:start]
+        if self.balance == "least_loaded":
+            return min(turn, key=lambda pool: pool.leased)
+        return turn[0]
+
+    def close(self) -> None:
+        """Close every idle connection of every node."""
+        for pool in self.pools:
+            pool.close()
+
+
+_pool_lock = threading.Lock()
+
+
+def get_clusters(app: flask.Flask) -> t.Mapping[str, Cluster]:
+    """Provide the Cluster of every node owned by an app, creating them on first use."""
+    with _pool_lock:
+        if "pool" not in app.extensions:
+            created = {
+                node: Cluster.from_config(config)
+                for node, config in shards(load_config()).items()
+            }
+            for cluster in created.values():
+                for pool in cluster.pools:
+                    pool.metrics = metrics.get_metrics(app)
+            app.extensions["pool"] = created
+        clusters: t.Mapping[str, Cluster] = app.extensions["pool"]
+        return clusters
+
+
+def get_cluster(app: flask.Flask, node: str = HOME) -> Cluster:
+    """Provide the Cluster of a node owned by an app."""
+    return get_clusters(app)[node]
+
+
+def get_pool(app: flask.Flask, node: str = HOME) -> Pool:
+    """Provide the Pool of the primary database of a node owned by an app."""
+    return get_cluster(app, node).primary
+
+
+def _lease(node: str, role: str, pool: Pool) -> Database:
+    """Lease a Database of a node for the app context, or give the one leased."""
+    leases: t.Dict[t.Tuple[str, str], Database] = flask.g.setdefault("leases", {})
+    if (node, role) not in leases:
+        try:
+            leases[node, role] = pool.acquire()
+        except PoolTimeout as e:
+            logger.warning("Connection pool exhausted: %s", e)
+            flask.abort(503)
+    return leases[node, role]
+
+
+def get_db(node: str = HOME) -> Database:
+    """Provide a Database of the primary of a node.
+
+    Within an app context the Database is leased from the node's pool,
+    shared by every call in the context,
+    and returned when the context is torn down.
+    Outside of one a standalone connection is opened.
+    """
+    if not flask.has_app_context():
+        return connect(shards(load_config())[node])
+    return _lease(node, "primary", get_pool(flask.current_app, node))
+
+
+# Cookie holding the time of the last write of a client, in seconds since the epoch
+STICKY = "vibe_wrote"
+
+
+def follows_write(node: str = HOME) -> bool:
+    """Whether the reads of the app context should be read from the primary of a node.
+
+    They should once the request has written,
+    or within the sticky seconds of the node after a write of its client,
+    or, if they are filling a cache (see filling), after any write of the process.
+    """
+    if flask.g.get("wrote"):
+        return True
+    cluster = get_cluster(flask.current_app, node)
+    if flask.g.get("filling") and cluster.recently_committed():
+        return True
+    if not flask.has_request_context():
+        return False
+    try:
+        wrote = float(flask.request.cookies.get(STICKY, ""))
+    except ValueError:
+        return False
+    # a time in the future is not believed, so cannot pin a client to the primary
+    return 0.0 <= time.time() - wrote < cluster.sticky
+
+
+@contextlib.contextmanager
+def filling() -> t.Iterator[None]:
+    """Read from the primary after recent writes of the process, for a shared cache.
+
+    What a read caches is served to every client, including those that wrote,
+    so it must not be read from a replica that has not caught up on the writes.
+    """
+    if not flask.has_app_context():
+        yield
+        return
+    outer = flask.g.get("filling", False)
+    flask.g.filling = True
+    try:
+        yield
+    finally:
+        flask.g.filling = outer
+
+
+def get_replica(node: str = HOME) -> Database:
+    """Provide a Database of a node to read from, a replica unless reads should be primary.
+
+    A replica is leased at most once per app context,
+    and is returned along with the primary.
+    """
+    if not flask.has_app_context():
+        return get_db(node)
+    cluster = get_cluster(flask.current_app, node)
+    leases: t.Dict[t.Tuple[str, str], Database] = flask.g.setdefault("leases", {})
+    primary = follows_write(node)
+    if (node, "replica") in leases:
+        if not primary:
+            return leases[node, "replica"]
+        # keep the lease, to be returned at teardown
+        cluster.stick()
+        return get_db(node)
+    pool = cluster.replica(wrote=primary)
+    if pool is None:
+        return get_db(node)
+    return _lease(node, "replica", pool)
+
+
+@contextlib.contextmanager
+def read(node: str = HOME) -> t.Iterator[Database]:
+    """Provide the Database of a node for procedures that only read.
+
+    Reads run in autocommit, each seeing the latest committed data,
+    so need no transaction and no commit round trip.
+    They are sent to a replica, if there are any,
+    unless they follow a write (see Cluster.replica).
+    """
+    with get_replica(node) as database, database.reading():
+        yield database
+
+
+@contextlib.contextmanager
+def write(node: str = HOME) -> t.Iterator[Database]:
+    """Provide the Database of a node for a unit of work, always of the primary.
+
+    Units nest, so a request can run the writes of several calls
+    in one transaction with one commit.
+    The rest of the request then reads from the primary too,
+    as do the client's next requests once it commits (see follows_write).
+    """
+    with get_db(node) as database, database.unit():
+        if flask.has_app_context():
+            flask.g.wrote = True
+            database.on_commit(functools.partial(_committed, node))
+        yield database
+
+
+def _committed(node: str) -> None:
+    """Note that the request has committed a write to a node, for reads to stick to."""
+    flask.g.committed = time.time()
+    get_cluster(flask.current_app, node).commit()
+
+
+def on_commit(callback: t.Callable[[], None]) -> None:
+    """Call a function once the request's unit of work commits, or now if none.
+
+    The request's unit of work is that of the home node.
+    """
+    database: t.Optional[Database] = (
+        flask.g.get("leases", {}).get((HOME, "primary"))
+        if flask.has_app_context()
+        else None
+    )
+    if database is None:
+        callback()
+    else:
+        database.on_commit(callback)
+
+
+def _release_db(exception: t.Optional[BaseException]) -> None:
+    """Return the app context's Databases to their pools."""
+    leases: t.Dict[t.Tuple[str, str], Database] = flask.g.pop("leases", {})
+    for database in leases.values():
+        if database.pool is not None:
+            database.pool.release(database, broken=exception is not None)
+
+
+def _stick(response: flask.Response) -> flask.Response:
+    """Give the client of a request that committed a write the time of the write."""
+    committed: t.Optional[float] = flask.g.get("committed")
+    if committed is not None:
+        sticky = max(
+            cluster.sticky for cluster in get_clusters(flask.current_app).values()
+        )
+        if sticky > 0:
+            response.set_cookie(
+                STICKY,
+                f"{committed:.3f}",
+                max_age=math.ceil(sticky),
+                httponly=True,
+                samesite="Lax",
+            )
+    return response
+
+
+def init_app(app: flask.Flask) -> flask.Flask:
+    """Register connection pooling on the provided Flask app."""
+    app.after_request(_stick)
+    app.teardown_appcontext(_release_db)
+    return app
@@ -0,0 +1,244 @@
+"""Request scoped spans, reported in Server-Timing headers and sampled to a file."""
+
+import contextlib
+import dataclasses
+import json
+import logging
+import random
+import threading
+import time
+import typing as t
+
+import flask
+
+import metrics
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+@dataclasses.dataclass(eq=False)
+class Span:
+    """A timed part of a request, and the parts it is made of."""
+
+    kind: str
+    name: str
+    started: float
+    duration: float = 0.0
+    children: t.List["Span"] = dataclasses.field(default_factory=list)
+
+    def walk(self) -> t.Iterator["Span"]:
+        """Yield this span and every span beneath it."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def as_dict(self, origin: float) -> t.Dict[str, t.Any]:
+        """Describe the span tree, in milliseconds since the origin."""
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "start": round((self.started - origin) * 1000, 3),
+            "duration": round(self.duration * 1000, 3),
+            "children": [child.as_dict(origin) for child in self.children],
+        }
+
+
+class Trace:
+    """The spans of one request."""
+
+    def __init__(self, name: str, sampled: bool) -> None:
+        """Start tracing a request."""
+        self.root = Span("request", name, time.perf_counter())
+        self.sampled = sampled
+        self._open = [self.root]
+
+    def open(self, kind: str, name: str) -> Span:
+        """Start a span within the innermost open span."""
+        span = Span(kind, name, time.perf_counter())
+        self._open[-1].children.append(span)
+        self._open.append(span)
+        return span
+
+    def close(self, span: Span) -> None:
+        """End a span, and any spans left open within it."""
+        now = time.perf_counter()
+        while span in self._open:
+            inner = self._open.pop()
+            inner.duration = now - inner.started
+
+    def add(self, span: Span) -> None:
+        """Place an already finished span within the innermost open span."""
+        self._open[-1].children.append(span)
+
+    def finish(self) -> None:
+        """End the request."""
+        self.close(self.root)
+
+    def server_timing(self) -> str:
+        """Total the spans of each kind as a Server-Timing header."""
+        totals: t.Dict[str, t.List[float]] = {}
+        for span in self.root.walk():
+            total = totals.setdefault(span.kind, [0.0, 0])
+            total[0] += span.duration
+            total[1] += 1
+        entries = [f"total;dur={self.root.duration * 1000:.3f}"]
+        for kind, (duration, count) in totals.items():
+            if kind != "request":
+                entries.append(f'{kind};dur={duration * 1000:.3f};desc="{count}x"')
+        return ", ".join(entries)
+
+
+class Tracer:
+    """Traces requests and writes a sample of them to a JSON lines file."""
+
+    def __init__(
+        self,
+        server_timing: bool = True,
+        sample: float = 0.0,
+        path: str = "traces.jsonl",
+    ) -> None:
+        """Initialize a Tracer."""
+        self.server_timing = server_timing
+        self.sample = sample
+        self.path = path
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests are traced at all."""
+        return self.server_timing or self.sample > 0
+
+    def start(self, name: str) -> Trace:
+        """Start tracing a request, deciding whether it is sampled."""
+        return Trace(name, self.sample > 0 and random.random() < self.sample)
+
+    def write(self, trace: Trace, record: t.Mapping[str, t.Any]) -> None:
+        """Append a sampled trace to the file."""
+        line = json.dumps({**record, "span": trace.root.as_dict(trace.root.started)})
+        with self._lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as file:
+                    file.write(line + "\n")
+            except OSError as e:
+                logger.warning("Could not write trace: %s", e)
+
+
+_tracer_lock = threading.Lock()
+
+
+def get_tracer(app: flask.Flask) -> Tracer:
+    """Provide the Tracer owned by an app, creating it on first use."""
+    with _tracer_lock:
+        if "tracing" not in app.extensions:
+            # storage records its calls here, so is only imported once loaded
+            import storage  # pylint: disable=import-outside-toplevel
+
+            options = storage.load_config().get("tracing", {})
+            app.extensions["tracing"] = Tracer(
+                server_timing=options.get("server_timing", True),
+                sample=options.get("sample", 0.0),
+                path=options.get("path", "traces.jsonl"),
+            )
+        tracer: Tracer = app.extensions["tracing"]
+        return tracer
+
+
+def current() -> Tracer:
+    """Provide the Tracer of the current app."""
+    return get_tracer(flask.current_app)
+
+
+def active() -> t.Optional[Trace]:
+    """Provide the Trace of the current request, if it is traced."""
+    if not flask.has_app_context():
+        return None
+    trace: t.Optional[Trace] = flask.g.get("trace")
+    return trace
+
+
+@contextlib.contextmanager
+def span(kind: str, name: str = "") -> t.Iterator[None]:
+    """Time a block as a span of the current request, if it is traced."""
+    trace = active()
+    if trace is None:
+        yield
+        return
+    opened = trace.open(kind, name or kind)
+    try:
+        yield
+    finally:
+        trace.close(opened)
+
+
+def record_call(call: metrics.Call) -> None:
+    """Add a finished procedure call to the current trace, one span per phase.
+
+    Phases are laps, so follow one another from the start of the call,
+    apart from connecting, which happened before it.
+    """
+    trace = active()
+    if trace is None:
+        return
+    started = call.started - call.phases.get("connect", 0.0)
+    parent = Span("procedure", call.procedure, started)
+    for phase, duration in call.phases.items():
+        parent.children.append(Span(phase, phase, started, duration))
+        started += duration
+    parent.duration = started - parent.started
+    trace.add(parent)
+
+
+def _start_request() -> None:
+    """Start tracing a request."""
+    tracer = current()
+    if tracer.enabled:
+        name = flask.request.endpoint or "unmatched"
+        flask.g.trace = tracer.start(name)
+
+
+def _finish_request(response: flask.Response) -> flask.Response:
+    """Finish tracing a request, reporting its spans."""
+    trace: t.Optional[Trace] = flask.g.pop("trace", None)
+    if trace is None:
+        return response
+    trace.finish()
+    tracer = current()
+    if tracer.server_timing:
+        response.headers["Server-Timing"] = trace.server_timing()
+    if trace.sampled:
+        tracer.write(
+            trace,
+            {
+                "time": time.time(),
+                "method": flask.request.method,
+                "path": flask.request.path,
+                "status": response.status_code,
+            },
+        )
+    return response
+
+
+def _start_render(_sender: flask.Flask, template: t.Any, **_extra: t.Any) -> None:
+    """Open a span for rendering a template."""
+    trace = active()
+    if trace is not None:
+        flask.g.render_spans = flask.g.get("render_spans", [])
+        flask.g.render_spans.append(trace.open("render", template.name or "render"))
+
+
+def _finish_render(_sender: flask.Flask, **_extra: t.Any) -> None:
+    """Close the span of a rendered template."""
+    trace = active()
+    spans: t.List[Span] = flask.g.get("render_spans", [])
+    if trace is not None and spans:
+        trace.close(spans.pop())
+
+
+def init_app(app: flask.Flask) -> flask.Flask:
+    """Register request tracing on the provided Flask app."""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    flask.before_render_template.connect(_start_render, app)
+    flask.template_rendered.connect(_finish_render, app)
+    return app
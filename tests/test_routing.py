@@ -0,0 +1,176 @@
+"""Tests of where reads are sent when a database has replicas, and which are shared.
+
+The primary and replicas are SQLite files, which are not replicated,
+so a read shows which of them it was sent to.
+
+Run from the repository root with `python -m unittest discover tests`.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import typing as t
+import unittest
+
+import flask
+
+SITE = os.path.join(os.path.dirname(__file__), "..", "site")
+sys.path.insert(0, os.path.abspath(SITE))
+
+# pylint: disable=wrong-import-position
+import coalesce
+import storage
+
+CONFIG = """
+[database]
+backend="sqlite"
+path="primary.db"
+sticky=0.5
+
+[[database.replicas]]
+path="replica1.db"
+
+[[database.replicas]]
+path="replica2.db"
+"""
+
+
+def which() -> int:
+    """Give the index of the node a read is sent to, the primary being 0."""
+    cluster = storage.get_cluster(flask.current_app)
+    with storage.read() as db:
+        return cluster.pools.index(t.cast(storage.Pool, db.pool))
+
+
+def build_app() -> flask.Flask:
+    """Build an app that writes a mood, and that tells where its reads go."""
+    app = flask.Flask(__name__)
+    storage.init_app(app)
+
+    @app.post("/write")
+    def _write() -> flask.Response:
+        with storage.write() as db:
+            db.procedure("put_mood", ("calm",))
+        return flask.jsonify(which())
+
+    @app.get("/read")
+    def _read() -> flask.Response:
+        return flask.jsonify(which())
+
+    @app.get("/fill")
+    def _fill() -> flask.Response:
+        with storage.filling():
+            return flask.jsonify(which())
+
+    return app
+
+
+class RoutingTest(unittest.TestCase):
+    """Reads go to replicas unless they follow a write of their client."""
+
+    def setUp(self) -> None:
+        """Configure a primary and two replicas in a temporary directory."""
+        # cleaned up in tearDown
+        # pylint: disable-next=consider-using-with
+        self.directory = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        with open(storage.CONFIG, "w", encoding="utf-8") as file:
+            file.write(CONFIG)
+        storage.load_config.cache_clear()
+        self.app = build_app()
+
+    def tearDown(self) -> None:
+        """Close every connection and remove the databases."""
+        for cluster in storage.get_clusters(self.app).values():
+            cluster.close()
+        storage.load_config.cache_clear()
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def test_reads_are_spread_over_replicas(self) -> None:
+        """Reads take turns between the replicas."""
+        client = self.app.test_client()
+        nodes = {client.get("/read").json for _ in range(4)}
+        self.assertEqual(nodes, {1, 2})
+
+    def test_request_reads_its_writes(self) -> None:
+        """Reads after a write in the same request go to the primary."""
+        response = self.app.test_client().post("/write")
+        self.assertEqual(response.json, 0)
+        self.assertIn(storage.STICKY, response.headers.get("Set-Cookie", ""))
+
+    def test_client_sticks_after_its_write(self) -> None:
+        """The writing client reads from the primary for sticky seconds, others do not."""
+        writer = self.app.test_client()
+        other = self.app.test_client()
+        writer.post("/write")
+        self.assertEqual(writer.get("/read").json, 0)
+        self.assertNotEqual(other.get("/read").json, 0)
+
+        time.sleep(0.6)
+        self.assertNotEqual(writer.get("/read").json, 0)
+
+    def test_fills_follow_any_write(self) -> None:
+        """Reads filling a shared cache go to the primary after a write of any client."""
+        writer = self.app.test_client()
+        other = self.app.test_client()
+        self.assertNotEqual(other.get("/fill").json, 0)
+        writer.post("/write")
+        self.assertEqual(other.get("/fill").json, 0)
+        self.assertNotEqual(other.get("/read").json, 0)
+
+        time.sleep(0.6)
+        self.assertNotEqual(other.get("/fill").json, 0)
+
+    def test_future_write_is_not_believed(self) -> None:
+        """A cookie claiming a write in the future does not pin reads to the primary."""
+        client = self.app.test_client()
+        client.set_cookie(storage.STICKY, str(time.time() + 3600))
+        self.assertNotEqual(client.get("/read").json, 0)
+
+    def test_stickiness_is_counted(self) -> None:
+        """Reads sent to the primary as they followed a write are counted."""
+        client = self.app.test_client()
+        client.post("/write")
+        client.get("/read")
+        stats = storage.get_cluster(self.app).stats
+        self.assertEqual(stats.sticky_reads, 2)
+
+    def test_sticky_reads_do_not_join_replica_reads(self) -> None:
+        """A read that must see its client's write does not share one of a replica."""
+        started, release = threading.Event(), threading.Event()
+        runs = []
+
+        def slow() -> str:
+            runs.append("replica")
+            started.set()
+            release.wait()
+            return "replica"
+
+        def lead() -> None:
+            with self.app.test_request_context("/read"):
+                coalesce.shared(storage.HOME, "get_moods", (), slow)
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait()
+        cookie = f"{storage.STICKY}={time.time()}"
+        with self.app.test_request_context("/read", headers={"Cookie": cookie}):
+            got = coalesce.shared(storage.HOME, "get_moods", (), lambda: "primary")
+        release.set()
+        leader.join()
+        self.assertEqual(got, "primary")
+        self.assertEqual(runs, ["replica"])
+
+    def test_unhashable_arguments_are_shared(self) -> None:
+        """Arguments need not be hashable to be coalesced."""
+        with self.app.test_request_context("/read"):
+            got = coalesce.shared(storage.HOME, "get_moods_page", ([1, 2],), lambda: 1)
+        self.assertEqual(got, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
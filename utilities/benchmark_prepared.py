@@ -0,0 +1,91 @@
+"""Compare calling the generated procedures against running them as prepared statements.
+
+Needs a MariaDB server configured by the [database] section of site/config.toml,
+with some moods in it.
+
+Run with something like
+`python utilities\\benchmark_prepared.py 1000`
+"""
+
+import logging
+import os
+import statistics
+import sys
+import time
+import typing as t
+
+import toml
+
+SITE = os.path.join(os.path.dirname(__file__), "..", "site")
+sys.path.insert(0, SITE)
+
+import storage  # pylint: disable=wrong-import-position
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def timings(
+    database: storage.Database,
+    name: str,
+    arguments: t.Tuple[t.Any, ...],
+    count: int,
+) -> t.List[float]:
+    """Time each of many calls of a procedure, in seconds."""
+    # the first call prepares the statements, so is left out
+    database.procedure(name, arguments)
+    seconds = []
+    for _ in range(count):
+        start = time.perf_counter()
+        database.procedure(name, arguments)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def main() -> None:
+    """Main function."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    config = toml.load(os.path.join(SITE, storage.CONFIG))
+    params = dict(storage.nodes(config)[0]["database"])
+    params.pop("backend", None)
+    params.pop("prepared", None)
+    called = storage.MariaDB(prepared=False, **params)
+    prepared = storage.MariaDB(prepared=True, **params)
+
+    mood = called.procedure("get_moods").rows[0][0]
+    cases: t.List[t.Tuple[str, t.Tuple[t.Any, ...]]] = [
+        ("get_mood", (mood,)),
+        ("get_moods_page", (None, 100)),
+        ("get_coloraffects_mood", (mood,)),
+    ]
+
+    for name, arguments in cases:
+        expected = list(called.procedure(name, arguments).rows)
+        assert list(prepared.procedure(name, arguments).rows) == expected, name
+        medians = []
+        for mode, database in [("call", called), ("prepared", prepared)]:
+            seconds = sorted(timings(database, name, arguments, count))
+            median = statistics.median(seconds)
+            medians.append(median)
+            logger.info(
+                "%-22s %-8s mean %7.1f us  p50 %7.1f us  p95 %7.1f us",
+                name,
+                mode,
+                statistics.mean(seconds) * 1e6,
+                median * 1e6,
+                seconds[int(len(seconds) * 0.95)] * 1e6,
+            )
+        logger.info(
+            "%-22s saves %7.1f us per call (%.0f%%)",
+            name,
+            (medians[0] - medians[1]) * 1e6,
+            (1 - medians[1] / medians[0]) * 100,
+        )
+
+    called.close()
+    prepared.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Compare the columnar Result against weaving a dict per row.
+
+Run with something like
+`python utilities\\benchmark_result.py 100000`
+"""
+
+import json
+import logging
+import os
+import sys
+import timeit
+import tracemalloc
+import typing as t
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "site"))
+
+import columnar  # pylint: disable=wrong-import-position
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+HEADERS = (
+    "clientId",
+    "number",
+    "mood",
+    "taste",
+    "scent",
+    "color",
+    "shape",
+    "media",
+    "music",
+)
+
+Row = t.Tuple[t.Any, ...]
+
+
+def make_rows(count: int) -> t.List[Row]:
+    """Fabricate rows shaped like get_result_all."""
+    moods = ["Relaxed", "Focused", "Intense", "Vibrant", "Sensual"]
+    return [
+        (
+            7,
+            number,
+            moods[number % len(moods)],
+            "Sweet",
+            "Floral",
+            "Sky Blue",
+            "Circle",
+            "Comedy",
+            "Jazz",
+        )
+        for number in range(count)
+    ]
+
+
+def woven(rows: t.List[Row]) -> t.Sequence[t.Mapping[str, t.Any]]:
+    """The previous path, a dict per row."""
+    return [dict(zip(HEADERS, row)) for row in rows]
+
+
+def woven_json(rows: t.List[Row]) -> str:
+    """The previous path, serialized."""
+    return json.dumps(woven(rows))
+
+
+def columnar_json(rows: t.List[Row]) -> str:
+    """The columnar path, serialized."""
+    return columnar.Result(HEADERS, rows).to_json()
+
+
+def retained(build: t.Callable[[], object]) -> int:
+    """Measure the bytes retained by the structure a callable builds."""
+    tracemalloc.start()
+    structure = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    return size
+
+
+def main() -> None:
+    """Main function."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeat = 5
+
+    rows = make_rows(count)
+    assert json.loads(woven_json(rows)) == json.loads(columnar_json(rows))
+
+    for name, function in [("woven", woven_json), ("columnar", columnar_json)]:
+
+        def run(convert: t.Callable[[t.List[Row]], str] = function) -> str:
+            return convert(rows)
+
+        seconds = min(timeit.repeat(run, number=1, repeat=repeat))
+        logger.info("%-8s to json: %8.1f ms", name, seconds * 1000)
+
+    # rows are rebuilt inside so that the columnar Result is measured without them
+    woven_bytes = retained(lambda: woven(make_rows(count)))
+    rows_bytes = retained(lambda: make_rows(count))
+    columnar_bytes = retained(lambda: columnar.Result(HEADERS, make_rows(count)))
+    logger.info("%-8s retained: %8.1f KiB", "rows", rows_bytes / 1024)
+    logger.info("%-8s retained: %8.1f KiB", "woven", woven_bytes / 1024)
+    logger.info("%-8s retained: %8.1f KiB", "columnar", columnar_bytes / 1024)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 """Read a file denoting raw resource contents and produce an API schema.
 
 Run with something like
-`python utilities\\generate_resources.py < database\\raw.txt > database\\generated.txt`
+`python utilities\\generate_resources.py api < database\\raw.txt > database\\generated.txt`,
+`python utilities\\generate_resources.py procedures < database\\rawsql.txt`
+or `python utilities\\generate_resources.py statements < database\\rawsql.txt`
 """
 
 import dataclasses
 import itertools
+import json
 import logging
 import sys
 import typing as t
@@ -93,6 +96,12 @@ Method: GET
 Input: None
 Output: [{key_type}]
 
+Description: Create / update many {name}s in one transaction
+URL: /api/{name}s/
+Method: PUT
+Input: [{{{output_list}}}]
+Output: {{"count": int, "errors": [{{"index": int, "error": string}}]}}
+
     Description: Get information on a {name}
     URL: /api/{name}s/<{key_name}: {key_type}>
     Method: GET
@@ -132,17 +141,48 @@ Output: [{{"{name}": {key_type}, "{foreign_name}": {foreign_type}}}]
     Method: DELETE
     Input: {{"{name}": {key_type}, "{foreign_name}": {foreign_type}}}
     Output: {{"{name}": {key_type}, "{foreign_name}": {foreign_type}}}
+
+    Description: Create many connections with {name}s in one transaction
+    URL: /api/{name}s_connections
+    Method: POST
+    Input: [{{"{name}": {key_type}, "{foreign_name}": {foreign_type}}}]
+    Output: {{"count": int, "errors": [{{"index": int, "error": string}}]}}
+
+    Description: Delete many connections with {name}s in one transaction
+    URL: /api/{name}s_connections
+    Method: DELETE
+    Input: [{{"{name}": {key_type}, "{foreign_name}": {foreign_type}}}]
+    Output: {{"count": int, "errors": [{{"index": int, "error": string}}]}}
 """
         # dont strip leading newline
         text += extra
     print(text[1:], file=output)
 
 
+def json_column(name: str, kind: str) -> str:
+    """Give a JSON_TABLE column of a field of the items.
+
+    A field that does not convert to the column type fails the statement,
+    rather than being stored as NULL or truncated.
+    """
+    return f"{name} {kind} PATH '$.{name}' ERROR ON ERROR"
+
+
 def print_procedures(output: t.TextIO, resource: Resource) -> None:
     """Print CRUD stored procedures for a resource."""
 
     parameter_list = ", ".join(f"IN {attr.name} {attr.type}" for attr in resource.attrs)
     selection_list = ", ".join(f"{attr.name}" for attr in resource.attrs)
+    json_columns = (
+        "\n                "
+        + ",\n                ".join(
+            json_column(attr.name, attr.type) for attr in resource.attrs
+        )
+        + "\n            "
+    )
+    bulk_update = ", ".join(
+        f"{resource.name}.{attr.name} = VALUES({attr.name})" for attr in resource.attrs
+    )
     update_string = (
         "    ON DUPLICATE KEY UPDATE\n            "
         + ", ".join(
@@ -161,6 +201,18 @@ CREATE OR REPLACE PROCEDURE get_{resource.name.lower()}s()
     END;
 //
 
+CREATE OR REPLACE PROCEDURE get_{resource.name.lower()}s_page(IN after {resource.key.type}, IN size INT)
+    READS SQL DATA
+    BEGIN
+        SELECT {resource.key.name}
+        FROM {resource.name}
+        WHERE after IS NULL OR {resource.name}.{resource.key.name} > after
+        ORDER BY {resource.name}.{resource.key.name}
+        LIMIT size
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_{resource.name.lower()}(IN {resource.key.name} {resource.key.type})
     READS SQL DATA
     BEGIN
@@ -180,6 +232,18 @@ CREATE OR REPLACE PROCEDURE put_{resource.name.lower()}({parameter_list})
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_{resource.name.lower()}_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO {resource.name} ({selection_list})
+        SELECT {selection_list}
+        FROM JSON_TABLE(items, '$[*]' COLUMNS ({json_columns})) AS item
+        ON DUPLICATE KEY UPDATE
+            {bulk_update}
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE delete_{resource.name.lower()}(IN {resource.key.name} {resource.key.type})
     MODIFIES SQL DATA
     BEGIN
@@ -203,6 +267,19 @@ CREATE OR REPLACE PROCEDURE delete_{resource.name.lower()}(IN {resource.key.name
         delete_portion = " AND ".join(
             f"{table}.{attr.name} = {attr.name}" for attr in [this, other]
         )
+        json_columns = (
+            "\n                "
+            + ",\n                ".join(
+                json_column(attr.name, attr.type) for attr in [this, other]
+            )
+            + "\n            "
+        )
+        bulk_update = ", ".join(
+            f"{table}.{attr.name} = VALUES({attr.name})" for attr in [this, other]
+        )
+        join_portion = " AND ".join(
+            f"{table}.{attr.name} = item.{attr.name}" for attr in [this, other]
+        )
 
         extra = f"""
 CREATE OR REPLACE PROCEDURE put_{this.name}affects({parameters})
@@ -225,6 +302,29 @@ CREATE OR REPLACE PROCEDURE delete_{this.name}affects({parameters})
     END;
 //
 
+CREATE OR REPLACE PROCEDURE put_{this.name}affects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        INSERT INTO {table} ({selections})
+        SELECT {selections}
+        FROM JSON_TABLE(items, '$[*]' COLUMNS ({json_columns})) AS item
+        ON DUPLICATE KEY UPDATE
+            {bulk_update}
+        ;
+    END;
+//
+
+CREATE OR REPLACE PROCEDURE delete_{this.name}affects_bulk(IN items JSON)
+    MODIFIES SQL DATA
+    BEGIN
+        DELETE {table}
+        FROM {table}
+        JOIN JSON_TABLE(items, '$[*]' COLUMNS ({json_columns})) AS item
+            ON {join_portion}
+        ;
+    END;
+//
+
 CREATE OR REPLACE PROCEDURE get_{this.name}affects_{other.name}(IN {other.name} {other.type})
     READS SQL DATA
     BEGIN
@@ -269,10 +369,274 @@ CREATE OR REPLACE PROCEDURE get_{this.name}affects()
     print(text[1:], file=output)
 
 
+def print_statements(output: t.TextIO, resource: Resource) -> None:
+    """Print SQLite statements equivalent to the CRUD procedures of a resource.
+
+    Each procedure is given by its parameter names and statements,
+    which refer to the parameters by name.
+    """
+
+    table = resource.name
+    lower = table.lower()
+    key = resource.key.name
+    names = [attr.name for attr in resource.attrs]
+    selection_list = ", ".join(names)
+    value_list = ", ".join(f":{name}" for name in names)
+    json_list = ", ".join(f"json_extract(item.value, '$.{name}')" for name in names)
+    conflict = f"ON CONFLICT ({key}) DO " + (
+        "UPDATE SET "
+        + ", ".join(f"{a.name} = excluded.{a.name}" for a in resource.others)
+        if resource.others
+        else "NOTHING"
+    )
+
+    procedures: t.List[t.Tuple[str, t.Sequence[str], t.Sequence[str]]] = [
+        (f"get_{lower}s", [], [f"SELECT {key} FROM {table}"]),
+        (
+            f"get_{lower}s_page",
+            ["after", "size"],
+            [
+                f"SELECT {key} FROM {table}"
+                f" WHERE :after IS NULL OR {key} > :after ORDER BY {key} LIMIT :size"
+            ],
+        ),
+        (
+            f"get_{lower}",
+            [key],
+            [f"SELECT {selection_list} FROM {table} WHERE {key} = :{key}"],
+        ),
+        (
+            f"put_{lower}",
+            names,
+            [
+                f"INSERT INTO {table} ({selection_list}) VALUES ({value_list}) {conflict}"
+            ],
+        ),
+        (
+            f"put_{lower}_bulk",
+            ["items"],
+            [
+                f"INSERT INTO {table} ({selection_list})"
+                f" SELECT {json_list} FROM json_each(:items) AS item WHERE true {conflict}"
+            ],
+        ),
+        (f"delete_{lower}", [key], [f"DELETE FROM {table} WHERE {key} = :{key}"]),
+    ]
+
+    if resource.mark.startswith("qualia"):
+        name = resource.mark.split(",", maxsplit=1)[1]
+        affects = f"{name}Affects"
+        this = name.lower()
+        pair = [this, "mood"]
+        selections = ", ".join(pair)
+        json_pair = ", ".join(f"json_extract(item.value, '$.{attr}')" for attr in pair)
+        both = f"{this} = :{this} AND mood = :mood"
+        procedures += [
+            (
+                f"put_{this}affects",
+                pair,
+                [
+                    f"INSERT INTO {affects} ({selections}) VALUES (:{this}, :mood)"
+                    " ON CONFLICT DO NOTHING"
+                ],
+            ),
+            (f"delete_{this}affects", pair, [f"DELETE FROM {affects} WHERE {both}"]),
+            (
+                f"put_{this}affects_bulk",
+                ["items"],
+                [
+                    f"INSERT INTO {affects} ({selections})"
+                    f" SELECT {json_pair} FROM json_each(:items) AS item WHERE true"
+                    " ON CONFLICT DO NOTHING"
+                ],
+            ),
+            (
+                f"delete_{this}affects_bulk",
+                ["items"],
+                [
+                    f"DELETE FROM {affects} WHERE ({selections}) IN"
+                    f" (SELECT {json_pair} FROM json_each(:items) AS item)"
+                ],
+            ),
+            (
+                f"get_{this}affects_mood",
+                ["mood"],
+                [f"SELECT {selections} FROM {affects} WHERE mood = :mood"],
+            ),
+            (
+                f"get_{this}affects_{this}",
+                [this],
+                [f"SELECT {selections} FROM {affects} WHERE {this} = :{this}"],
+            ),
+            (
+                f"get_{this}affects_{this}_mood",
+                pair,
+                [f"SELECT {selections} FROM {affects} WHERE {both}"],
+            ),
+            (f"get_{this}affects", [], [f"SELECT {selections} FROM {affects}"]),
+        ]
+
+    print_literal(output, procedures)
+
+
+def print_prepared(output: t.TextIO, resource: Resource) -> None:
+    """Print MariaDB statements equivalent to the CRUD procedures of a resource.
+
+    Each procedure is given by its parameter names and statements,
+    which refer to the parameters by name, to be prepared in their place.
+    """
+
+    table = resource.name
+    lower = table.lower()
+    key = resource.key.name
+    names = [attr.name for attr in resource.attrs]
+    selection_list = ", ".join(names)
+    value_list = ", ".join(f":{name}" for name in names)
+    json_columns = ", ".join(
+        json_column(attr.name, attr.type) for attr in resource.attrs
+    )
+    update = "ON DUPLICATE KEY UPDATE " + ", ".join(
+        f"{table}.{name} = VALUES({name})" for name in names
+    )
+
+    procedures: t.List[t.Tuple[str, t.Sequence[str], t.Sequence[str]]] = [
+        (f"get_{lower}s", [], [f"SELECT {key} FROM {table}"]),
+        (
+            f"get_{lower}s_page",
+            ["after", "size"],
+            [
+                f"SELECT {key} FROM {table}"
+                f" WHERE :after IS NULL OR {key} > :after ORDER BY {key} LIMIT :size"
+            ],
+        ),
+        (
+            f"get_{lower}",
+            [key],
+            [f"SELECT {selection_list} FROM {table} WHERE {key} = :{key}"],
+        ),
+        (
+            f"put_{lower}",
+            names,
+            [f"INSERT INTO {table} ({selection_list}) VALUES ({value_list}) {update}"],
+        ),
+        (
+            f"put_{lower}_bulk",
+            ["items"],
+            [
+                f"INSERT INTO {table} ({selection_list}) SELECT {selection_list}"
+                f" FROM JSON_TABLE(:items, '$[*]' COLUMNS ({json_columns})) AS item"
+                f" {update}"
+            ],
+        ),
+        (f"delete_{lower}", [key], [f"DELETE FROM {table} WHERE {key} = :{key}"]),
+    ]
+
+    if resource.mark.startswith("qualia"):
+        name = resource.mark.split(",", maxsplit=1)[1]
+        affects = f"{name}Affects"
+        this = name.lower()
+        pair = [this, "mood"]
+        selections = ", ".join(pair)
+        json_pair = ", ".join(json_column(attr, "NVARCHAR(255)") for attr in pair)
+        pair_update = "ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{affects}.{attr} = VALUES({attr})" for attr in pair
+        )
+        both = f"{this} = :{this} AND mood = :mood"
+        procedures += [
+            (
+                f"put_{this}affects",
+                pair,
+                [
+                    f"INSERT INTO {affects} ({selections}) VALUES (:{this}, :mood)"
+                    f" {pair_update}"
+                ],
+            ),
+            (f"delete_{this}affects", pair, [f"DELETE FROM {affects} WHERE {both}"]),
+            (
+                f"put_{this}affects_bulk",
+                ["items"],
+                [
+                    f"INSERT INTO {affects} ({selections}) SELECT {selections}"
+                    f" FROM JSON_TABLE(:items, '$[*]' COLUMNS ({json_pair})) AS item"
+                    f" {pair_update}"
+                ],
+            ),
+            (
+                f"delete_{this}affects_bulk",
+                ["items"],
+                [
+                    f"DELETE {affects} FROM {affects}"
+                    f" JOIN JSON_TABLE(:items, '$[*]' COLUMNS ({json_pair})) AS item"
+                    f" ON {affects}.{this} = item.{this}"
+                    f" AND {affects}.mood = item.mood"
+                ],
+            ),
+            (
+                f"get_{this}affects_mood",
+                ["mood"],
+                [f"SELECT {selections} FROM {affects} WHERE mood = :mood"],
+            ),
+            (
+                f"get_{this}affects_{this}",
+                [this],
+                [f"SELECT {selections} FROM {affects} WHERE {this} = :{this}"],
+            ),
+            (
+                f"get_{this}affects_{this}_mood",
+                pair,
+                [f"SELECT {selections} FROM {affects} WHERE {both}"],
+            ),
+            (f"get_{this}affects", [], [f"SELECT {selections} FROM {affects}"]),
+        ]
+
+    print_literal(output, procedures)
+
+
+def print_literal(
+    output: t.TextIO,
+    procedures: t.Sequence[t.Tuple[str, t.Sequence[str], t.Sequence[str]]],
+) -> None:
+    """Print procedures as entries of a black formatted python dict literal."""
+
+    for procedure, parameters, statements in procedures:
+        parameter_list = ", ".join(json.dumps(p) for p in parameters)
+        if len(parameters) == 1:
+            parameter_list += ","
+        print(f"    {json.dumps(procedure)}: (", file=output)
+        print(f"        ({parameter_list}),", file=output)
+        single = f"        ({json.dumps(statements[0])},),"
+        if len(statements) == 1 and len(single) <= 88:
+            print(single, file=output)
+        else:
+            print("        (", file=output)
+            for statement in statements:
+                print(f"            {json.dumps(statement)},", file=output)
+            print("        ),", file=output)
+        print("    ),", file=output)
+
+
+STATEMENTS_HEADER = '''"""Statements of the generated resource procedures, for running them directly.
+
+Generated by utilities/generate_resources.py from database/rawsql.txt.
+"""
+
+import typing as t
+
+Procedures = t.Dict[str, t.Tuple[t.Tuple[str, ...], t.Tuple[str, ...]]]
+
+# Procedure name to its parameter names and statements, for SQLite
+SQLITE: Procedures = {'''
+
+PREPARED_HEADER = """
+# Procedure name to its parameter names and statements, prepared by MariaDB
+MARIADB: Procedures = {"""
+
+
 def main() -> None:
     """Main function."""
 
-    MODE = "procedures"
+    # "api", "procedures" or "statements"
+    MODE = sys.argv[1] if len(sys.argv) > 1 else "procedures"
 
     if MODE == "api":
         raw_resources = list(read_raw(sys.stdin))
@@ -284,6 +648,17 @@ def main() -> None:
         logger.info(resources)
         for resource in resources:
             print_procedures(sys.stdout, resource)
+    elif MODE == "statements":
+        resources = [Resource.from_tuple(raw) for raw in read_raw(sys.stdin)]
+        logger.info(resources)
+        print(STATEMENTS_HEADER)
+        for resource in resources:
+            print_statements(sys.stdout, resource)
+        print("}")
+        print(PREPARED_HEADER)
+        for resource in resources:
+            print_prepared(sys.stdout, resource)
+        print("}")
 
 
 if __name__ == "__main__":
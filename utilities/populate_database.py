@@ -2,6 +2,7 @@
 
 import dataclasses
 import logging
+import time
 import typing as t
 
 import requests
@@ -28,10 +29,12 @@ class Resource:
         return self.attrs[0]
 
 
+API = "http://192.168.1.64:5000/api"
+
 DataStructure = t.Tuple[Resource, t.Sequence[t.Sequence[object]]]
 
 mood: DataStructure = (
-    Resource("moods", []),
+    Resource("moods", ["name"]),
     [
         ["Relaxed"],
         ["Focused"],
@@ -46,7 +49,7 @@ mood: DataStructure = (
 )
 
 color: DataStructure = (
-    Resource("colors", ["hue", "saturation", "brightness"]),
+    Resource("colors", ["name", "hue", "saturation", "brightness"]),
     [
         ["Crimson Red", 0, 100, 30],
         ["Midnight Blue", 240, 100, 40],
@@ -65,7 +68,7 @@ color: DataStructure = (
 )
 
 shape: DataStructure = (
-    Resource("shapes", ["sides"]),
+    Resource("shapes", ["name", "sides"]),
     [
         ["Square", 4],
         ["Triangle", 3],
@@ -80,7 +83,7 @@ shape: DataStructure = (
 )
 
 scent: DataStructure = (
-    Resource("scents", ["family"]),
+    Resource("scents", ["name", "family"]),
     [
         ["Floral", "Floral"],
         ["Fruity", "Floral and Fresh"],
@@ -95,7 +98,7 @@ scent: DataStructure = (
 )
 
 taste: DataStructure = (
-    Resource("tastes", []),
+    Resource("tastes", ["type"]),
     [
         ["Sweet"],
         ["Sour"],
@@ -107,7 +110,7 @@ taste: DataStructure = (
 )
 
 music: DataStructure = (
-    Resource("musics", []),
+    Resource("musics", ["name"]),
     [
         ["Pop"],
         ["Rhythm and Blues"],
@@ -125,7 +128,7 @@ music: DataStructure = (
 )
 
 media: DataStructure = (
-    Resource("medias", []),
+    Resource("medias", ["name"]),
     [
         ["Fantasy"],
         ["Action"],
@@ -242,19 +245,26 @@ def populate() -> None:
         music,
     ]
     for header, data in all_data:
-        for value in data:
-            url = f"http://192.168.1.64:5000/api/{header.name}/{value[0]}"
-            body = dict(zip(header.attrs, value[1:]))
-            logger.info("PUT %s (%s)", url, body)
-            requests.put(url, json=body)
+        url = f"{API}/{header.name}/"
+        body = [dict(zip(header.attrs, value)) for value in data]
+        start = time.perf_counter()
+        response = requests.put(url, json=body)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "PUT %s (%s rows, %.0f rows/s): %s",
+            url,
+            len(body),
+            len(body) / elapsed,
+            response.json(),
+        )
 
     c_header, results = connections
-    for result in results:
-        for qualia, table in zip(result[1:], c_header.attrs):
-            url = f"http://192.168.1.64:5000/api/{table}s_{c_header.name}"
-            body = {"mood": result[0], table: qualia}
-            logger.info("POST %s (%s)", url, body)
-            requests.post(url, json=body)
+    for column, table in enumerate(c_header.attrs, start=1):
+        url = f"{API}/{table}s_{c_header.name}"
+        body = [{"mood": result[0], table: result[column]} for result in results]
+        logger.info("POST %s (%s rows)", url, len(body))
+        response = requests.post(url, json=body)
+        logger.info("POST %s: %s", url, response.json())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,216 @@
+"""Move clients between shards while the site keeps serving them.
+
+Changing the shards of the config changes the shard the ring gives some clients,
+so they are moved around deploying the new config:
+
+1. `catalog NEW` copies the catalog from home to every shard of the new config.
+2. `pin NEW` records each client the new config places elsewhere
+   at the shard it is on now, where the site keeps finding it.
+3. Deploy NEW as site/config.toml, and restart the site.
+4. `move` moves the recorded clients to the shard the ring gives them, a batch at a time.
+   Writes to a batch are refused (503) while it is copied,
+   and the copies are left on the old shard until every process has stopped reading them.
+
+Moving keeps result numbers, so every node must give out different numbers,
+e.g. with MariaDB's auto_increment_increment and auto_increment_offset.
+A client whose numbers are taken on the new shard is left where it is.
+
+Run with something like
+`python utilities\\rebalance.py pin new_config.toml`
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import typing as t
+
+import toml
+
+SITE = os.path.join(os.path.dirname(__file__), "..", "site")
+sys.path.insert(0, SITE)
+
+# pylint: disable=wrong-import-position
+import recommend
+import service
+import sharding
+import storage
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+Config = t.Mapping[str, t.Any]
+
+
+def open_nodes(config: Config) -> t.Dict[str, storage.Database]:
+    """Connect to the primary of every node of a config."""
+    return {
+        name: storage.connect(node) for name, node in storage.shards(config).items()
+    }
+
+
+def clients(database: storage.Database, size: int = 1000) -> t.Iterator[int]:
+    """Give the id of every client on a node."""
+    after = None
+    while True:
+        ids = database.procedure("get_clients_page", (after, size)).vertical()
+        yield from ids
+        if len(ids) < size:
+            return
+        after = ids[-1]
+
+
+def recorded(home: storage.Database) -> t.Dict[int, sharding.Placement]:
+    """Give the clients recorded away from the ring."""
+    return {
+        row["clientId"]: sharding.Placement(row["shard"], bool(row["moving"]))
+        for row in home.procedure("get_client_shards").all()
+    }
+
+
+def copy_catalog(home: storage.Database, target: storage.Database) -> None:
+    """Copy every catalog resource and connection from home to a shard."""
+    with target.unit():
+        for alt in service.CATALOG.values():
+            keys = list(home.procedure(f"get_{alt}s").vertical())
+            rows = [
+                dict(home.procedure(f"get_{alt}", (key,)).one() or {}) for key in keys
+            ]
+            target.procedure(f"put_{alt}_bulk", (json.dumps(rows),))
+            logger.info("Copied %s %s", len(rows), alt)
+        for q in recommend.QUALIA:
+            rows = [dict(row) for row in home.procedure(f"get_{q}affects").all()]
+            target.procedure(f"put_{q}affects_bulk", (json.dumps(rows),))
+            logger.info("Copied %s %saffects", len(rows), q)
+
+
+def catalog(current: Config, target: Config) -> None:
+    """Copy the catalog to every shard of the target config."""
+    home = storage.connect(current)
+    for name, database in open_nodes(target).items():
+        if name != storage.HOME:
+            logger.info("Copying the catalog to %s", name)
+            copy_catalog(home, database)
+        database.close()
+    home.close()
+
+
+def pin(current: Config, target: Config) -> None:
+    """Record the clients the target config moves at the shard they are on now."""
+    ring = sharding.Directory.from_config(target).ring
+    nodes = open_nodes(current)
+    home = nodes[storage.HOME]
+    pinned = recorded(home)
+    count = 0
+    with home.unit():
+        for name, database in nodes.items():
+            for client in clients(database):
+                if ring.node(client) != name:
+                    home.procedure("put_client_shard", (client, name, False))
+                    count += 1
+                elif client in pinned:
+                    home.procedure("delete_client_shard", (client,))
+    logger.info("Pinned %s clients", count)
+    for database in nodes.values():
+        database.close()
+
+
+def copy_client(
+    source: storage.Database, target: storage.Database, client: int
+) -> None:
+    """Copy the user, client and results of a client between nodes, in one unit.
+
+    Whatever an earlier attempt left on the target is replaced.
+    """
+    user = source.procedure("get_user", (client,)).one()
+    profile = source.procedure("get_client", (client,)).one()
+    if user is None or profile is None:
+        raise storage.Error(f"Client {client} is not on its shard")
+    with target.unit():
+        target.procedure("delete_client", (client,))
+        target.procedure("put_user", (user["id"], user["username"]))
+        target.procedure("put_client", tuple(profile.values()))
+        for result in source.stream("get_result_all", (client,)).rows:
+            target.procedure("put_result", result)
+
+
+def move(config: Config, batch: int) -> None:
+    """Move the recorded clients to the shard the ring gives them, a batch at a time.
+
+    Each batch is marked as moving, so that the site refuses to write to it,
+    then copied, and once it is unmarked, deleted from the old shard.
+    Between each step the site's processes are given time to reload the directory.
+    """
+    directory = sharding.Directory.from_config(config)
+    wait = directory.ttl + 1.0
+    nodes = open_nodes(config)
+    home = nodes[storage.HOME]
+
+    moves = []
+    with home.unit():
+        for client, placement in recorded(home).items():
+            if directory.ring.node(client) == placement.node:
+                home.procedure("delete_client_shard", (client,))
+            else:
+                moves.append((client, placement.node))
+    logger.info("Moving %s clients", len(moves))
+
+    total = 0
+    for start in range(0, len(moves), batch):
+        chunk = moves[start : start + batch]
+        with home.unit():
+            for client, source in chunk:
+                home.procedure("put_client_shard", (client, source, True))
+        time.sleep(wait)
+
+        moved = []
+        for client, source in chunk:
+            target = directory.ring.node(client)
+            try:
+                copy_client(nodes[source], nodes[target], client)
+            except storage.Error as e:
+                logger.warning("Could not move client %s to %s: %s", client, target, e)
+                home.procedure("put_client_shard", (client, source, False))
+                continue
+            home.procedure("delete_client_shard", (client,))
+            moved.append((client, source))
+        time.sleep(wait)
+
+        for client, source in moved:
+            with nodes[source].unit():
+                nodes[source].procedure("delete_client", (client,))
+                if source != storage.HOME:
+                    nodes[source].procedure("delete_user", (client,))
+        total += len(moved)
+        logger.info("Moved %s of %s clients", total, len(moves))
+
+    for database in nodes.values():
+        database.close()
+
+
+def main() -> None:
+    """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", maxsplit=1)[0])
+    parser.add_argument("step", choices=["catalog", "pin", "move"])
+    parser.add_argument("target", nargs="?", help="the new config, for catalog and pin")
+    parser.add_argument("--config", default=os.path.join(SITE, storage.CONFIG))
+    parser.add_argument("--batch", type=int, default=100)
+    arguments = parser.parse_args()
+
+    current = toml.load(arguments.config)
+    target = toml.load(arguments.target) if arguments.target else current
+    # paths in the configs are relative to the site, like when it runs
+    os.chdir(os.path.dirname(os.path.abspath(arguments.config)))
+
+    if arguments.step == "catalog":
+        catalog(current, target)
+    elif arguments.step == "pin":
+        pin(current, target)
+    else:
+        move(current, arguments.batch)
+
+
+if __name__ == "__main__":
+    main()